@@ -6,14 +6,64 @@ Connects to MySQL database and handles authentication
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 import mysql.connector
-from mysql.connector import pooling, Error
+from mysql.connector import Error
 import hashlib
 import datetime
+import json
 import secrets
 import os
+import time
+
+from incentive_calc import (
+    DAILY_PAY_DAYS,
+    WEEKLY_PAY_DAYS,
+    DAILY_SLAB_ROWS_QUERY,
+    WEEKLY_SLAB_ROWS_QUERY,
+    DAILY_EMPLOYEE_SLAB_ROWS_QUERY,
+    WEEKLY_EMPLOYEE_SLAB_ROWS_QUERY,
+    EMPTY_INCENTIVES,
+    build_batch,
+    employee_incentives,
+    evaluate_slabs,
+    metric_results,
+)
+from event_ingest import (
+    EVENT_BATCH_SIZE,
+    EVENT_FLUSH_INTERVAL,
+    EVENT_QUEUE_SIZE,
+    EventIngestor,
+    normalize_event,
+)
+from cache_sync import CACHE_SYNC_INTERVAL, CacheInvalidations
+from event_spool import SPOOL_FSYNC_INTERVAL, SPOOL_SEGMENT_BYTES, SpooledEventIngestor
+from home_bootstrap import HOME_SECTION_TIMEOUT, configure_home_executor, run_sections
+from leaderboard_cache import LEADERBOARD_CACHE_TTL, LeaderboardCache
+from incentive_snapshot import SNAPSHOT_TTL_SECONDS, IncentiveSnapshotStore, SnapshotUnavailable
+from response_cache import RESPONSE_CACHE_MAX_BYTES, ResponseCache
+from json_stream import streamed_list_response, wants_stream
+from metrics import METRICS_CONTENT_TYPE, clear_metrics_dir, registry as metrics
+from pagination import PAGE_ARGS_MESSAGE, page_args, page_fields
+from request_timing import install_request_timing, phase
+from schema_cache import SchemaCache
+from structured_log import get_logger, log_stats
+from sku_grouping import SkuGrouping
+from db_access import ColumnMap, fetch_rows, fetch_tuples, statement_stats, stream_rows
+from db_pool import (
+    POOL_ACQUIRE_TIMEOUT,
+    POOL_MAX_IDLE,
+    POOL_MAX_LIFETIME,
+    POOL_MAX_SIZE,
+    POOL_MIN_SIZE,
+    POOL_VALIDATE_AFTER,
+    ConnectionPool,
+    PoolTimeout,
+)
 
 app = Flask(__name__)
 
+# Leveled, structured records written by a background thread (see structured_log)
+log = get_logger('app')
+
 # CORS configuration - Allow Vercel frontend and localhost
 ALLOWED_ORIGINS = [
     'http://localhost:5173',  # Local development
@@ -23,43 +73,203 @@ ALLOWED_ORIGINS = [
 ]
 CORS(app, origins=ALLOWED_ORIGINS, supports_credentials=True)
 
-# Database configuration with connection pooling
+# Per-request phase timings: Server-Timing header, 'request' log record and
+# the rolling per-route histogram at /api/admin/timing
+timing_histogram = install_request_timing(app)
+
+# Query metrics are labelled with the name of the *_QUERY constant holding the SQL
+metrics.query_templates.add_source(globals())
+
+# Database configuration with connection pooling. DB_HOST etc. point the
+# server at another database, e.g. a local one seeded by fixture_db.py
 DB_CONFIG = {
-    'host': '116.202.114.156',
-    'port': 3971,
-    'user': 'datalake_trw',
-    'password': 'Tedd@13332!wq23',
-    'database': 'datalake'
+    'host': os.environ.get('DB_HOST', '116.202.114.156'),
+    'port': int(os.environ.get('DB_PORT', 3971)),
+    'user': os.environ.get('DB_USER', 'datalake_trw'),
+    'password': os.environ.get('DB_PASSWORD', 'Tedd@13332!wq23'),
+    'database': os.environ.get('DB_NAME', 'datalake')
 }
 
 # Create connection pool for better performance
-# Pool reuses connections instead of creating new ones for each request
-try:
-    connection_pool = pooling.MySQLConnectionPool(
-        pool_name="sales_app_pool",
-        pool_size=5,  # 5 connections in the pool
-        pool_reset_session=True,
-        **DB_CONFIG
-    )
-    print("[OK] Database connection pool created successfully")
-except Error as e:
-    print(f"[ERROR] Error creating connection pool: {e}")
-    connection_pool = None
+# Pool reuses connections instead of creating new ones for each request.
+# Requests wait up to DB_POOL_TIMEOUT for a free connection rather than
+# opening extra ones against the remote server.
+connection_pool = ConnectionPool(
+    DB_CONFIG,
+    min_size=int(os.environ.get('DB_POOL_MIN', POOL_MIN_SIZE)),
+    max_size=int(os.environ.get('DB_POOL_MAX', POOL_MAX_SIZE)),
+    acquire_timeout=float(os.environ.get('DB_POOL_TIMEOUT', POOL_ACQUIRE_TIMEOUT)),
+    max_idle=float(os.environ.get('DB_POOL_MAX_IDLE', POOL_MAX_IDLE)),
+    max_lifetime=float(os.environ.get('DB_POOL_MAX_LIFETIME', POOL_MAX_LIFETIME)),
+    validate_after=float(os.environ.get('DB_POOL_VALIDATE_AFTER', POOL_VALIDATE_AFTER))
+)
+
+# Open a direct connection when the pool times out (off by default - under
+# load that stampedes the database with new WAN connections)
+DB_POOL_FALLBACK = os.environ.get('DB_POOL_FALLBACK', '0') == '1'
+
+# Connections all worker processes may hold together. Each gunicorn worker
+# gets an equal share (see init_worker and gunicorn.conf.py).
+DB_CONNECTION_BUDGET = int(os.environ.get('DB_CONNECTION_BUDGET', connection_pool.max_size))
+
+# Result of this process's readiness check, reported by /api/health
+worker_status = {'ready': False, 'pid': None, 'executives': None, 'error': None, 'checked_at': None}
 
 def get_db_connection():
     """Get database connection from pool"""
+    with phase('pool'):
+        return acquire_connection()
+
+def acquire_connection():
     try:
-        if connection_pool:
-            connection = connection_pool.get_connection()
-            return connection
-        else:
-            # Fallback to direct connection if pool fails
-            connection = mysql.connector.connect(**DB_CONFIG)
-            return connection
+        return connection_pool.acquire()
+    except PoolTimeout as e:
+        log.warning(str(e))
+        if not DB_POOL_FALLBACK:
+            return None
+        try:
+            connection_pool.record_fallback()
+            return mysql.connector.connect(**DB_CONFIG)
+        except Error as e:
+            log.error('Database connection error', error=str(e))
+            return None
     except Error as e:
-        print(f"[ERROR] Database connection error: {e}")
+        log.error('Database connection error', error=str(e))
         return None
 
+def check_readiness():
+    """Readiness step: the Executive table must be reachable through the pool"""
+    worker_status['checked_at'] = datetime.datetime.now().isoformat()
+    connection = get_db_connection()
+    if not connection:
+        worker_status.update(ready=False, error='Database connection failed')
+        return False
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SELECT COUNT(*) FROM Executive")
+        worker_status.update(ready=True, executives=cursor.fetchone()[0], error=None)
+        cursor.close()
+        return True
+    except Error as e:
+        worker_status.update(ready=False, error=str(e))
+        return False
+    finally:
+        if connection.is_connected():
+            connection.close()
+
+def init_worker(workers=1):
+    """Per-process database setup, run after fork and before serving requests.
+
+    Drops any pool state inherited from a preloading parent, sizes this
+    worker's pool to its share of DB_CONNECTION_BUDGET, opens the minimum
+    connections and runs the readiness check. A failed check is reported
+    by /api/health; the worker still starts and connects lazily.
+    """
+    worker_status['pid'] = os.getpid()
+    # Start following other workers' invalidations from here
+    cache_invalidations.poll(force=True)
+    connection_pool.reset_after_fork()
+    per_worker = max(1, DB_CONNECTION_BUDGET // max(1, workers))
+    connection_pool.resize(min(connection_pool.min_size, per_worker), per_worker)
+    home_threads = configure_home_executor(per_worker)
+
+    try:
+        connection_pool.fill()
+        log.info('Database connection pool created', pid=os.getpid(),
+                 connections=f"{connection_pool.min_size}-{per_worker}", home_threads=home_threads)
+    except Error as e:
+        log.error('Error creating connection pool', error=str(e))
+
+    if check_readiness():
+        log.info('Database connected', executives=worker_status['executives'])
+        load_schema()
+    else:
+        log.error('Readiness check failed', error=worker_status['error'])
+    return worker_status['ready']
+
+class DatabaseUnavailable(Exception):
+    """Raised by loaders when no connection could be obtained"""
+
+def load_schema():
+    """Validate the registered column projections against information_schema"""
+    try:
+        run_with_connection(schema_cache.refresh)
+        return True
+    except (Error, DatabaseUnavailable) as e:
+        # Until it loads, queries select every declared column
+        log.warning('Could not load schema cache', error=str(e))
+        return False
+
+def run_with_connection(loader, *args):
+    """Borrow a pooled connection, run loader(connection, *args) and return it"""
+    connection = get_db_connection()
+    if not connection:
+        raise DatabaseUnavailable('Database connection failed')
+    try:
+        return loader(connection, *args)
+    finally:
+        if connection.is_connected():
+            connection.close()
+
+# Incentive snapshots - one set-based query for all employees, shared by every request
+INCENTIVE_SNAPSHOT_TTL = int(os.environ.get('INCENTIVE_SNAPSHOT_TTL', SNAPSHOT_TTL_SECONDS))
+daily_incentive_snapshots = IncentiveSnapshotStore(
+    'daily', DAILY_SLAB_ROWS_QUERY, DAILY_PAY_DAYS, get_db_connection, INCENTIVE_SNAPSHOT_TTL
+)
+weekly_incentive_snapshots = IncentiveSnapshotStore(
+    'weekly', WEEKLY_SLAB_ROWS_QUERY, WEEKLY_PAY_DAYS, get_db_connection, INCENTIVE_SNAPSHOT_TTL
+)
+
+# Customer list responses - the SA_HomePage*/SA_CustomerPage* tables are
+# refreshed by batch jobs, so encoded responses are reused until their TTL
+# (RESPONSE_CACHE_TTL_<NAME>) and revalidated with ETags
+response_cache = ResponseCache(int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', RESPONSE_CACHE_MAX_BYTES)))
+
+# Admin invalidations reach one worker; it records them in CACHE_SYNC_DIR and
+# the other workers replay them before their next request (empty = this worker only)
+CACHE_SYNC_DIR = os.environ.get('CACHE_SYNC_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache_sync'))
+cache_invalidations = CacheInvalidations(
+    CACHE_SYNC_DIR, float(os.environ.get('CACHE_SYNC_INTERVAL', CACHE_SYNC_INTERVAL))
+)
+
+@app.before_request
+def sync_cache_invalidations():
+    cache_invalidations.poll()
+
+@cache_invalidations.handler('response')
+def apply_response_invalidation(endpoint=None, employee_id=None):
+    response_cache.invalidate(endpoint, employee_id)
+
+@cache_invalidations.handler('incentives')
+def apply_incentive_invalidation():
+    # The next lookup in this worker rebuilds from the refreshed tables
+    daily_incentive_snapshots.invalidate()
+    weekly_incentive_snapshots.invalidate()
+
+# Projection registry - the columns each endpoint serializes, validated
+# once per worker against information_schema (POST /api/admin/schema/refresh
+# after a batch job changes a table's shape)
+schema_cache = SchemaCache()
+
+# Admin endpoints require ADMIN_TOKEN in the X-Admin-Token header (or as a
+# Bearer token, which is what Prometheus scrape configs send). Without a
+# token they are open in development and closed when FLASK_ENV=production.
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN', '')
+PRODUCTION = os.environ.get('FLASK_ENV') == 'production'
+
+if PRODUCTION and not ADMIN_TOKEN:
+    log.warning('ADMIN_TOKEN is not set; admin endpoints and /metrics are disabled')
+
+def is_admin_request():
+    """Check the admin token for maintenance endpoints"""
+    if not ADMIN_TOKEN:
+        return not PRODUCTION
+    token = request.headers.get('X-Admin-Token', '')
+    authorization = request.headers.get('Authorization', '')
+    if not token and authorization.startswith('Bearer '):
+        token = authorization[len('Bearer '):]
+    return secrets.compare_digest(token, ADMIN_TOKEN)
+
 def hash_password(password):
     """Hash password using SHA-256"""
     return hashlib.sha256((password + 'SALES_EXEC_SALT').encode()).hexdigest()
@@ -74,15 +284,22 @@ def health_check():
     connection = get_db_connection()
     if connection:
         connection.close()
+        if not worker_status['ready']:
+            # The startup check failed but the database is back - re-run it
+            check_readiness()
+        if worker_status['ready'] and not schema_cache.loads:
+            load_schema()
         return jsonify({
             'success': True,
             'message': 'Sales Executive App API is running with database!',
-            'timestamp': datetime.datetime.now().isoformat()
+            'timestamp': datetime.datetime.now().isoformat(),
+            'worker': worker_status
         })
     else:
         return jsonify({
             'success': False,
-            'message': 'Database connection failed'
+            'message': 'Database connection failed',
+            'worker': worker_status
         }), 500
 
 @app.route('/api/keep-alive', methods=['GET'])
@@ -97,6 +314,10 @@ def keep_alive():
         'message': 'Server is awake and ready'
     })
 
+SIGNUP_EXECUTIVE_QUERY = "SELECT employee_id, Name, email, role FROM Executive WHERE employee_id = %s AND role = %s"
+REGISTERED_USER_QUERY = "SELECT employee_id FROM SalesExecutiveApp_Login WHERE employee_id = %s"
+LOGIN_USER_QUERY = "SELECT employee_id, password_hash, full_name, email, role FROM SalesExecutiveApp_Login WHERE employee_id = %s"
+
 @app.route('/api/auth/signup', methods=['POST'])
 def signup():
     """Signup endpoint - validates against Executive table"""
@@ -104,7 +325,7 @@ def signup():
     employee_id = data.get('employee_id', '').strip()
     password = data.get('password', '')
 
-    print(f"\n[INFO] Signup request for: {employee_id}")
+    log.info('Signup request', employee_id=employee_id)
 
     # Validate inputs
     if not employee_id or not password:
@@ -130,42 +351,35 @@ def signup():
         cursor = connection.cursor(dictionary=True)
 
         # Step 1: Check if employee exists in Executive table with correct role
-        print("[CHECK] Checking Executive table...")
-        cursor.execute(
-            "SELECT employee_id, Name, email, role FROM Executive WHERE employee_id = %s AND role = %s",
-            (employee_id, 'BUSINESS_DEVELOPMENT_EXECUTIVE')
-        )
+        log.debug('Checking Executive table')
+        cursor.execute(SIGNUP_EXECUTIVE_QUERY, (employee_id, 'BUSINESS_DEVELOPMENT_EXECUTIVE'))
         executive = cursor.fetchone()
 
         if not executive:
-            print(f"[ERROR] Employee {employee_id} not found or not authorized")
+            log.warning('Employee not found or not authorized', employee_id=employee_id)
             return jsonify({
                 'success': False,
                 'message': 'Employee ID not found or not authorized. Only Business Development Executives can register.'
             }), 403
 
-        print(f"[OK] Employee found: {executive['Name']} - {executive['role']}")
+        log.debug('Employee found', employee_id=employee_id, role=executive['role'])
 
         # Step 2: Check if already registered
-        print("[CHECK] Checking if already registered...")
-        cursor.execute(
-            "SELECT employee_id FROM SalesExecutiveApp_Login WHERE employee_id = %s",
-            (employee_id,)
-        )
+        log.debug('Checking if already registered')
+        cursor.execute(REGISTERED_USER_QUERY, (employee_id,))
         existing = cursor.fetchone()
 
         if existing:
-            print(f"[ERROR] Employee {employee_id} already registered")
+            log.warning('Employee already registered', employee_id=employee_id)
             return jsonify({
                 'success': False,
                 'message': 'User already registered. Please login.'
             }), 409
 
         # Step 3: Hash password and insert into SalesExecutiveApp_Login
-        print("🔐 Hashing password...")
         hashed_password = hash_password(password)
 
-        print("💾 Inserting into SalesExecutiveApp_Login table...")
+        log.debug('Inserting into SalesExecutiveApp_Login')
         cursor.execute(
             """INSERT INTO SalesExecutiveApp_Login
                (employee_id, password_hash, full_name, email, role, status, created_at, last_login, deleted)
@@ -174,7 +388,7 @@ def signup():
         )
         connection.commit()
 
-        print(f"[OK] User {employee_id} registered successfully in database!")
+        log.info('User registered', employee_id=employee_id)
 
         # Generate token
         token = f"token-{employee_id}-{secrets.token_hex(16)}"
@@ -192,7 +406,7 @@ def signup():
         }), 201
 
     except Error as e:
-        print(f"[ERROR] Database error: {e}")
+        log.error('Database error', error=str(e))
         return jsonify({
             'success': False,
             'message': 'Database error during signup',
@@ -210,7 +424,7 @@ def login():
     employee_id = data.get('employee_id', '').strip()
     password = data.get('password', '')
 
-    print(f"\n🔑 Login request for: {employee_id}")
+    log.debug('Login request', employee_id=employee_id)
 
     # Validate inputs
     if not employee_id or not password:
@@ -230,38 +444,32 @@ def login():
         cursor = connection.cursor(dictionary=True)
 
         # Get user from database
-        print("[CHECK] Fetching user from SalesExecutiveApp_Login...")
-        cursor.execute(
-            "SELECT employee_id, password_hash, full_name, email, role FROM SalesExecutiveApp_Login WHERE employee_id = %s",
-            (employee_id,)
-        )
+        cursor.execute(LOGIN_USER_QUERY, (employee_id,))
         user = cursor.fetchone()
 
         if not user:
-            print(f"[ERROR] User {employee_id} not found")
+            log.warning('Login failed: unknown user', employee_id=employee_id)
             return jsonify({
                 'success': False,
                 'message': 'Invalid employee ID or password'
             }), 401
 
         # Verify password
-        print("🔐 Verifying password...")
         if not verify_password(password, user['password_hash']):
-            print("[ERROR] Invalid password")
+            log.warning('Login failed: invalid password', employee_id=employee_id)
             return jsonify({
                 'success': False,
                 'message': 'Invalid employee ID or password'
             }), 401
 
         # Update last login
-        print("[INFO] Updating last login...")
         cursor.execute(
             "UPDATE SalesExecutiveApp_Login SET last_login = NOW() WHERE employee_id = %s",
             (employee_id,)
         )
         connection.commit()
 
-        print(f"[OK] Login successful for {employee_id}")
+        log.info('Login successful', employee_id=employee_id)
 
         # Generate token
         token = f"token-{employee_id}-{secrets.token_hex(16)}"
@@ -280,7 +488,7 @@ def login():
         }), 200
 
     except Error as e:
-        print(f"[ERROR] Database error: {e}")
+        log.error('Database error', error=str(e))
         return jsonify({
             'success': False,
             'message': 'Database error during login',
@@ -297,7 +505,7 @@ def forgot_password():
     data = request.get_json()
     employee_id = data.get('employee_id', '').strip()
 
-    print(f"\n📧 Password reset requested for: {employee_id}")
+    log.info('Password reset requested', employee_id=employee_id)
 
     # In production, this would:
     # 1. Fetch email from Executive table
@@ -312,592 +520,380 @@ def forgot_password():
 @app.route('/api/incentives/daily/<employee_id>', methods=['GET'])
 def get_daily_incentives(employee_id):
     """Get daily incentive calculations for an employee with slab targets"""
-    print(f"\n💰 Fetching daily incentives for: {employee_id}")
-
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({'success': False, 'message': 'Database connection failed'}), 500
+    log.debug('Fetching daily incentives', employee_id=employee_id)
 
     try:
-        cursor = connection.cursor(dictionary=True)
-
-        # Final Daily Overall Incentive Achievement
-        cursor.execute(
-            """SELECT
-                employee_id,
-                sum(max_variable_pay) as max_variable_pay,
-                sum(Achievement) as Achievement,
-                sum(slab1_target) as slab1_target,
-                sum(slab2_target) as slab2_target,
-                sum(slab3_target) as slab3_target
-            FROM
-            (SELECT
-                employee_id,
-                metric,
-                MAX(max_variable_pay) AS max_variable_pay,
-                MAX(CASE WHEN slab_segment = 'slab1' THEN variable_pay * incentive_percent END) AS slab1_target,
-                MAX(CASE WHEN slab_segment = 'slab2' THEN variable_pay * incentive_percent END) AS slab2_target,
-                MAX(CASE WHEN slab_segment = 'slab3' THEN variable_pay * incentive_percent END) AS slab3_target,
-                CASE
-                    WHEN MAX(Achievement) <= MAX(CASE WHEN slab_segment = 'slab1' THEN target END)
-                        THEN (MAX(Achievement) / MAX(CASE WHEN slab_segment = 'slab1' THEN target END))
-                             * MAX(CASE WHEN slab_segment = 'slab1' THEN variable_pay * incentive_percent END)
-
-                    WHEN MAX(Achievement) BETWEEN MAX(CASE WHEN slab_segment = 'slab1' THEN target END) AND MAX(CASE WHEN slab_segment = 'slab2' THEN target END)
-                        THEN (MAX(Achievement) / MAX(CASE WHEN slab_segment = 'slab2' THEN target END))
-                             * MAX(CASE WHEN slab_segment = 'slab2' THEN variable_pay * incentive_percent END)
-
-                    WHEN MAX(Achievement) BETWEEN MAX(CASE WHEN slab_segment = 'slab2' THEN target END) AND MAX(CASE WHEN slab_segment = 'slab3' THEN target END)
-                        THEN (MAX(Achievement) / MAX(CASE WHEN slab_segment = 'slab3' THEN target END))
-                             * MAX(CASE WHEN slab_segment = 'slab3' THEN variable_pay * incentive_percent END)
-
-                    ELSE MAX(CASE WHEN slab_segment = 'slab3' THEN variable_pay * incentive_percent END)
-                END AS Achievement
-            FROM (
-                SELECT
-                    dt.employee_id,
-                    dt.date,
-                    dt.metric,
-                    dt.incentive_percent,
-                    ((e.variable_pay / 31)) * dt.incentive_percent as max_variable_pay,
-                    ((e.variable_pay / 31)) AS variable_pay,
-                    dt.contribution,
-                    dt.slab_segment,
-                    MAX(dt.target) AS target,
-                    MAX(da.Achievement) AS Achievement
-                FROM DayTargets dt
-                LEFT JOIN DayAchievement da
-                    ON dt.date = da.date
-                    AND dt.metric = da.metric
-                    AND dt.employee_id = da.employee_id
-                LEFT JOIN Executive e
-                    ON e.employee_id = dt.employee_id
-                WHERE dt.employee_id = %s
-                  AND dt.date = CURDATE()
-                GROUP BY
-                    dt.employee_id,
-                    dt.date,
-                    dt.metric,
-                    e.variable_pay,
-                    dt.contribution,
-                    dt.slab_segment,
-                    dt.incentive_percent
-            ) AS base
-            GROUP BY employee_id, metric) base1
-            GROUP BY employee_id""",
-            (employee_id,)
-        )
-        result = cursor.fetchone()
-
-        if result:
-            max_target = float(result['max_variable_pay']) if result['max_variable_pay'] else 0
-            achievement = float(result['Achievement']) if result['Achievement'] else 0
-
-            incentive_data = {
-                'max_target': max_target,
-                'achieved_amount': achievement,
-                'remaining_amount': max_target - achievement,
-                'slab1_target': float(result['slab1_target']) if result['slab1_target'] else 0,
-                'slab2_target': float(result['slab2_target']) if result['slab2_target'] else 0,
-                'slab3_target': float(result['slab3_target']) if result['slab3_target'] else 0
-            }
-            print(f"[OK] Daily incentive: ₹{incentive_data['achieved_amount']:.2f} / ₹{incentive_data['max_target']:.2f}")
-            return jsonify({'success': True, 'incentives': incentive_data}), 200
-        else:
-            return jsonify({'success': True, 'incentives': {
-                'max_target': 0,
-                'achieved_amount': 0,
-                'remaining_amount': 0,
-                'slab1_target': 0,
-                'slab2_target': 0,
-                'slab3_target': 0
-            }}), 200
-
-    except Error as e:
-        print(f"[ERROR] Database error: {e}")
+        # Served from the all-employee snapshot instead of a per-request aggregation
+        incentive_data = daily_incentive_snapshots.get(employee_id)
+    except SnapshotUnavailable as e:
+        log.error('Daily incentive snapshot unavailable', error=str(e))
         return jsonify({'success': False, 'message': 'Database error', 'error': str(e)}), 500
-    finally:
-        if connection and connection.is_connected():
-            cursor.close()
-            connection.close()
+
+    log.debug('Daily incentive', employee_id=employee_id, achieved=incentive_data['achieved_amount'], max_target=incentive_data['max_target'])
+    return jsonify({'success': True, 'incentives': incentive_data}), 200
 
 @app.route('/api/incentives/weekly/<employee_id>', methods=['GET'])
 def get_weekly_incentives(employee_id):
     """Get weekly incentive calculations for an employee with slab targets"""
-    print(f"\n💰 Fetching weekly incentives for: {employee_id}")
+    log.debug('Fetching weekly incentives', employee_id=employee_id)
 
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({'success': False, 'message': 'Database connection failed'}), 500
+    try:
+        # Served from the all-employee snapshot instead of a per-request aggregation
+        incentive_data = weekly_incentive_snapshots.get(employee_id)
+    except SnapshotUnavailable as e:
+        log.error('Weekly incentive snapshot unavailable', error=str(e))
+        return jsonify({'success': False, 'message': 'Database error', 'error': str(e)}), 500
+
+    log.debug('Weekly incentive', employee_id=employee_id, achieved=incentive_data['achieved_amount'], max_target=incentive_data['max_target'])
+    return jsonify({'success': True, 'incentives': incentive_data}), 200
+
+@app.route('/api/admin/incentives/refresh', methods=['POST'])
+def refresh_incentive_snapshots():
+    """Rebuild both incentive snapshots, e.g. right after the achievement batch job
+
+    This worker rebuilds now; the others drop their snapshots and rebuild on
+    their next lookup (see cache_sync).
+    """
+    if not is_admin_request():
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 401
+
+    log.info('Refreshing incentive snapshots')
 
     try:
-        cursor = connection.cursor(dictionary=True)
+        daily_incentive_snapshots.refresh()
+        weekly_incentive_snapshots.refresh()
+    except (Error, SnapshotUnavailable) as e:
+        log.error('Incentive snapshot refresh failed', error=str(e))
+        return jsonify({'success': False, 'message': 'Snapshot refresh failed', 'error': str(e)}), 500
+    cache_invalidations.broadcast('incentives')
 
-        # Final Weekly Overall Incentive Achievement
-        cursor.execute(
-            """SELECT
-                employee_id,
-                sum(max_variable_pay) as max_variable_pay,
-                sum(Achievement) as Achievement,
-                sum(slab1_target) as slab1_target,
-                sum(slab2_target) as slab2_target,
-                sum(slab3_target) as slab3_target
-            FROM
-            (SELECT
-                employee_id,
-                metric,
-                MAX(max_variable_pay) AS max_variable_pay,
-                MAX(CASE WHEN slab_segment = 'slab1' THEN variable_pay * incentive_percent END) AS slab1_target,
-                MAX(CASE WHEN slab_segment = 'slab2' THEN variable_pay * incentive_percent END) AS slab2_target,
-                MAX(CASE WHEN slab_segment = 'slab3' THEN variable_pay * incentive_percent END) AS slab3_target,
-                CASE
-                    WHEN MAX(Achievement) <= MAX(CASE WHEN slab_segment = 'slab1' THEN target END)
-                        THEN (MAX(Achievement) / MAX(CASE WHEN slab_segment = 'slab1' THEN target END))
-                             * MAX(CASE WHEN slab_segment = 'slab1' THEN variable_pay * incentive_percent END)
-
-                    WHEN MAX(Achievement) BETWEEN MAX(CASE WHEN slab_segment = 'slab1' THEN target END) AND MAX(CASE WHEN slab_segment = 'slab2' THEN target END)
-                        THEN (MAX(Achievement) / MAX(CASE WHEN slab_segment = 'slab2' THEN target END))
-                             * MAX(CASE WHEN slab_segment = 'slab2' THEN variable_pay * incentive_percent END)
-
-                    WHEN MAX(Achievement) BETWEEN MAX(CASE WHEN slab_segment = 'slab2' THEN target END) AND MAX(CASE WHEN slab_segment = 'slab3' THEN target END)
-                        THEN (MAX(Achievement) / MAX(CASE WHEN slab_segment = 'slab3' THEN target END))
-                             * MAX(CASE WHEN slab_segment = 'slab3' THEN variable_pay * incentive_percent END)
-
-                    ELSE MAX(CASE WHEN slab_segment = 'slab3' THEN variable_pay * incentive_percent END)
-                END AS Achievement
-            FROM (
-                SELECT
-                    wt.employee_id,
-                    wt.yearweek,
-                    wt.metric,
-                    wt.incentive_percent,
-                    ((e.variable_pay / 31) * 7) * wt.incentive_percent as max_variable_pay,
-                    ((e.variable_pay / 31) * 7) AS variable_pay,
-                    wt.contribution,
-                    wt.slab_segment,
-                    MAX(wt.target) AS target,
-                    MAX(wa.Achievement) AS Achievement
-                FROM WeekTargets wt
-                LEFT JOIN WeekAchievement wa
-                    ON wt.yearweek = wa.yearweek
-                    AND wt.metric = wa.metric
-                    AND wt.employee_id = wa.employee_id
-                LEFT JOIN Executive e
-                    ON e.employee_id = wt.employee_id
-                WHERE wt.employee_id = %s
-                  AND wt.yearweek = yearweek(curdate() + interval 1 day, 1)
-                GROUP BY
-                    wt.employee_id,
-                    wt.yearweek,
-                    wt.metric,
-                    e.variable_pay,
-                    wt.contribution,
-                    wt.slab_segment,
-                    wt.incentive_percent
-            ) AS base
-            GROUP BY employee_id, metric) base1
-            GROUP BY employee_id""",
-            (employee_id,)
-        )
-        result = cursor.fetchone()
-
-        if result:
-            max_target = float(result['max_variable_pay']) if result['max_variable_pay'] else 0
-            achievement = float(result['Achievement']) if result['Achievement'] else 0
-
-            incentive_data = {
-                'max_target': max_target,
-                'achieved_amount': achievement,
-                'remaining_amount': max_target - achievement,
-                'slab1_target': float(result['slab1_target']) if result['slab1_target'] else 0,
-                'slab2_target': float(result['slab2_target']) if result['slab2_target'] else 0,
-                'slab3_target': float(result['slab3_target']) if result['slab3_target'] else 0
-            }
-            print(f"[OK] Weekly incentive: ₹{incentive_data['achieved_amount']:.2f} / ₹{incentive_data['max_target']:.2f}")
-            return jsonify({'success': True, 'incentives': incentive_data}), 200
-        else:
-            return jsonify({'success': True, 'incentives': {
-                'max_target': 0,
-                'achieved_amount': 0,
-                'remaining_amount': 0,
-                'slab1_target': 0,
-                'slab2_target': 0,
-                'slab3_target': 0
-            }}), 200
+    return jsonify({
+        'success': True,
+        'snapshots': [daily_incentive_snapshots.status(), weekly_incentive_snapshots.status()]
+    }), 200
 
-    except Error as e:
-        print(f"[ERROR] Database error: {e}")
-        return jsonify({'success': False, 'message': 'Database error', 'error': str(e)}), 500
-    finally:
-        if connection and connection.is_connected():
-            cursor.close()
-            connection.close()
+@app.route('/api/admin/incentives/status', methods=['GET'])
+def incentive_snapshot_status():
+    """Report age and size of the incentive snapshots"""
+    if not is_admin_request():
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 401
+
+    return jsonify({
+        'success': True,
+        'snapshots': [daily_incentive_snapshots.status(), weekly_incentive_snapshots.status()]
+    }), 200
+
+def load_targets(connection, employee_id, period, include_incentives=False):
+    """Targets with slab info and pending incentive for 'daily' or 'weekly'
+
+    Units, slabs and pending incentive come from a single flat query; the
+    slab ladder is evaluated in Python by incentive_calc.
+    """
+    query, pay_days = targets_query(period)
+    rows = fetch_tuples(connection, query, (employee_id,))
+    return targets_result(rows, employee_id, pay_days, include_incentives)
+
+def targets_query(period):
+    """(flat slab rows query, pay days) for 'daily' or 'weekly'"""
+    if period == 'daily':
+        return DAILY_EMPLOYEE_SLAB_ROWS_QUERY, DAILY_PAY_DAYS
+    return WEEKLY_EMPLOYEE_SLAB_ROWS_QUERY, WEEKLY_PAY_DAYS
+
+def targets_result(rows, employee_id, pay_days, include_incentives=False):
+    """Targets payload from the flat slab rows of one employee"""
+    batch = build_batch(rows, pay_days)
+    earned = evaluate_slabs(batch)
+    result = {'targets': metric_results(batch, earned)}
+
+    if include_incentives:
+        # Overall incentive summary from the same rows - no extra query
+        result['incentives'] = employee_incentives(batch, earned).get(employee_id, EMPTY_INCENTIVES)
+
+    return result
+
+def wants_incentives():
+    """True when the request asks for ?include=incentives"""
+    return 'incentives' in request.args.get('include', '').split(',')
 
 @app.route('/api/targets/daily/<employee_id>', methods=['GET'])
 def get_daily_targets(employee_id):
-    """Get daily targets and achievements for an employee with slab info and incentive pending"""
-    print(f"\n📊 Fetching daily targets with slabs for: {employee_id}")
+    """Get daily targets and achievements for an employee with slab info and incentive pending
+
+    Pass ?include=incentives to also get the overall incentive summary.
+    """
+    log.debug('Fetching daily targets', employee_id=employee_id)
 
     connection = get_db_connection()
     if not connection:
         return jsonify({'success': False, 'message': 'Database connection failed'}), 500
 
     try:
-        cursor = connection.cursor(dictionary=True)
-
-        # Get daily targets with slab information and incentive pending
-        cursor.execute(
-            """SELECT
-                employee_id,
-                metric,
-                MAX(target) AS Target,
-                MAX(achievement) AS Achievement,
-                MAX(CASE WHEN slab_segment = 'slab1' THEN target END) AS slab1_target,
-                MAX(CASE WHEN slab_segment = 'slab2' THEN target END) AS slab2_target,
-                MAX(CASE WHEN slab_segment = 'slab3' THEN target END) AS slab3_target,
-                MAX(max_variable_pay) - IFNULL(CASE
-                    WHEN MAX(Achievement) <= MAX(CASE WHEN slab_segment = 'slab1' THEN target END)
-                        THEN (MAX(Achievement) / MAX(CASE WHEN slab_segment = 'slab1' THEN target END))
-                             * MAX(CASE WHEN slab_segment = 'slab1' THEN variable_pay * incentive_percent END)
-
-                    WHEN MAX(Achievement) BETWEEN MAX(CASE WHEN slab_segment = 'slab1' THEN target END) AND MAX(CASE WHEN slab_segment = 'slab2' THEN target END)
-                        THEN (MAX(Achievement) / MAX(CASE WHEN slab_segment = 'slab2' THEN target END))
-                             * MAX(CASE WHEN slab_segment = 'slab2' THEN variable_pay * incentive_percent END)
-
-                    WHEN MAX(Achievement) BETWEEN MAX(CASE WHEN slab_segment = 'slab2' THEN target END) AND MAX(CASE WHEN slab_segment = 'slab3' THEN target END)
-                        THEN (MAX(Achievement) / MAX(CASE WHEN slab_segment = 'slab3' THEN target END))
-                             * MAX(CASE WHEN slab_segment = 'slab3' THEN variable_pay * incentive_percent END)
-
-                    ELSE MAX(CASE WHEN slab_segment = 'slab3' THEN variable_pay * incentive_percent END)
-                END, 0) AS Incentive_Pending
-            FROM (
-                SELECT
-                    dt.employee_id,
-                    dt.date,
-                    dt.metric,
-                    dt.unit,
-                    dt.incentive_percent,
-                    ((e.variable_pay / 31)) * dt.incentive_percent as max_variable_pay,
-                    ((e.variable_pay / 31)) AS variable_pay,
-                    dt.contribution,
-                    dt.slab_segment,
-                    MAX(dt.target) AS target,
-                    MAX(da.Achievement) AS Achievement
-                FROM DayTargets dt
-                LEFT JOIN DayAchievement da
-                    ON dt.date = da.date
-                    AND dt.metric = da.metric
-                    AND dt.employee_id = da.employee_id
-                LEFT JOIN Executive e
-                    ON e.employee_id = dt.employee_id
-                WHERE dt.employee_id = %s
-                  AND dt.date = CURDATE()
-                GROUP BY
-                    dt.employee_id,
-                    dt.date,
-                    dt.metric,
-                    dt.unit,
-                    e.variable_pay,
-                    dt.contribution,
-                    dt.slab_segment,
-                    dt.incentive_percent
-            ) AS base
-            GROUP BY employee_id, metric""",
-            (employee_id,)
-        )
-        targets = cursor.fetchall()
-
-        # Get unit information for each metric
-        cursor.execute(
-            """SELECT DISTINCT metric, unit FROM DayTargets
-               WHERE employee_id = %s AND date = CURDATE()""",
-            (employee_id,)
-        )
-        units = {row['metric']: row['unit'] for row in cursor.fetchall()}
-
-        # Format results
-        result = []
-        for target in targets:
-            metric_name = target['metric']
-            target_value = float(target['Target']) if target['Target'] else 0
-            achievement_value = float(target['Achievement']) if target['Achievement'] else 0
-            slab1 = float(target['slab1_target']) if target['slab1_target'] else 0
-            slab2 = float(target['slab2_target']) if target['slab2_target'] else 0
-            slab3 = float(target['slab3_target']) if target['slab3_target'] else 0
-            incentive_pending = float(target['Incentive_Pending']) if target['Incentive_Pending'] else 0
-
-            result.append({
-                'metric': metric_name,
-                'unit': units.get(metric_name, ''),
-                'target': target_value,
-                'achieved': achievement_value,
-                'slab1_target': slab1,
-                'slab2_target': slab2,
-                'slab3_target': slab3,
-                'incentive_pending': incentive_pending
-            })
+        result = load_targets(connection, employee_id, 'daily', wants_incentives())
 
-        print(f"[OK] Found {len(result)} daily targets with slab info")
-        return jsonify({'success': True, 'targets': result}), 200
+        log.debug('Found daily targets', employee_id=employee_id, count=len(result['targets']))
+        return jsonify({'success': True, **result}), 200
 
     except Error as e:
-        print(f"[ERROR] Database error: {e}")
+        log.error('Database error', error=str(e))
         return jsonify({'success': False, 'message': 'Database error', 'error': str(e)}), 500
     finally:
         if connection and connection.is_connected():
-            cursor.close()
             connection.close()
 
 @app.route('/api/targets/weekly/<employee_id>', methods=['GET'])
 def get_weekly_targets(employee_id):
-    """Get weekly targets and achievements for an employee with slab info and incentive pending"""
-    print(f"\n📊 Fetching weekly targets with slabs for: {employee_id}")
+    """Get weekly targets and achievements for an employee with slab info and incentive pending
+
+    Pass ?include=incentives to also get the overall incentive summary.
+    """
+    log.debug('Fetching weekly targets', employee_id=employee_id)
 
     connection = get_db_connection()
     if not connection:
         return jsonify({'success': False, 'message': 'Database connection failed'}), 500
 
     try:
-        cursor = connection.cursor(dictionary=True)
+        result = load_targets(connection, employee_id, 'weekly', wants_incentives())
 
-        # Get weekly targets with slab information and incentive pending
-        cursor.execute(
-            """SELECT
-                employee_id,
-                metric,
-                MAX(target) AS Target,
-                MAX(achievement) AS Achievement,
-                MAX(CASE WHEN slab_segment = 'slab1' THEN target END) AS slab1_target,
-                MAX(CASE WHEN slab_segment = 'slab2' THEN target END) AS slab2_target,
-                MAX(CASE WHEN slab_segment = 'slab3' THEN target END) AS slab3_target,
-                MAX(max_variable_pay) - IFNULL(CASE
-                    WHEN MAX(Achievement) <= MAX(CASE WHEN slab_segment = 'slab1' THEN target END)
-                        THEN (MAX(Achievement) / MAX(CASE WHEN slab_segment = 'slab1' THEN target END))
-                             * MAX(CASE WHEN slab_segment = 'slab1' THEN variable_pay * incentive_percent END)
-
-                    WHEN MAX(Achievement) BETWEEN MAX(CASE WHEN slab_segment = 'slab1' THEN target END) AND MAX(CASE WHEN slab_segment = 'slab2' THEN target END)
-                        THEN (MAX(Achievement) / MAX(CASE WHEN slab_segment = 'slab2' THEN target END))
-                             * MAX(CASE WHEN slab_segment = 'slab2' THEN variable_pay * incentive_percent END)
-
-                    WHEN MAX(Achievement) BETWEEN MAX(CASE WHEN slab_segment = 'slab2' THEN target END) AND MAX(CASE WHEN slab_segment = 'slab3' THEN target END)
-                        THEN (MAX(Achievement) / MAX(CASE WHEN slab_segment = 'slab3' THEN target END))
-                             * MAX(CASE WHEN slab_segment = 'slab3' THEN variable_pay * incentive_percent END)
-
-                    ELSE MAX(CASE WHEN slab_segment = 'slab3' THEN variable_pay * incentive_percent END)
-                END, 0) AS Incentive_Pending
-            FROM (
-                SELECT
-                    wt.employee_id,
-                    wt.yearweek,
-                    wt.metric,
-                    wt.unit,
-                    wt.incentive_percent,
-                    ((e.variable_pay / 31) * 7) * wt.incentive_percent as max_variable_pay,
-                    ((e.variable_pay / 31) * 7) AS variable_pay,
-                    wt.contribution,
-                    wt.slab_segment,
-                    MAX(wt.target) AS target,
-                    MAX(wa.Achievement) AS Achievement
-                FROM WeekTargets wt
-                LEFT JOIN WeekAchievement wa
-                    ON wt.yearweek = wa.yearweek
-                    AND wt.metric = wa.metric
-                    AND wt.employee_id = wa.employee_id
-                LEFT JOIN Executive e
-                    ON e.employee_id = wt.employee_id
-                WHERE wt.employee_id = %s
-                  AND wt.yearweek = YEARWEEK(CURDATE() + INTERVAL 1 DAY, 1)
-                GROUP BY
-                    wt.employee_id,
-                    wt.yearweek,
-                    wt.metric,
-                    wt.unit,
-                    e.variable_pay,
-                    wt.contribution,
-                    wt.slab_segment,
-                    wt.incentive_percent
-            ) AS base
-            GROUP BY employee_id, metric""",
-            (employee_id,)
-        )
-        targets = cursor.fetchall()
-
-        # Get unit information for each metric
-        cursor.execute(
-            """SELECT DISTINCT metric, unit FROM WeekTargets
-               WHERE employee_id = %s AND yearweek = YEARWEEK(CURDATE() + INTERVAL 1 DAY, 1)""",
-            (employee_id,)
-        )
-        units = {row['metric']: row['unit'] for row in cursor.fetchall()}
-
-        # Format results
-        result = []
-        for target in targets:
-            metric_name = target['metric']
-            target_value = float(target['Target']) if target['Target'] else 0
-            achievement_value = float(target['Achievement']) if target['Achievement'] else 0
-            slab1 = float(target['slab1_target']) if target['slab1_target'] else 0
-            slab2 = float(target['slab2_target']) if target['slab2_target'] else 0
-            slab3 = float(target['slab3_target']) if target['slab3_target'] else 0
-            incentive_pending = float(target['Incentive_Pending']) if target['Incentive_Pending'] else 0
-
-            result.append({
-                'metric': metric_name,
-                'unit': units.get(metric_name, ''),
-                'target': target_value,
-                'achieved': achievement_value,
-                'slab1_target': slab1,
-                'slab2_target': slab2,
-                'slab3_target': slab3,
-                'incentive_pending': incentive_pending
-            })
-
-        print(f"[OK] Found {len(result)} weekly targets with slab info")
-        return jsonify({'success': True, 'targets': result}), 200
+        log.debug('Found weekly targets', employee_id=employee_id, count=len(result['targets']))
+        return jsonify({'success': True, **result}), 200
 
     except Error as e:
-        print(f"[ERROR] Database error: {e}")
+        log.error('Database error', error=str(e))
         return jsonify({'success': False, 'message': 'Database error', 'error': str(e)}), 500
     finally:
         if connection and connection.is_connected():
-            cursor.close()
             connection.close()
 
+# Includes layer_value for grouping by cluster and cluster from Executive table
+LEADERBOARD_QUERY = """
+    SELECT
+        lb.employee_id,
+        lb.Ranking as rank,
+        lb.Achievement * 100 as achievement,
+        lb.layer_value,
+        e.Name as name,
+        e.cluster as cluster
+    FROM LeaderBoard lb
+    INNER JOIN Executive e ON lb.employee_id = e.employee_id
+    WHERE lb.day_segment = %s
+        AND lb.layer = %s
+    ORDER BY lb.layer_value ASC, lb.Ranking ASC
+"""
+LEADERBOARD_COLUMNS = ColumnMap('employee_id', 'rank', 'achievement', 'layer_value', 'name', 'cluster')
+
+def fetch_leaderboard_rows(connection, period, layer):
+    """Raw LeaderBoard rows for a period ('day'/'week') and layer ('city'/'cluster')"""
+    return fetch_rows(connection, LEADERBOARD_QUERY, (period, layer), LEADERBOARD_COLUMNS)
+
+# Leaderboards are the same for every executive, so they are grouped and
+# encoded once per (period, layer) and shared until the TTL expires
+leaderboard_cache = LeaderboardCache(
+    lambda period, layer: run_with_connection(fetch_leaderboard_rows, period, layer),
+    int(os.environ.get('LEADERBOARD_CACHE_TTL', LEADERBOARD_CACHE_TTL))
+)
+
+@cache_invalidations.handler('leaderboard')
+def apply_leaderboard_invalidation(period=None, layer=None):
+    leaderboard_cache.invalidate(period, layer)
+
+def leaderboard_window_args(args, prefix=''):
+    """Parse ?top=&around= into a window dict, or None when neither is given"""
+    top = args.get(prefix + 'top')
+    around = args.get(prefix + 'around')
+    if top is None and around is None:
+        return None
+
+    window = {'top': int(top or 0), 'around': int(around or 0)}
+    if window['top'] < 0 or window['around'] < 0:
+        raise ValueError('negative window')
+    return window
+
 @app.route('/api/leaderboard/<employee_id>', methods=['GET'])
 def get_leaderboard(employee_id):
-    """Get leaderboard rankings for an employee"""
+    """Get leaderboard rankings for an employee
+
+    Optional ?top=K&around=N returns only the top K rows plus N rows on
+    either side of the caller (per cluster for the cluster layer).
+    """
     # Get query parameters
     period = request.args.get('period', 'day')  # 'day' or 'week'
     layer = request.args.get('layer', 'city')   # 'city' or 'cluster'
 
-    print(f"\n🏆 Fetching leaderboard for: {employee_id} (period: {period}, layer: {layer})")
-
-    connection = get_db_connection()
-    if not connection:
-        return jsonify({'success': False, 'message': 'Database connection failed'}), 500
+    log.debug('Fetching leaderboard', employee_id=employee_id, period=period, layer=layer)
 
     try:
-        cursor = connection.cursor(dictionary=True)
-
-        # Query includes layer_value for grouping by cluster and cluster from Executive table
-        query = """
-            SELECT
-                lb.employee_id,
-                lb.Ranking as rank,
-                lb.Achievement * 100 as achievement,
-                lb.layer_value,
-                e.Name as name,
-                e.cluster as cluster
-            FROM LeaderBoard lb
-            INNER JOIN Executive e ON lb.employee_id = e.employee_id
-            WHERE lb.day_segment = %s
-                AND lb.layer = %s
-            ORDER BY lb.layer_value ASC, lb.Ranking ASC
-        """
-
-        cursor.execute(query, (period, layer))
-        rankings = cursor.fetchall()
-
-        # Format results based on layer type
-        if layer == 'cluster':
-            # Group by cluster
-            grouped_rankings = {}
-            for rank_data in rankings:
-                cluster_name = rank_data['layer_value']
-                if cluster_name not in grouped_rankings:
-                    grouped_rankings[cluster_name] = []
-
-                grouped_rankings[cluster_name].append({
-                    'rank': int(rank_data['rank']),
-                    'name': rank_data['name'],
-                    'employee_id': rank_data['employee_id'],
-                    'achievement': float(rank_data['achievement']) if rank_data['achievement'] is not None else 0.0,
-                    'cluster': rank_data['cluster'] if rank_data['cluster'] else 'Unknown',
-                    'isCurrentUser': rank_data['employee_id'] == employee_id
-                })
-
-            # Convert to array format
-            result = []
-            for cluster_name, cluster_rankings in grouped_rankings.items():
-                result.append({
-                    'cluster': cluster_name,
-                    'rankings': cluster_rankings
-                })
-
-            print(f"[OK] Found {len(rankings)} rankings in {len(result)} clusters for {period}/{layer}")
-            return jsonify({
-                'success': True,
-                'rankings': result,
-                'period': period,
-                'layer': layer,
-                'grouped': True
-            }), 200
-        else:
-            # City view - flat list
-            result = []
-            for rank_data in rankings:
-                result.append({
-                    'rank': int(rank_data['rank']),
-                    'name': rank_data['name'],
-                    'employee_id': rank_data['employee_id'],
-                    'achievement': float(rank_data['achievement']) if rank_data['achievement'] is not None else 0.0,
-                    'cluster': rank_data['cluster'] if rank_data['cluster'] else 'Unknown',
-                    'isCurrentUser': rank_data['employee_id'] == employee_id
-                })
-
-            print(f"[OK] Found {len(result)} rankings for {period}/{layer}")
-            return jsonify({
-                'success': True,
-                'rankings': result,
-                'period': period,
-                'layer': layer,
-                'grouped': False
-            }), 200
+        window = leaderboard_window_args(request.args)
+    except ValueError:
+        return jsonify({'success': False, 'message': 'top and around must be non-negative integers'}), 400
 
+    try:
+        view = leaderboard_cache.get(period, layer)
+    except DatabaseUnavailable:
+        return jsonify({'success': False, 'message': 'Database connection failed'}), 500
     except Error as e:
-        print(f"[ERROR] Database error: {e}")
+        log.error('Database error', error=str(e))
         return jsonify({'success': False, 'message': 'Database error', 'error': str(e)}), 500
-    finally:
-        if connection and connection.is_connected():
-            cursor.close()
-            connection.close()
+
+    if window:
+        log.debug('Served windowed rankings', period=period, layer=layer, rankings=view.count, **window)
+        return jsonify(leaderboard_window_payload(view, employee_id, period, layer, window)), 200
+
+    log.debug('Served rankings', period=period, layer=layer, rankings=view.count)
+    return app.response_class(leaderboard_body(view, employee_id, period, layer), mimetype='application/json'), 200
+
+def leaderboard_window_payload(view, employee_id, period, layer, window):
+    """?top=K&around=N response - only the top rows and the caller's neighbourhood"""
+    return {
+        'success': True,
+        'rankings': view.window_for(employee_id, window['top'], window['around']),
+        'period': period,
+        'layer': layer,
+        'grouped': view.grouped,
+        'total': view.count,
+        'window': window
+    }
+
+def leaderboard_body(view, employee_id, period, layer):
+    """Full leaderboard response text: the shared encoded rankings with only
+    the caller's entry re-encoded"""
+    return (
+        '{"success":true,"rankings":' + view.rankings_json_for(employee_id)
+        + ',"period":' + json.dumps(period)
+        + ',"layer":' + json.dumps(layer)
+        + ',"grouped":' + ('true' if view.grouped else 'false') + '}'
+    )
+
+@app.route('/api/admin/leaderboard/invalidate', methods=['POST'])
+def invalidate_leaderboard_cache():
+    """Drop cached leaderboards, optionally only ?period= and/or ?layer=
+
+    Applies to every worker: the others replay it before their next request.
+    ``dropped`` counts this worker's entries.
+    """
+    if not is_admin_request():
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 401
+
+    period, layer = request.args.get('period'), request.args.get('layer')
+    dropped = leaderboard_cache.invalidate(period, layer)
+    cache_invalidations.broadcast('leaderboard', period=period, layer=layer)
+    log.info('Dropped cached leaderboards', dropped=dropped)
+    return jsonify({'success': True, 'dropped': dropped, 'cache': leaderboard_cache.status()}), 200
+
+@app.route('/api/admin/db/pool', methods=['GET'])
+def db_pool_status():
+    """Connection pool size, wait times, timeouts and fallbacks"""
+    if not is_admin_request():
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 401
+
+    return jsonify({'success': True, 'pool': connection_pool.stats(), 'statements': statement_stats()}), 200
+
+@app.route('/api/admin/timing', methods=['GET'])
+def request_timing_status():
+    """Per-route latency histograms and mean phase times over the rolling window
+
+    ?reset=1 clears the histograms after reading them.
+    """
+    if not is_admin_request():
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 401
+
+    snapshot = timing_histogram.snapshot()
+    if request.args.get('reset') == '1':
+        timing_histogram.reset()
+    return jsonify({'success': True, 'timing': snapshot}), 200
+
+@app.route('/api/admin/cache/invalidate', methods=['POST'])
+def invalidate_response_cache():
+    """Drop cached customer responses, optionally only ?endpoint= and/or ?employee_id=
+
+    Call this after the batch jobs refresh the customer tables. Applies to
+    every worker: the others replay it before their next request (within
+    CACHE_SYNC_INTERVAL). ``dropped`` counts this worker's entries.
+    """
+    if not is_admin_request():
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 401
+
+    endpoint, employee_id = request.args.get('endpoint'), request.args.get('employee_id')
+    dropped = response_cache.invalidate(endpoint, employee_id)
+    cache_invalidations.broadcast('response', endpoint=endpoint, employee_id=employee_id)
+    log.info('Dropped cached responses', dropped=dropped)
+    return jsonify({'success': True, 'dropped': dropped, 'cache': response_cache.status()}), 200
+
+@app.route('/api/admin/cache/status', methods=['GET'])
+def response_cache_status():
+    """Response cache size, per-endpoint entries and hit counters"""
+    if not is_admin_request():
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 401
+
+    return jsonify({'success': True, 'cache': response_cache.status()}), 200
+
+@app.route('/api/admin/schema/refresh', methods=['POST'])
+def refresh_schema_cache():
+    """Reload cached column lists, e.g. after a batch job adds or drops columns"""
+    if not is_admin_request():
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 401
+
+    try:
+        run_with_connection(schema_cache.refresh)
+    except (Error, DatabaseUnavailable) as e:
+        log.error('Schema cache refresh failed', error=str(e))
+        return jsonify({'success': False, 'message': 'Schema refresh failed', 'error': str(e)}), 500
+
+    return jsonify({'success': True, 'schema': schema_cache.status()}), 200
+
+@app.route('/api/admin/schema', methods=['GET'])
+def schema_cache_status():
+    """Cached column lists and when they were loaded"""
+    if not is_admin_request():
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 401
+
+    return jsonify({'success': True, 'schema': schema_cache.status()}), 200
+
+NUDGE_ZONE_PROJECTION = schema_cache.project(
+    'SA_HomePageTargetCustomers', 'customer_id', 'customername', 'contactnumber', 'LastOrder'
+)
+
+def nudge_zone_query():
+    return f"""
+        SELECT {NUDGE_ZONE_PROJECTION.select_list()}
+        FROM SA_HomePageTargetCustomers
+        WHERE employee_id = %s
+        ORDER BY LastOrder ASC
+    """
+
+def format_nudge_zone_customer(customer):
+    """SA_HomePageTargetCustomers row in the shape the frontend expects"""
+    return {
+        'customerId': customer.get('customer_id'),
+        'customerName': customer.get('customername') or 'Unknown',
+        'phoneNumber': str(customer.get('contactnumber')) if customer.get('contactnumber') else 'N/A',
+        'lastOrder': f"{customer.get('LastOrder')} days ago" if customer.get('LastOrder') else 'No orders yet'
+    }
+
+def load_nudge_zone_customers(connection, employee_id):
+    """Target customers from SA_HomePageTargetCustomers, longest since last order first"""
+    raw_customers = fetch_rows(connection, nudge_zone_query(), (employee_id,), NUDGE_ZONE_PROJECTION.columns)
+
+    # Transform data to match frontend expectations
+    return [format_nudge_zone_customer(customer) for customer in raw_customers]
 
 # Get Nudge Zone customers - Target Customers
 @app.route('/api/customers/nudge-zone/<employee_id>', methods=['GET'])
+@response_cache.cached('nudge_zone', ttl=300)
 def get_nudge_zone_customers(employee_id):
     """Get target customers from SA_HomePageTargetCustomers table"""
-    print(f"\n📋 Fetching Nudge Zone customers for: {employee_id}")
+    log.debug('Fetching Nudge Zone customers', employee_id=employee_id)
 
     connection = get_db_connection()
     if not connection:
         return jsonify({'success': False, 'message': 'Database connection failed'}), 500
 
     try:
-        cursor = connection.cursor(dictionary=True)
+        customers = load_nudge_zone_customers(connection, employee_id)
 
-        query = """
-            SELECT *
-            FROM SA_HomePageTargetCustomers
-            WHERE employee_id = %s
-            ORDER BY LastOrder ASC
-        """
-
-        cursor.execute(query, (employee_id,))
-        raw_customers = cursor.fetchall()
-
-        # Transform data to match frontend expectations
-        customers = []
-        for customer in raw_customers:
-            customers.append({
-                'customerId': customer.get('customer_id'),
-                'customerName': customer.get('customername') or 'Unknown',
-                'phoneNumber': str(customer.get('contactnumber')) if customer.get('contactnumber') else 'N/A',
-                'lastOrder': f"{customer.get('LastOrder')} days ago" if customer.get('LastOrder') else 'No orders yet'
-            })
-
-        print(f"[OK] Found {len(customers)} Nudge Zone customers")
+        log.debug('Found Nudge Zone customers', employee_id=employee_id, count=len(customers))
         if customers:
-            print(f"📄 Sample customer data: {customers[0]}")
+            log.payload('Sample customer', customer=customers[0])
 
         return jsonify({
             'success': True,
@@ -905,49 +901,57 @@ def get_nudge_zone_customers(employee_id):
         }), 200
 
     except Error as e:
-        print(f"[ERROR] Database error: {e}")
+        log.error('Database error', error=str(e))
         return jsonify({'success': False, 'message': 'Database error', 'error': str(e)}), 500
     finally:
         if connection and connection.is_connected():
-            cursor.close()
             connection.close()
 
+SO_CLOSE_PROJECTION = schema_cache.project(
+    'SA_HomePageAppFunnelCustomers', 'customer_id', 'customername', 'contactnumber', 'LastOpened'
+)
+
+def so_close_query():
+    return f"""
+        SELECT {SO_CLOSE_PROJECTION.select_list()}
+        FROM SA_HomePageAppFunnelCustomers
+        WHERE employee_id = %s
+        ORDER BY LastOpened ASC
+    """
+
+def format_so_close_customer(customer):
+    """SA_HomePageAppFunnelCustomers row in the shape the frontend expects"""
+    return {
+        'customerId': customer.get('customer_id'),
+        'customerName': customer.get('customername') or 'Unknown',
+        'phoneNumber': str(customer.get('contactnumber')) if customer.get('contactnumber') else 'N/A',
+        'lastSeen': f"{int(customer.get('LastOpened'))} hours ago" if customer.get('LastOpened') else 'Recently'
+    }
+
+def load_so_close_customers(connection, employee_id):
+    """App funnel customers from SA_HomePageAppFunnelCustomers, least recently opened first"""
+    raw_customers = fetch_rows(connection, so_close_query(), (employee_id,), SO_CLOSE_PROJECTION.columns)
+
+    # Transform data to match frontend expectations
+    return [format_so_close_customer(customer) for customer in raw_customers]
+
 # Get So Close customers - App Funnel Customers
 @app.route('/api/customers/so-close/<employee_id>', methods=['GET'])
+@response_cache.cached('so_close', ttl=300)
 def get_so_close_customers(employee_id):
     """Get app funnel customers from SA_HomePageAppFunnelCustomers table"""
-    print(f"\n🔥 Fetching So Close customers for: {employee_id}")
+    log.debug('Fetching So Close customers', employee_id=employee_id)
 
     connection = get_db_connection()
     if not connection:
         return jsonify({'success': False, 'message': 'Database connection failed'}), 500
 
     try:
-        cursor = connection.cursor(dictionary=True)
+        customers = load_so_close_customers(connection, employee_id)
 
-        query = """
-            SELECT *
-            FROM SA_HomePageAppFunnelCustomers
-            WHERE employee_id = %s
-            ORDER BY LastOpened ASC
-        """
-
-        cursor.execute(query, (employee_id,))
-        raw_customers = cursor.fetchall()
-
-        # Transform data to match frontend expectations
-        customers = []
-        for customer in raw_customers:
-            customers.append({
-                'customerId': customer.get('customer_id'),
-                'customerName': customer.get('customername') or 'Unknown',
-                'phoneNumber': str(customer.get('contactnumber')) if customer.get('contactnumber') else 'N/A',
-                'lastSeen': f"{int(customer.get('LastOpened'))} hours ago" if customer.get('LastOpened') else 'Recently'
-            })
-
-        print(f"[OK] Found {len(customers)} So Close customers")
+        log.debug('Found So Close customers', employee_id=employee_id, count=len(customers))
         if customers:
-            print(f"📄 Sample customer data: {customers[0]}")
+            log.payload('Sample customer', customer=customers[0])
 
         return jsonify({
             'success': True,
@@ -955,88 +959,273 @@ def get_so_close_customers(employee_id):
         }), 200
 
     except Error as e:
-        print(f"[ERROR] Database error: {e}")
+        log.error('Database error', error=str(e))
         return jsonify({'success': False, 'message': 'Database error', 'error': str(e)}), 500
     finally:
         if connection and connection.is_connected():
-            cursor.close()
             connection.close()
 
-# Log app events for analytics
-@app.route('/api/events/log', methods=['POST'])
-def log_event():
-    """Log app events to SA_AppEvents table"""
-    try:
-        data = request.json
-        employee_id = data.get('employee_id')
-        event_name = data.get('event_name')
-        meta_data = data.get('meta_data', '')
+# ============================================================================
+# HOME PAGE BOOTSTRAP
+# ============================================================================
 
-        if not employee_id or not event_name:
-            return jsonify({
-                'success': False,
-                'message': 'Missing required fields: employee_id and event_name'
-            }), 400
+def leaderboard_section(employee_id, period, layer, window=None):
+    """Leaderboard payload for the home page from the shared cache"""
+    view = leaderboard_cache.get(period, layer)
+    if window:
+        payload = leaderboard_window_payload(view, employee_id, period, layer, window)
+        del payload['success']
+        return payload
+    return {
+        'rankings': view.rankings_for(employee_id),
+        'period': period,
+        'layer': layer,
+        'grouped': view.grouped
+    }
+
+@app.route('/api/home/<employee_id>', methods=['GET'])
+def get_home(employee_id):
+    """Everything the Home page loads, in one response
+
+    The six sections run concurrently on the shared home worker pool.
+    A section that fails or runs past the deadline is reported under
+    'errors' and the rest are still returned.
+
+    Query params: targets=daily|weekly, leaderboard_period=day|week,
+    leaderboard_layer=city|cluster, leaderboard_top=K, leaderboard_around=N
+    """
+    target_period = request.args.get('targets', 'daily')
+    leaderboard_period = request.args.get('leaderboard_period', 'day')
+    leaderboard_layer = request.args.get('leaderboard_layer', 'city')
 
-        print(f"📊 Logging event: {event_name} for {employee_id}")
+    try:
+        leaderboard_window = leaderboard_window_args(request.args, prefix='leaderboard_')
+    except ValueError:
+        return jsonify({'success': False, 'message': 'leaderboard_top and leaderboard_around must be non-negative integers'}), 400
 
-        connection = get_db_connection()
-        if not connection:
-            return jsonify({'success': False, 'message': 'Database connection failed'}), 500
+    log.debug('Fetching home page', employee_id=employee_id)
 
-        cursor = connection.cursor()
+    sections = {
+        'nudge_zone': lambda: {'customers': run_with_connection(load_nudge_zone_customers, employee_id)},
+        'so_close': lambda: {'customers': run_with_connection(load_so_close_customers, employee_id)},
+        'targets': lambda: {**run_with_connection(load_targets, employee_id, target_period), 'period': target_period},
+        'leaderboard': lambda: leaderboard_section(employee_id, leaderboard_period, leaderboard_layer, leaderboard_window),
+        'incentives_daily': lambda: {'incentives': daily_incentive_snapshots.get(employee_id)},
+        'incentives_weekly': lambda: {'incentives': weekly_incentive_snapshots.get(employee_id)},
+    }
 
-        # Get current date and time
-        now = datetime.datetime.now()
-        entry_date = now.strftime('%Y-%m-%d')
-        entry_time = now.strftime('%H:%M:%S')
+    started = time.perf_counter()
+    data, errors, timings = run_sections(sections, HOME_SECTION_TIMEOUT)
+    total_ms = round((time.perf_counter() - started) * 1000, 1)
 
-        # Parse meta_data if it's a string (convert back to dict for JSON column)
-        import json
-        if isinstance(meta_data, str):
-            try:
-                meta_data_json = json.loads(meta_data) if meta_data else {}
-            except:
-                meta_data_json = {"raw": meta_data}
-        else:
-            meta_data_json = meta_data if meta_data else {}
+    for name, message in errors.items():
+        log.error('Home section failed', section=name, error=message)
+    log.debug('Home page', employee_id=employee_id, sections=f"{len(data)}/{len(sections)}", total_ms=total_ms)
 
-        # Convert to JSON string for MySQL JSON column
-        meta_data_str = json.dumps(meta_data_json)
+    return jsonify({
+        'success': bool(data),
+        'partial': bool(errors),
+        'sections': data,
+        'errors': errors,
+        'timings_ms': timings,
+        'total_ms': total_ms
+    }), 200 if data else 500
+
+# Analytics events are acknowledged immediately and written in batches by a
+# background thread, so UI clicks never hold a pooled connection. By default
+# events are spooled to local disk first so they survive database outages
+# and restarts; set EVENT_SPOOL_DIR to an empty string for the in-memory queue.
+EVENT_SPOOL_DIR = os.environ.get('EVENT_SPOOL_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'event_spool'))
+
+if EVENT_SPOOL_DIR:
+    event_ingestor = SpooledEventIngestor(
+        get_db_connection,
+        EVENT_SPOOL_DIR,
+        batch_size=int(os.environ.get('EVENT_BATCH_SIZE', EVENT_BATCH_SIZE)),
+        flush_interval=float(os.environ.get('EVENT_FLUSH_INTERVAL', EVENT_FLUSH_INTERVAL)),
+        segment_bytes=int(os.environ.get('EVENT_SPOOL_SEGMENT_BYTES', SPOOL_SEGMENT_BYTES)),
+        fsync_interval=float(os.environ.get('EVENT_SPOOL_FSYNC_INTERVAL', SPOOL_FSYNC_INTERVAL))
+    )
+else:
+    event_ingestor = EventIngestor(
+        get_db_connection,
+        queue_size=int(os.environ.get('EVENT_QUEUE_SIZE', EVENT_QUEUE_SIZE)),
+        batch_size=int(os.environ.get('EVENT_BATCH_SIZE', EVENT_BATCH_SIZE)),
+        flush_interval=float(os.environ.get('EVENT_FLUSH_INTERVAL', EVENT_FLUSH_INTERVAL))
+    )
 
-        # Insert event into SA_AppEvents table
-        query = """
-            INSERT INTO SA_AppEvents (entry_date, entry_time, employee_id, event_name, meta_data)
-            VALUES (%s, %s, %s, %s, %s)
-        """
+# Log app events for analytics
+@app.route('/api/events/log', methods=['POST'])
+def log_event():
+    """Queue an app event for SA_AppEvents"""
+    try:
+        row = normalize_event(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
 
-        cursor.execute(query, (entry_date, entry_time, employee_id, event_name, meta_data_str))
-        connection.commit()
+    entry_date, entry_time, employee_id, event_name, _ = row
+    log.debug('Logging event', event_name=event_name, employee_id=employee_id)
 
-        print(f"[OK] Event logged: {event_name} at {entry_time}")
+    if not event_ingestor.submit(row):
+        # Queue full - tell the client to back off instead of blocking the request
+        log.warning('Event queue full, rejected', event_name=event_name)
+        response = jsonify({'success': False, 'message': 'Event queue full, retry later'})
+        response.headers['Retry-After'] = '5'
+        return response, 503
 
-        cursor.close()
-        connection.close()
+    return jsonify({
+        'success': True,
+        'message': 'Event accepted',
+        'event': {
+            'entry_date': entry_date,
+            'entry_time': entry_time,
+            'employee_id': employee_id,
+            'event_name': event_name
+        }
+    }), 202
+
+# Largest batch accepted by /api/events/batch in one request
+MAX_EVENT_BATCH = 500
+
+def read_event_batch():
+    """Event payloads from the request: a JSON array, {"events": [...]},
+    or newline-delimited JSON. Lines that are not valid JSON come back as
+    ValueError instances so they can be reported per item."""
+    if request.mimetype == 'application/x-ndjson':
+        items = []
+        for line in request.get_data(as_text=True).splitlines():
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError:
+                items.append(ValueError('Invalid JSON'))
+        return items
+
+    payload = request.get_json(silent=True)
+    if isinstance(payload, dict):
+        payload = payload.get('events')
+    return payload if isinstance(payload, list) else None
+
+@app.route('/api/events/batch', methods=['POST'])
+def log_event_batch():
+    """Queue many app events in one request
+
+    Accepts a JSON array, {"events": [...]} or application/x-ndjson.
+    Every item is validated in one pass and gets its own status:
+    'accepted', 'invalid' or 'rejected' (queue full). Accepted events
+    reach SA_AppEvents together in the writer's next multi-row insert.
+    """
+    items = read_event_batch()
+    if items is None:
+        return jsonify({'success': False, 'message': 'Expected a JSON array of events'}), 400
+    if len(items) > MAX_EVENT_BATCH:
+        return jsonify({'success': False, 'message': f'At most {MAX_EVENT_BATCH} events per batch'}), 413
+
+    now = datetime.datetime.now()
+    results = []
+    accepted = rejected = 0
+    for index, item in enumerate(items):
+        try:
+            if isinstance(item, ValueError):
+                raise item
+            row = normalize_event(item, now)
+        except ValueError as e:
+            results.append({'index': index, 'status': 'invalid', 'message': str(e)})
+            continue
+
+        if event_ingestor.submit(row):
+            accepted += 1
+            results.append({'index': index, 'status': 'accepted'})
+        else:
+            rejected += 1
+            results.append({'index': index, 'status': 'rejected', 'message': 'Event queue full, retry later'})
 
-        return jsonify({
-            'success': True,
-            'message': 'Event logged successfully',
-            'event': {
-                'entry_date': entry_date,
-                'entry_time': entry_time,
-                'employee_id': employee_id,
-                'event_name': event_name
-            }
-        }), 200
+    log.debug('Event batch', accepted=accepted, rejected=rejected, invalid=len(items) - accepted - rejected)
 
-    except Error as e:
-        print(f"[ERROR] Database error logging event: {e}")
-        return jsonify({'success': False, 'message': 'Database error', 'error': str(e)}), 500
-    except Exception as e:
-        print(f"[ERROR] Error logging event: {e}")
-        return jsonify({'success': False, 'message': 'Server error', 'error': str(e)}), 500
+    response = jsonify({
+        'success': accepted > 0 or not items,
+        'accepted': accepted,
+        'rejected': rejected,
+        'invalid': len(items) - accepted - rejected,
+        'results': results
+    })
+    if accepted or not items:
+        return response, 202
+    if rejected:
+        response.headers['Retry-After'] = '5'
+        return response, 503
+    return response, 400
+
+@app.route('/api/admin/events/status', methods=['GET'])
+def event_ingest_status():
+    """Queue depth and write/drop counters of the event pipeline"""
+    if not is_admin_request():
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 401
+
+    return jsonify({'success': True, 'events': event_ingestor.stats()}), 200
+
+@metrics.collector
+def collect_server_metrics():
+    """Pool, cache and event-ingest numbers for /metrics - in-memory counters only, no DB access"""
+    pool = connection_pool.stats()
+    statements = statement_stats()
+    cache = response_cache.status()
+    events = event_ingestor.stats()
+    families = [
+        ('db_pool_connections', 'gauge', 'Open pooled connections by state',
+         [({'state': 'in_use'}, pool['in_use']), ({'state': 'idle'}, pool['idle'])]),
+        ('db_pool_max_connections', 'gauge', 'Pool size limit', [({}, pool['max_size'])]),
+        ('db_pool_waiting', 'gauge', 'Requests waiting for a free connection', [({}, pool['waiting'])]),
+        ('db_pool_acquired_total', 'counter', 'Connections handed out by the pool', [({}, pool['acquired'])]),
+        ('db_pool_waits_total', 'counter', 'Acquisitions that had to wait', [({}, pool['waits'])]),
+        ('db_pool_wait_seconds_total', 'counter', 'Time spent acquiring connections', [({}, pool['wait_ms_total'] / 1000)]),
+        ('db_pool_timeouts_total', 'counter', 'Acquisitions that timed out', [({}, pool['timeouts'])]),
+        ('db_pool_fallback_connects_total', 'counter', 'Direct connections opened after a pool timeout', [({}, pool['fallbacks'])]),
+        ('db_pool_created_total', 'counter', 'Connections opened by the pool', [({}, pool['created'])]),
+        ('db_prepared_statements', 'gauge', 'Prepared statements cached across connections', [({}, statements['cached'])]),
+        ('db_prepared_statements_reused_total', 'counter', 'Executions that reused a prepared statement', [({}, statements['reused'])]),
+        ('response_cache_requests_total', 'counter', 'Response cache lookups by result',
+         [({'result': 'hit'}, cache['hits']), ({'result': 'miss'}, cache['misses']),
+          ({'result': 'not_modified'}, cache['not_modified'])]),
+        ('response_cache_evictions_total', 'counter', 'Responses evicted to stay under the size limit', [({}, cache['evictions'])]),
+        ('response_cache_bytes', 'gauge', 'Cached response body bytes', [({}, cache['bytes'])]),
+        ('leaderboard_cache_requests_total', 'counter', 'Leaderboard cache lookups by result',
+         [({'result': 'hit'}, leaderboard_cache.hits), ({'result': 'miss'}, leaderboard_cache.misses)]),
+        ('events_total', 'counter', 'Analytics events by outcome',
+         [({'outcome': outcome}, events[outcome])
+          for outcome in ('accepted', 'written', 'dropped', 'failed', 'corrupt', 'dead_lettered') if outcome in events]),
+        ('event_batches_total', 'counter', 'Event insert batches written', [({}, events['batches'])])
+    ]
+    if 'queued' in events:
+        families.append(('event_queue_depth', 'gauge', 'Events waiting in memory for the writer', [({}, events['queued'])]))
+    log_queue = log_stats()
+    families.append(('log_queue_depth', 'gauge', 'Log records waiting for the writer thread', [({}, log_queue['queued'])]))
+    families.append(('log_records_dropped_total', 'counter', 'Log records dropped because the log queue was full',
+                     [({}, log_queue['dropped'])]))
+    if 'pending_bytes' in events:
+        families.append(('event_spool_pending_bytes', 'gauge', 'Spooled event bytes not yet written', [({}, events['pending_bytes'])]))
+    return families
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus text exposition of the request, query, pool, cache and event metrics of all workers"""
+    if not is_admin_request():
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 401
+
+    return app.response_class(metrics.render(), mimetype=None, content_type=METRICS_CONTENT_TYPE)
 
 # Get available metrics from SA_CustomerPageCustomers for Target page dropdown
+TARGET_METRICS_QUERY = """
+    SELECT DISTINCT metric
+    FROM SA_CustomerPageCustomers
+    WHERE employee_id = %s AND layer = %s
+    ORDER BY metric
+"""
+
 @app.route('/api/target-metrics/<employee_id>', methods=['GET'])
 def get_target_metrics(employee_id):
     """Get distinct metrics available for an employee in SA_CustomerPageCustomers table"""
@@ -1045,7 +1234,7 @@ def get_target_metrics(employee_id):
     # Map period to layer
     layer = 'day' if period == 'daily' else 'week'
 
-    print(f"\n📋 Fetching available metrics ({period}, layer: {layer}) for employee: {employee_id}")
+    log.debug('Fetching target metrics', employee_id=employee_id, period=period, layer=layer)
 
     connection = get_db_connection()
     if not connection:
@@ -1055,19 +1244,14 @@ def get_target_metrics(employee_id):
         cursor = connection.cursor(dictionary=True)
 
         # Get distinct metrics for this employee and layer
-        query = """
-            SELECT DISTINCT metric
-            FROM SA_CustomerPageCustomers
-            WHERE employee_id = %s AND layer = %s
-            ORDER BY metric
-        """
-        cursor.execute(query, (employee_id, layer))
+        cursor.execute(TARGET_METRICS_QUERY, (employee_id, layer))
         results = cursor.fetchall()
 
         # Extract metric names
         metrics = [row['metric'] for row in results if row['metric']]
 
-        print(f"[OK] Found {len(metrics)} metrics: {metrics}")
+        log.debug('Found target metrics', employee_id=employee_id, count=len(metrics))
+        log.payload('Target metrics', metrics=metrics)
 
         return jsonify({
             'success': True,
@@ -1076,7 +1260,7 @@ def get_target_metrics(employee_id):
         }), 200
 
     except Error as e:
-        print(f"[ERROR] Database error: {e}")
+        log.error('Database error', error=str(e))
         return jsonify({'success': False, 'message': 'Database error', 'error': str(e)}), 500
     finally:
         if connection and connection.is_connected():
@@ -1084,7 +1268,101 @@ def get_target_metrics(employee_id):
             connection.close()
 
 # Get customers by metric for Target page
+def target_customers_filter(employee_id, layer, metric='', alias=''):
+    """(WHERE conditions, params) selecting one employee's SA_CustomerPageCustomers rows"""
+    conditions = f"{alias}employee_id = %s AND {alias}layer = %s"
+    params = [employee_id, layer]
+    if metric:
+        conditions += f" AND {alias}metric = %s"
+        params.append(metric)
+    return conditions, params
+
+def target_customers_query(employee_id, layer, metric='', after=None, limit=None):
+    """(query, params) for SA_CustomerPageCustomers by layer (day/week) and optional metric.
+
+    With ``limit`` only the SKU rows of the next ``limit`` customers after
+    customer id ``after`` are read (keyset page over customer_id).
+    """
+    if limit is not None:
+        page_conditions, page_params = target_customers_filter(employee_id, layer, metric)
+        if after is not None:
+            page_conditions += " AND customer_id > %s"
+            page_params.append(after)
+        conditions, params = target_customers_filter(employee_id, layer, metric, alias='c.')
+        return f"""
+            SELECT c.*
+            FROM SA_CustomerPageCustomers c
+            JOIN (
+                SELECT DISTINCT customer_id
+                FROM SA_CustomerPageCustomers
+                WHERE {page_conditions}
+                ORDER BY customer_id
+                LIMIT %s
+            ) page ON page.customer_id = c.customer_id
+            WHERE {conditions}
+            ORDER BY c.customer_id
+        """, (*page_params, limit, *params)
+
+    if metric:
+        return """
+            SELECT *
+            FROM SA_CustomerPageCustomers
+            WHERE employee_id = %s AND layer = %s AND metric = %s
+            ORDER BY customer_id
+        """, (employee_id, layer, metric)
+    return """
+        SELECT *
+        FROM SA_CustomerPageCustomers
+        WHERE employee_id = %s AND layer = %s
+        ORDER BY customer_id
+    """, (employee_id, layer)
+
+def target_customers_count_query(employee_id, layer, metric=''):
+    conditions, params = target_customers_filter(employee_id, layer, metric)
+    return f"SELECT COUNT(DISTINCT customer_id) FROM SA_CustomerPageCustomers WHERE {conditions}", tuple(params)
+
+def format_target_customer(customer):
+    """First SA_CustomerPageCustomers row of a customer, before its SKUs are added"""
+    return {
+        'customerId': customer.get('customer_id'),
+        'customerName': customer.get('customername') or 'Unknown',
+        'phoneNumber': str(customer.get('contactnumber')) if customer.get('contactnumber') else 'N/A',
+        'source': 'target-page',
+        'skusToPitch': []
+    }
+
+def format_target_sku(customer):
+    return {
+        'id': customer.get('skuid'),
+        'name': customer.get('Sku'),
+        'category': 'Product',
+        'image': '📦'
+    }
+
+def target_sku_key(customer):
+    """SKU id of a row that names a SKU to pitch, else None"""
+    sku_id = customer.get('skuid')
+    return sku_id if sku_id and customer.get('Sku') else None
+
+# Customers with their de-duplicated SKUs to pitch
+TARGET_CUSTOMER_SKUS = SkuGrouping(
+    group_key=lambda customer: customer.get('customer_id'),
+    make_group=format_target_customer,
+    sku_key=target_sku_key,
+    make_sku=format_target_sku,
+    skus_field='skusToPitch'
+)
+
+def group_target_customers(raw_customers):
+    """Group SA_CustomerPageCustomers rows by customer_id and aggregate SKUs to avoid duplicates"""
+    return TARGET_CUSTOMER_SKUS.aggregate(raw_customers)
+
+def iter_target_customers(rows):
+    """group_target_customers for rows ordered by customer_id, one customer at a time (streaming mode)"""
+    return TARGET_CUSTOMER_SKUS.iter_sorted(rows)
+
 @app.route('/api/target-customers/<employee_id>', methods=['GET'])
+@response_cache.cached('target_customers', ttl=300)
 def get_target_customers(employee_id):
     """Get customers for a specific metric and period from SA_CustomerPageCustomers table"""
     metric = request.args.get('metric', '')
@@ -1093,73 +1371,52 @@ def get_target_customers(employee_id):
     # Map period to layer
     layer = 'day' if period == 'daily' else 'week'
 
-    print(f"\n🎯 Fetching customers for metric '{metric}' ({period}, layer: {layer}) for employee: {employee_id}")
+    log.debug('Fetching target customers', employee_id=employee_id, metric=metric, period=period, layer=layer)
+
+    try:
+        page = page_args(request.args, 'target_customers', 1)
+    except ValueError:
+        return jsonify({'success': False, 'message': PAGE_ARGS_MESSAGE}), 400
 
     connection = get_db_connection()
     if not connection:
         return jsonify({'success': False, 'message': 'Database connection failed'}), 500
 
     try:
-        cursor = connection.cursor(dictionary=True)
+        if page:
+            # One extra customer tells us whether there is a next page
+            raw_customers = fetch_rows(connection, *target_customers_query(
+                employee_id, layer, metric, page.after[0] if page.after else None, page.limit + 1))
+            total = fetch_tuples(connection, *target_customers_count_query(employee_id, layer, metric))[0][0] \
+                if page.with_total else None
+            customers, paging = page_fields('target_customers', page, group_target_customers(raw_customers),
+                                            lambda customer: (customer['customerId'],), total)
+
+            log.debug('Found target customers', employee_id=employee_id, metric=metric, count=len(customers), limit=page.limit)
+            return jsonify({
+                'success': True,
+                'customers': customers,
+                'metric': metric,
+                'period': period,
+                **paging
+            }), 200
 
-        # Query to get customers from SA_CustomerPageCustomers based on layer (day/week) and metric
-        if metric:
-            query = """
-                SELECT *
-                FROM SA_CustomerPageCustomers
-                WHERE employee_id = %s AND layer = %s AND metric = %s
-                ORDER BY customer_id
-            """
-            cursor.execute(query, (employee_id, layer, metric))
-        else:
-            query = """
-                SELECT *
-                FROM SA_CustomerPageCustomers
-                WHERE employee_id = %s AND layer = %s
-                ORDER BY customer_id
-            """
-            cursor.execute(query, (employee_id, layer))
+        query, params = target_customers_query(employee_id, layer, metric)
+        if wants_stream():
+            rows = stream_rows(connection, query, params=params)
+            response = streamed_list_response(connection, rows, iter_target_customers(rows), 'customers',
+                                              metric=metric, period=period)
+            connection = None  # closed by the response once the body is written
+            return response
 
-        raw_customers = cursor.fetchall()
+        raw_customers = fetch_rows(connection, query, params)
 
         # Transform data to match frontend expectations
-        # Group customers by customer_id and aggregate SKUs to avoid duplicates
-        customer_dict = {}
-        for customer in raw_customers:
-            customer_id = customer.get('customer_id')
-
-            # Create customer entry if not exists
-            if customer_id not in customer_dict:
-                customer_dict[customer_id] = {
-                    'customerId': customer_id,
-                    'customerName': customer.get('customername') or 'Unknown',
-                    'phoneNumber': str(customer.get('contactnumber')) if customer.get('contactnumber') else 'N/A',
-                    'source': 'target-page',
-                    'skusToPitch': []
-                }
-
-            # Add SKU to the customer's SKU list if available
-            if customer.get('skuid') and customer.get('Sku'):
-                # Avoid duplicate SKUs for the same customer
-                sku_exists = any(
-                    sku.get('id') == customer.get('skuid')
-                    for sku in customer_dict[customer_id]['skusToPitch']
-                )
-
-                if not sku_exists:
-                    customer_dict[customer_id]['skusToPitch'].append({
-                        'id': customer.get('skuid'),
-                        'name': customer.get('Sku'),
-                        'category': 'Product',
-                        'image': '📦'
-                    })
-
-        # Convert dictionary to list
-        customers = list(customer_dict.values())
-
-        print(f"[OK] Found {len(customers)} customers for metric '{metric}' ({period}, layer: {layer})")
+        customers = group_target_customers(raw_customers)
+
+        log.debug('Found target customers', employee_id=employee_id, metric=metric, count=len(customers))
         if customers:
-            print(f"📄 Sample customer data: {customers[0]}")
+            log.payload('Sample customer', customer=customers[0])
 
         return jsonify({
             'success': True,
@@ -1169,21 +1426,28 @@ def get_target_customers(employee_id):
         }), 200
 
     except Error as e:
-        print(f"[ERROR] Database error: {e}")
+        log.error('Database error', error=str(e))
         return jsonify({'success': False, 'message': 'Database error', 'error': str(e)}), 500
     finally:
         if connection and connection.is_connected():
-            cursor.close()
             connection.close()
 
 # ============================================================================
 # ATTENTION TAB ENDPOINTS (SA_CustomerPageAttention)
 # ============================================================================
 
+# Metrics for this employee OR records with NULL employee_id
+ATTENTION_METRICS_QUERY = """
+    SELECT DISTINCT metric
+    FROM SA_CustomerPageAttention
+    WHERE (employee_id = %s OR employee_id IS NULL) AND metric IS NOT NULL
+    ORDER BY metric
+"""
+
 @app.route('/api/attention/metrics/<employee_id>', methods=['GET'])
 def get_attention_metrics(employee_id):
     """Get distinct metrics from SA_CustomerPageAttention for an employee"""
-    print(f"\n[CHECK] Fetching attention metrics for employee: {employee_id}")
+    log.debug('Fetching attention metrics', employee_id=employee_id)
 
     connection = get_db_connection()
     if not connection:
@@ -1192,20 +1456,13 @@ def get_attention_metrics(employee_id):
     try:
         cursor = connection.cursor(dictionary=True)
 
-        # Get metrics for this employee OR records with NULL employee_id
-        query = """
-            SELECT DISTINCT metric
-            FROM SA_CustomerPageAttention
-            WHERE (employee_id = %s OR employee_id IS NULL) AND metric IS NOT NULL
-            ORDER BY metric
-        """
-
-        cursor.execute(query, (employee_id,))
+        cursor.execute(ATTENTION_METRICS_QUERY, (employee_id,))
         results = cursor.fetchall()
 
         metrics = [row['metric'] for row in results if row['metric']]
 
-        print(f"[OK] Found {len(metrics)} distinct metrics for attention tab")
+        log.debug('Found attention metrics', employee_id=employee_id, count=len(metrics))
+        log.payload('Attention metrics', metrics=metrics)
 
         return jsonify({
             'success': True,
@@ -1214,18 +1471,55 @@ def get_attention_metrics(employee_id):
         }), 200
 
     except Error as e:
-        print(f"[ERROR] Database error: {e}")
+        log.error('Database error', error=str(e))
         return jsonify({'success': False, 'message': 'Database error', 'error': str(e)}), 500
     finally:
         if connection and connection.is_connected():
             cursor.close()
             connection.close()
 
+def attention_customers_query(employee_id, metric):
+    """(query, params) for the unique SA_CustomerPageAttention customers of one metric
+
+    Filtered by employee_id to show only customers assigned to this employee.
+    If metric is "All", customers from all metrics for this employee.
+    """
+    if metric == 'All':
+        return """
+            SELECT DISTINCT
+                customer_id,
+                customername,
+                contactnumber
+            FROM SA_CustomerPageAttention
+            WHERE employee_id = %s
+            ORDER BY customer_id
+        """, (employee_id,)
+    return """
+        SELECT DISTINCT
+            customer_id,
+            customername,
+            contactnumber
+        FROM SA_CustomerPageAttention
+        WHERE employee_id = %s AND metric = %s
+        ORDER BY customer_id
+    """, (employee_id, metric)
+
+ATTENTION_CUSTOMER_COLUMNS = ColumnMap('customer_id', 'customername', 'contactnumber')
+
+def format_attention_customer(customer):
+    """SA_CustomerPageAttention customer row in the shape the frontend expects"""
+    return {
+        'customerId': customer.get('customer_id'),
+        'customerName': customer.get('customername') or 'Unknown',
+        'phoneNumber': str(customer.get('contactnumber')) if customer.get('contactnumber') else 'N/A'
+    }
+
 @app.route('/api/attention/customers/<employee_id>', methods=['GET'])
+@response_cache.cached('attention_customers', ttl=300)
 def get_attention_customers(employee_id):
     """Get unique customers for a specific metric from SA_CustomerPageAttention"""
     metric = request.args.get('metric', '')
-    print(f"\n[CHECK] Fetching attention customers for metric '{metric}' and employee: {employee_id}")
+    log.debug('Fetching attention customers', employee_id=employee_id, metric=metric)
 
     if not metric:
         return jsonify({'success': False, 'message': 'Metric parameter is required'}), 400
@@ -1235,45 +1529,13 @@ def get_attention_customers(employee_id):
         return jsonify({'success': False, 'message': 'Database connection failed'}), 500
 
     try:
-        cursor = connection.cursor(dictionary=True)
-
-        # Get unique customers for this metric
-        # Filter by employee_id to show only customers assigned to this employee
-        # If metric is "All", return customers from all metrics for this employee
-        if metric == 'All':
-            query = """
-                SELECT DISTINCT
-                    customer_id,
-                    customername,
-                    contactnumber
-                FROM SA_CustomerPageAttention
-                WHERE employee_id = %s
-                ORDER BY customer_id
-            """
-            cursor.execute(query, (employee_id,))
-        else:
-            query = """
-                SELECT DISTINCT
-                    customer_id,
-                    customername,
-                    contactnumber
-                FROM SA_CustomerPageAttention
-                WHERE employee_id = %s AND metric = %s
-                ORDER BY customer_id
-            """
-            cursor.execute(query, (employee_id, metric))
-        raw_customers = cursor.fetchall()
+        raw_customers = fetch_rows(connection, *attention_customers_query(employee_id, metric),
+                                   columns=ATTENTION_CUSTOMER_COLUMNS)
 
         # Transform data to match frontend expectations
-        customers = []
-        for customer in raw_customers:
-            customers.append({
-                'customerId': customer.get('customer_id'),
-                'customerName': customer.get('customername') or 'Unknown',
-                'phoneNumber': str(customer.get('contactnumber')) if customer.get('contactnumber') else 'N/A'
-            })
+        customers = [format_attention_customer(customer) for customer in raw_customers]
 
-        print(f"[OK] Found {len(customers)} unique customers for metric '{metric}'")
+        log.debug('Found attention customers', employee_id=employee_id, metric=metric, count=len(customers))
 
         return jsonify({
             'success': True,
@@ -1283,18 +1545,86 @@ def get_attention_customers(employee_id):
         }), 200
 
     except Error as e:
-        print(f"[ERROR] Database error: {e}")
+        log.error('Database error', error=str(e))
         return jsonify({'success': False, 'message': 'Database error', 'error': str(e)}), 500
     finally:
         if connection and connection.is_connected():
-            cursor.close()
             connection.close()
 
+ATTENTION_SKU_COLUMNS = ColumnMap(
+    'skuid', 'skuname', 'metric', 'orderkg', 'billedkg', 'salekg', 'returnkg', 'readjustmentkg',
+    'shopreachtime', 'ontime', 'date'
+)
+
+def attention_sku_query(employee_id, customer_id, metric):
+    """(query, params) for one customer's SA_CustomerPageAttention SKU records"""
+    # Filter by employee_id to show only SKUs assigned to this employee
+    # If metric is "All", return all SKU records across all metrics for this employee
+    if metric == 'All':
+        return """
+            SELECT
+                skuid,
+                skuname,
+                metric,
+                orderkg,
+                billedkg,
+                salekg,
+                returnkg,
+                readjustmentkg,
+                shopreachtime,
+                ontime,
+                date
+            FROM SA_CustomerPageAttention
+            WHERE employee_id = %s
+                AND customer_id = %s
+            ORDER BY date DESC, metric, skuid
+        """, (employee_id, customer_id)
+    return """
+        SELECT
+            skuid,
+            skuname,
+            metric,
+            orderkg,
+            billedkg,
+            salekg,
+            returnkg,
+            readjustmentkg,
+            shopreachtime,
+            ontime,
+            date
+        FROM SA_CustomerPageAttention
+        WHERE employee_id = %s
+            AND customer_id = %s
+            AND metric = %s
+        ORDER BY date DESC, skuid
+    """, (employee_id, customer_id, metric)
+
+def format_attention_sku(record):
+    """SA_CustomerPageAttention SKU record in the shape the frontend expects"""
+    # Format shopreachtime if it exists
+    reach_time = None
+    if record.get('shopreachtime'):
+        reach_time = str(record['shopreachtime'])
+
+    return {
+        'skuId': record.get('skuid'),
+        'skuName': record.get('skuname') or 'Unknown SKU',
+        'metric': record.get('metric'),  # Include metric for "All" filter
+        'orderKg': float(record.get('orderkg')) if record.get('orderkg') is not None else 0,
+        'billedKg': float(record.get('billedkg')) if record.get('billedkg') is not None else 0,
+        'saleKg': float(record.get('salekg')) if record.get('salekg') is not None else 0,
+        'returnKg': float(record.get('returnkg')) if record.get('returnkg') is not None else 0,
+        'readjustmentKg': float(record.get('readjustmentkg')) if record.get('readjustmentkg') is not None else 0,
+        'shopReachTime': reach_time,
+        'onTime': bool(record.get('ontime')) if record.get('ontime') is not None else False,
+        'date': record.get('date').strftime('%Y-%m-%d') if record.get('date') else None
+    }
+
 @app.route('/api/attention/sku-details/<employee_id>/<customer_id>', methods=['GET'])
 def get_attention_sku_details(employee_id, customer_id):
     """Get SKU details for a specific customer from SA_CustomerPageAttention"""
     metric = request.args.get('metric', '')
-    print(f"\n[CHECK] Fetching SKU details for customer {customer_id}, metric '{metric}', employee: {employee_id}")
+    log.debug('Fetching attention SKU details', employee_id=employee_id, customer_id=customer_id, metric=metric)
 
     if not metric:
         return jsonify({'success': False, 'message': 'Metric parameter is required'}), 400
@@ -1304,77 +1634,20 @@ def get_attention_sku_details(employee_id, customer_id):
         return jsonify({'success': False, 'message': 'Database connection failed'}), 500
 
     try:
-        cursor = connection.cursor(dictionary=True)
+        query, params = attention_sku_query(employee_id, customer_id, metric)
+        if wants_stream():
+            rows = stream_rows(connection, query, ATTENTION_SKU_COLUMNS, params)
+            response = streamed_list_response(connection, rows, map(format_attention_sku, rows), 'skus',
+                                              count_field='count', customerId=customer_id, metric=metric)
+            connection = None  # closed by the response once the body is written
+            return response
 
-        # Get all SKU details for this customer and metric
-        # Filter by employee_id to show only SKUs assigned to this employee
-        # If metric is "All", return all SKU records across all metrics for this employee
-        if metric == 'All':
-            query = """
-                SELECT
-                    skuid,
-                    skuname,
-                    metric,
-                    orderkg,
-                    billedkg,
-                    salekg,
-                    returnkg,
-                    readjustmentkg,
-                    shopreachtime,
-                    ontime,
-                    date
-                FROM SA_CustomerPageAttention
-                WHERE employee_id = %s
-                    AND customer_id = %s
-                ORDER BY date DESC, metric, skuid
-            """
-            cursor.execute(query, (employee_id, customer_id))
-        else:
-            query = """
-                SELECT
-                    skuid,
-                    skuname,
-                    metric,
-                    orderkg,
-                    billedkg,
-                    salekg,
-                    returnkg,
-                    readjustmentkg,
-                    shopreachtime,
-                    ontime,
-                    date
-                FROM SA_CustomerPageAttention
-                WHERE employee_id = %s
-                    AND customer_id = %s
-                    AND metric = %s
-                ORDER BY date DESC, skuid
-            """
-            cursor.execute(query, (employee_id, customer_id, metric))
-        sku_records = cursor.fetchall()
+        sku_records = fetch_rows(connection, query, params, ATTENTION_SKU_COLUMNS)
 
         # Transform data to match frontend expectations
-        skus = []
-        for record in sku_records:
-            # Format shopreachtime if it exists
-            reach_time = None
-            if record.get('shopreachtime'):
-                reach_time = str(record['shopreachtime'])
-
-            skus.append({
-                'skuId': record.get('skuid'),
-                'skuName': record.get('skuname') or 'Unknown SKU',
-                'metric': record.get('metric'),  # Include metric for "All" filter
-                'orderKg': float(record.get('orderkg')) if record.get('orderkg') is not None else 0,
-                'billedKg': float(record.get('billedkg')) if record.get('billedkg') is not None else 0,
-                'saleKg': float(record.get('salekg')) if record.get('salekg') is not None else 0,
-                'returnKg': float(record.get('returnkg')) if record.get('returnkg') is not None else 0,
-                'readjustmentKg': float(record.get('readjustmentkg')) if record.get('readjustmentkg') is not None else 0,
-                'shopReachTime': reach_time,
-                'onTime': bool(record.get('ontime')) if record.get('ontime') is not None else False,
-                'date': record.get('date').strftime('%Y-%m-%d') if record.get('date') else None
-            })
+        skus = [format_attention_sku(record) for record in sku_records]
 
-        print(f"[OK] Found {len(skus)} SKU records for customer {customer_id}")
+        log.debug('Found SKU records', customer_id=customer_id, count=len(skus))
 
         return jsonify({
             'success': True,
@@ -1385,21 +1658,27 @@ def get_attention_sku_details(employee_id, customer_id):
         }), 200
 
     except Error as e:
-        print(f"[ERROR] Database error: {e}")
+        log.error('Database error', error=str(e))
         return jsonify({'success': False, 'message': 'Database error', 'error': str(e)}), 500
     finally:
         if connection and connection.is_connected():
-            cursor.close()
             connection.close()
 
 # ============================================================================
 # TODAYS ORDERS TAB ENDPOINTS (SA_CustomerPageTodayOrders)
 # ============================================================================
 
+TODAYS_ORDERS_LAYERS_QUERY = """
+    SELECT DISTINCT layer
+    FROM SA_CustomerPageTodayOrders
+    WHERE employee_id = %s
+    ORDER BY layer
+"""
+
 @app.route('/api/todays-orders/layers/<employee_id>', methods=['GET'])
 def get_todays_orders_layers(employee_id):
     """Get distinct layers available for an employee in SA_CustomerPageTodayOrders table"""
-    print(f"\n📋 Fetching available layers for Today's Orders for employee: {employee_id}")
+    log.debug("Fetching today's orders layers", employee_id=employee_id)
 
     connection = get_db_connection()
     if not connection:
@@ -1409,19 +1688,14 @@ def get_todays_orders_layers(employee_id):
         cursor = connection.cursor(dictionary=True)
 
         # Get distinct layers for this employee
-        query = """
-            SELECT DISTINCT layer
-            FROM SA_CustomerPageTodayOrders
-            WHERE employee_id = %s
-            ORDER BY layer
-        """
-        cursor.execute(query, (employee_id,))
+        cursor.execute(TODAYS_ORDERS_LAYERS_QUERY, (employee_id,))
         results = cursor.fetchall()
 
         # Extract layer names
         layers = [row['layer'] for row in results if row['layer']]
 
-        print(f"[OK] Found {len(layers)} layers: {layers}")
+        log.debug("Found today's orders layers", employee_id=employee_id, count=len(layers))
+        log.payload("Today's orders layers", layers=layers)
 
         return jsonify({
             'success': True,
@@ -1430,18 +1704,54 @@ def get_todays_orders_layers(employee_id):
         }), 200
 
     except Error as e:
-        print(f"[ERROR] Database error: {e}")
+        log.error('Database error', error=str(e))
         return jsonify({'success': False, 'message': 'Database error', 'error': str(e)}), 500
     finally:
         if connection and connection.is_connected():
             cursor.close()
             connection.close()
 
+# Unique customers for an employee and layer with their latest order time
+TODAYS_ORDERS_CUSTOMERS_QUERY = """
+    SELECT
+        customer_id,
+        customername,
+        contactnumber,
+        MAX(ordertime) as ordertime
+    FROM SA_CustomerPageTodayOrders
+    WHERE employee_id = %s AND layer = %s
+    GROUP BY customer_id, customername, contactnumber
+    ORDER BY customer_id
+"""
+TODAYS_ORDERS_CUSTOMER_COLUMNS = ColumnMap('customer_id', 'customername', 'contactnumber', 'ordertime')
+
+def format_todays_orders_customer(customer):
+    """SA_CustomerPageTodayOrders customer row in the shape the frontend expects"""
+    # Handle ordertime - could be datetime or string
+    order_time = customer.get('ordertime')
+    formatted_time = None
+    if order_time:
+        try:
+            if hasattr(order_time, 'strftime'):
+                formatted_time = order_time.strftime('%H:%M:%S')
+            else:
+                formatted_time = str(order_time)
+        except:
+            formatted_time = str(order_time) if order_time else None
+
+    return {
+        'customerId': customer.get('customer_id'),
+        'customerName': customer.get('customername') or 'Unknown',
+        'contactNumber': str(customer.get('contactnumber')) if customer.get('contactnumber') else 'N/A',
+        'orderTime': formatted_time
+    }
+
 @app.route('/api/todays-orders/customers/<employee_id>', methods=['GET'])
+@response_cache.cached('todays_orders_customers', ttl=60)
 def get_todays_orders_customers(employee_id):
     """Get unique customers for a specific layer from SA_CustomerPageTodayOrders"""
     layer = request.args.get('layer', '')
-    print(f"\n[CHECK] Fetching Today's Orders customers for layer '{layer}' and employee: {employee_id}")
+    log.debug("Fetching today's orders customers", employee_id=employee_id, layer=layer)
 
     if not layer:
         return jsonify({'success': False, 'message': 'Layer parameter is required'}), 400
@@ -1451,46 +1761,13 @@ def get_todays_orders_customers(employee_id):
         return jsonify({'success': False, 'message': 'Database connection failed'}), 500
 
     try:
-        cursor = connection.cursor(dictionary=True)
-
-        # Get unique customers for this employee and layer with their latest order time
-        query = """
-            SELECT
-                customer_id,
-                customername,
-                contactnumber,
-                MAX(ordertime) as ordertime
-            FROM SA_CustomerPageTodayOrders
-            WHERE employee_id = %s AND layer = %s
-            GROUP BY customer_id, customername, contactnumber
-            ORDER BY customer_id
-        """
-        cursor.execute(query, (employee_id, layer))
-        raw_customers = cursor.fetchall()
+        raw_customers = fetch_rows(connection, TODAYS_ORDERS_CUSTOMERS_QUERY, (employee_id, layer),
+                                   TODAYS_ORDERS_CUSTOMER_COLUMNS)
 
         # Transform data to match frontend expectations
-        customers = []
-        for customer in raw_customers:
-            # Handle ordertime - could be datetime or string
-            order_time = customer.get('ordertime')
-            formatted_time = None
-            if order_time:
-                try:
-                    if hasattr(order_time, 'strftime'):
-                        formatted_time = order_time.strftime('%H:%M:%S')
-                    else:
-                        formatted_time = str(order_time)
-                except:
-                    formatted_time = str(order_time) if order_time else None
-
-            customers.append({
-                'customerId': customer.get('customer_id'),
-                'customerName': customer.get('customername') or 'Unknown',
-                'contactNumber': str(customer.get('contactnumber')) if customer.get('contactnumber') else 'N/A',
-                'orderTime': formatted_time
-            })
+        customers = [format_todays_orders_customer(customer) for customer in raw_customers]
 
-        print(f"[OK] Found {len(customers)} unique customers for layer '{layer}'")
+        log.debug("Found today's orders customers", employee_id=employee_id, layer=layer, count=len(customers))
 
         return jsonify({
             'success': True,
@@ -1500,18 +1777,59 @@ def get_todays_orders_customers(employee_id):
         }), 200
 
     except Error as e:
-        print(f"[ERROR] Database error: {e}")
+        log.error('Database error', error=str(e))
         return jsonify({'success': False, 'message': 'Database error', 'error': str(e)}), 500
     finally:
         if connection and connection.is_connected():
-            cursor.close()
             connection.close()
 
+TODAYS_ORDERS_SKU_PROJECTION = schema_cache.project(
+    'SA_CustomerPageTodayOrders', 'skuid', 'Sku', 'orderqty', 'orderkg', 'date'
+)
+
+def todays_orders_sku_query():
+    return f"""
+        SELECT {TODAYS_ORDERS_SKU_PROJECTION.select_list()}
+        FROM SA_CustomerPageTodayOrders
+        WHERE employee_id = %s
+            AND customer_id = %s
+            AND layer = %s
+    """
+
+def format_todays_orders_sku(sku):
+    """SA_CustomerPageTodayOrders SKU row in the shape the frontend expects"""
+    # Use exact column names from database
+    sku_id = sku.get('skuid')
+    sku_name = sku.get('Sku') or 'Unknown'  # Column is 'Sku' not 'skuname'
+    order_qty = sku.get('orderqty') or 0
+    order_kg = sku.get('orderkg') or 0
+
+    # Handle date - it could be datetime, date, or string
+    date_value = sku.get('date')
+    formatted_date = None
+    if date_value:
+        try:
+            if hasattr(date_value, 'strftime'):
+                formatted_date = date_value.strftime('%Y-%m-%d')
+            else:
+                formatted_date = str(date_value)
+        except Exception as date_err:
+            log.warning('Date formatting error', error=str(date_err))
+            formatted_date = str(date_value) if date_value else None
+
+    return {
+        'skuId': sku_id,
+        'skuName': sku_name,
+        'orderQty': float(order_qty) if order_qty is not None else 0.0,
+        'orderKg': float(order_kg) if order_kg is not None else 0.0,
+        'date': formatted_date
+    }
+
 @app.route('/api/todays-orders/sku-details/<employee_id>/<customer_id>', methods=['GET'])
 def get_todays_orders_sku_details(employee_id, customer_id):
     """Get SKU details for a specific customer from SA_CustomerPageTodayOrders"""
     layer = request.args.get('layer', '')
-    print(f"\n[CHECK] Fetching SKU details for customer {customer_id}, layer '{layer}', employee: {employee_id}")
+    log.debug("Fetching today's orders SKU details", employee_id=employee_id, customer_id=customer_id, layer=layer)
 
     if not layer:
         return jsonify({'success': False, 'message': 'Layer parameter is required'}), 400
@@ -1521,66 +1839,14 @@ def get_todays_orders_sku_details(employee_id, customer_id):
         return jsonify({'success': False, 'message': 'Database connection failed'}), 500
 
     try:
-        cursor = connection.cursor(dictionary=True)
-
-        # Get all SKU details for this customer and layer
-        # First, try to get all columns to see what's available
-        query = """
-            SELECT *
-            FROM SA_CustomerPageTodayOrders
-            WHERE employee_id = %s
-                AND customer_id = %s
-                AND layer = %s
-            LIMIT 1
-        """
-        cursor.execute(query, (employee_id, customer_id, layer))
-        sample_record = cursor.fetchone()
-
-        if sample_record:
-            print(f"[DEBUG] Available columns: {list(sample_record.keys())}")
-
-        # Now get all records
-        query = """
-            SELECT *
-            FROM SA_CustomerPageTodayOrders
-            WHERE employee_id = %s
-                AND customer_id = %s
-                AND layer = %s
-        """
-        cursor.execute(query, (employee_id, customer_id, layer))
-        sku_records = cursor.fetchall()
+        # Columns come from the projection registry, so there is no per-request probe query
+        sku_records = fetch_rows(connection, todays_orders_sku_query(), (employee_id, customer_id, layer),
+                                 TODAYS_ORDERS_SKU_PROJECTION.columns)
 
         # Transform data to match frontend expectations
-        skus = []
-        for sku in sku_records:
-            # Use exact column names from database
-            sku_id = sku.get('skuid')
-            sku_name = sku.get('Sku') or 'Unknown'  # Column is 'Sku' not 'skuname'
-            order_qty = sku.get('orderqty') or 0
-            order_kg = sku.get('orderkg') or 0
-
-            # Handle date - it could be datetime, date, or string
-            date_value = sku.get('date')
-            formatted_date = None
-            if date_value:
-                try:
-                    if hasattr(date_value, 'strftime'):
-                        formatted_date = date_value.strftime('%Y-%m-%d')
-                    else:
-                        formatted_date = str(date_value)
-                except Exception as date_err:
-                    print(f"[WARN] Date formatting error: {date_err}")
-                    formatted_date = str(date_value) if date_value else None
-
-            skus.append({
-                'skuId': sku_id,
-                'skuName': sku_name,
-                'orderQty': float(order_qty) if order_qty is not None else 0.0,
-                'orderKg': float(order_kg) if order_kg is not None else 0.0,
-                'date': formatted_date
-            })
+        skus = [format_todays_orders_sku(sku) for sku in sku_records]
 
-        print(f"[OK] Found {len(skus)} SKU records for customer {customer_id}")
+        log.debug('Found SKU records', customer_id=customer_id, count=len(skus))
 
         return jsonify({
             'success': True,
@@ -1589,89 +1855,183 @@ def get_todays_orders_sku_details(employee_id, customer_id):
         }), 200
 
     except Error as e:
-        print(f"[ERROR] Database error: {e}")
+        log.error('Database error', error=str(e))
         return jsonify({'success': False, 'message': 'Database error', 'error': str(e)}), 500
     finally:
         if connection and connection.is_connected():
-            cursor.close()
             connection.close()
 
 # ============================================================================
 # BASE TAB ENDPOINTS (SA_CustomerPageBase)
 # ============================================================================
 
+def base_customers_filter(employee_id, customer_id_filter='', contact_filter='', alias=''):
+    """(WHERE clause, params) for SA_CustomerPageBase with the optional filters"""
+    where = f"WHERE {alias}employee_id = %s"
+    params = [employee_id]
+
+    # Add customer_id filter if provided
+    if customer_id_filter:
+        where += f" AND {alias}customer_id = %s"
+        params.append(int(customer_id_filter))
+
+    # Add contact filter if provided
+    if contact_filter:
+        where += f" AND {alias}contactnumber = %s"
+        params.append(int(contact_filter))
+
+    return where, params
+
+# Use DISTINCT to get unique customers
+BASE_CUSTOMERS_SELECT = """
+        SELECT DISTINCT
+            customer_id,
+            customername,
+            contactnumber,
+            customertype,
+            customernature,
+            locality,
+            facility,
+            cluster,
+            latestsubscriptionenddate,
+            latestsubscriptionamount,
+            LOD
+        FROM SA_CustomerPageBase
+"""
+
+def base_customers_query(employee_id, customer_id_filter='', contact_filter='', after=None, limit=None):
+    """(query, params) for SA_CustomerPageBase with the optional filters.
+
+    With ``limit`` the list is a keyset page over the distinct
+    (customername, customer_id) keys after the ``after`` key. A customer can
+    have several distinct rows (differing in another column), so the page
+    picks ``limit`` keys and returns every row of them; page_fields keeps a
+    key's rows together.
+    """
+    where, params = base_customers_filter(employee_id, customer_id_filter, contact_filter)
+    query = BASE_CUSTOMERS_SELECT + "        " + where
+
+    if limit is None:
+        return query + " ORDER BY customername", tuple(params)
+
+    if after is not None:
+        name, customer_id = after
+        if name is None:
+            # NULL names sort first
+            where += " AND (customername IS NOT NULL OR customer_id > %s)"
+            params.append(customer_id)
+        else:
+            where += " AND (customername > %s OR (customername = %s AND customer_id > %s))"
+            params += [name, name, customer_id]
+    row_where, row_params = base_customers_filter(employee_id, customer_id_filter, contact_filter, alias='b.')
+    return f"""
+        SELECT DISTINCT
+            b.customer_id,
+            b.customername,
+            b.contactnumber,
+            b.customertype,
+            b.customernature,
+            b.locality,
+            b.facility,
+            b.cluster,
+            b.latestsubscriptionenddate,
+            b.latestsubscriptionamount,
+            b.LOD
+        FROM SA_CustomerPageBase b
+        JOIN (
+            SELECT DISTINCT customername, customer_id
+            FROM SA_CustomerPageBase
+            {where}
+            ORDER BY customername, customer_id
+            LIMIT %s
+        ) page ON page.customer_id = b.customer_id AND page.customername <=> b.customername
+        {row_where}
+        ORDER BY b.customername, b.customer_id
+    """, (*params, limit, *row_params)
+
+def base_customers_count_query(employee_id, customer_id_filter='', contact_filter=''):
+    """Distinct (customername, customer_id) keys - the unit ``limit`` pages by"""
+    where, params = base_customers_filter(employee_id, customer_id_filter, contact_filter)
+    return f"""
+        SELECT COUNT(*) FROM (
+            SELECT DISTINCT customername, customer_id
+            FROM SA_CustomerPageBase
+            {where}
+        ) AS base_customer_keys
+    """, tuple(params)
+
+BASE_CUSTOMER_COLUMNS = ColumnMap(
+    'customer_id', 'customername', 'contactnumber', 'customertype', 'customernature', 'locality',
+    'facility', 'cluster', 'latestsubscriptionenddate', 'latestsubscriptionamount', 'LOD'
+)
+
+def format_base_customer(customer):
+    """SA_CustomerPageBase row in the shape the frontend expects"""
+    return {
+        'customerId': customer.get('customer_id'),
+        'customerName': customer.get('customername') or 'Unknown',
+        'phoneNumber': str(customer.get('contactnumber')) if customer.get('contactnumber') else 'N/A',
+        'customerType': customer.get('customertype'),
+        'customerNature': customer.get('customernature'),
+        'locality': customer.get('locality'),
+        'facility': customer.get('facility'),
+        'cluster': customer.get('cluster'),
+        'subscriptionEndDate': customer.get('latestsubscriptionenddate').strftime('%Y-%m-%d') if customer.get('latestsubscriptionenddate') else None,
+        'subscriptionAmount': float(customer.get('latestsubscriptionamount')) if customer.get('latestsubscriptionamount') else None,
+        'lastOrderDate': customer.get('LOD').strftime('%Y-%m-%d') if customer.get('LOD') else None
+    }
+
 @app.route('/api/base/customers/<employee_id>', methods=['GET'])
+@response_cache.cached('base_customers', ttl=600)
 def get_base_customers(employee_id):
     """Get all base customers for an employee with optional filters"""
     customer_id_filter = request.args.get('customer_id', '')
     contact_filter = request.args.get('contact', '')
 
-    print(f"\n[CHECK] Fetching base customers for employee: {employee_id}")
-    if customer_id_filter:
-        print(f"[FILTER] Customer ID: {customer_id_filter}")
-    if contact_filter:
-        print(f"[FILTER] Contact Number: {contact_filter}")
+    log.debug('Fetching base customers', employee_id=employee_id, customer_id=customer_id_filter, contact=contact_filter)
+
+    try:
+        page = page_args(request.args, 'base_customers', 2)
+    except ValueError:
+        return jsonify({'success': False, 'message': PAGE_ARGS_MESSAGE}), 400
 
     connection = get_db_connection()
     if not connection:
         return jsonify({'success': False, 'message': 'Database connection failed'}), 500
 
     try:
-        cursor = connection.cursor(dictionary=True)
-
-        # Build query with optional filters - use DISTINCT to get unique customers
-        query = """
-            SELECT DISTINCT
-                customer_id,
-                customername,
-                contactnumber,
-                customertype,
-                customernature,
-                locality,
-                facility,
-                cluster,
-                latestsubscriptionenddate,
-                latestsubscriptionamount,
-                LOD
-            FROM SA_CustomerPageBase
-            WHERE employee_id = %s
-        """
-
-        params = [employee_id]
-
-        # Add customer_id filter if provided
-        if customer_id_filter:
-            query += " AND customer_id = %s"
-            params.append(int(customer_id_filter))
-
-        # Add contact filter if provided
-        if contact_filter:
-            query += " AND contactnumber = %s"
-            params.append(int(contact_filter))
+        if page:
+            # One extra row tells us whether there is a next page
+            rows = fetch_rows(connection, *base_customers_query(
+                employee_id, customer_id_filter, contact_filter, page.after, page.limit + 1), BASE_CUSTOMER_COLUMNS)
+            total = fetch_tuples(connection, *base_customers_count_query(
+                employee_id, customer_id_filter, contact_filter))[0][0] if page.with_total else None
+            rows, paging = page_fields('base_customers', page, rows,
+                                       lambda customer: (customer.customername, customer.customer_id), total)
+            formatted_customers = [format_base_customer(customer) for customer in rows]
+
+            log.debug('Found base customers', employee_id=employee_id, count=len(formatted_customers), limit=page.limit)
+            return jsonify({
+                'success': True,
+                'customers': formatted_customers,
+                'count': len(formatted_customers),
+                **paging
+            }), 200
 
-        query += " ORDER BY customername"
+        query, params = base_customers_query(employee_id, customer_id_filter, contact_filter)
+        if wants_stream():
+            rows = stream_rows(connection, query, BASE_CUSTOMER_COLUMNS, params)
+            response = streamed_list_response(connection, rows, map(format_base_customer, rows), 'customers',
+                                              count_field='count')
+            connection = None  # closed by the response once the body is written
+            return response
 
-        cursor.execute(query, tuple(params))
-        customers = cursor.fetchall()
+        customers = fetch_rows(connection, query, params, BASE_CUSTOMER_COLUMNS)
 
         # Transform data to match frontend expectations
-        formatted_customers = []
-        for customer in customers:
-            formatted_customers.append({
-                'customerId': customer.get('customer_id'),
-                'customerName': customer.get('customername') or 'Unknown',
-                'phoneNumber': str(customer.get('contactnumber')) if customer.get('contactnumber') else 'N/A',
-                'customerType': customer.get('customertype'),
-                'customerNature': customer.get('customernature'),
-                'locality': customer.get('locality'),
-                'facility': customer.get('facility'),
-                'cluster': customer.get('cluster'),
-                'subscriptionEndDate': customer.get('latestsubscriptionenddate').strftime('%Y-%m-%d') if customer.get('latestsubscriptionenddate') else None,
-                'subscriptionAmount': float(customer.get('latestsubscriptionamount')) if customer.get('latestsubscriptionamount') else None,
-                'lastOrderDate': customer.get('LOD').strftime('%Y-%m-%d') if customer.get('LOD') else None
-            })
+        formatted_customers = [format_base_customer(customer) for customer in customers]
 
-        print(f"[OK] Found {len(formatted_customers)} base customers")
+        log.debug('Found base customers', employee_id=employee_id, count=len(formatted_customers))
 
         return jsonify({
             'success': True,
@@ -1680,17 +2040,24 @@ def get_base_customers(employee_id):
         }), 200
 
     except Error as e:
-        print(f"[ERROR] Database error: {e}")
+        log.error('Database error', error=str(e))
         return jsonify({'success': False, 'message': 'Database error', 'error': str(e)}), 500
     finally:
         if connection and connection.is_connected():
-            cursor.close()
             connection.close()
 
+NOTIFICATIONS_QUERY = """
+    SELECT Id, date, heading, description, priority
+    FROM SA_AppNotification
+    WHERE date <= CURDATE()
+    ORDER BY priority DESC, date DESC
+    LIMIT 10
+"""
+
 @app.route('/api/notifications', methods=['GET'])
 def get_notifications():
     """Get app notifications from SA_AppNotification table"""
-    print(f"\n📢 Fetching app notifications...")
+    log.debug('Fetching app notifications')
 
     connection = get_db_connection()
     if not connection:
@@ -1700,13 +2067,7 @@ def get_notifications():
         cursor = connection.cursor(dictionary=True)
 
         # Get notifications ordered by date (most recent first) and priority
-        cursor.execute(
-            """SELECT Id, date, heading, description, priority
-               FROM SA_AppNotification
-               WHERE date <= CURDATE()
-               ORDER BY priority DESC, date DESC
-               LIMIT 10"""
-        )
+        cursor.execute(NOTIFICATIONS_QUERY)
         notifications = cursor.fetchall()
 
         # Transform to match frontend expectations
@@ -1737,7 +2098,7 @@ def get_notifications():
                 'priority': priority
             })
 
-        print(f"[OK] Found {len(news_items)} notifications")
+        log.debug('Found notifications', count=len(news_items))
         return jsonify({
             'success': True,
             'notifications': news_items,
@@ -1745,7 +2106,7 @@ def get_notifications():
         }), 200
 
     except Error as e:
-        print(f"[ERROR] Database error: {e}")
+        log.error('Database error', error=str(e))
         return jsonify({'success': False, 'message': 'Database error', 'error': str(e)}), 500
     finally:
         if connection and connection.is_connected():
@@ -1755,9 +2116,9 @@ def get_notifications():
 if __name__ == '__main__':
     # Set UTF-8 encoding for console output
     import sys
-    import io
     if sys.stdout.encoding != 'utf-8':
-        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+        # Re-encode in place: the log writer thread holds on to this stream object
+        sys.stdout.reconfigure(encoding='utf-8')
 
     print("\n" + "="*70)
     print("SALES EXECUTIVE APP - PYTHON FLASK BACKEND")
@@ -1775,24 +2136,14 @@ if __name__ == '__main__':
 
     # Test database connection
     print("[CHECK] Testing database connection...")
-    connection = get_db_connection()
-    if connection:
-        try:
-            cursor = connection.cursor()
-            cursor.execute("SELECT COUNT(*) FROM Executive")
-            count = cursor.fetchone()[0]
-            print(f"[OK] Database connected! Found {count} executives in database\n")
-            cursor.close()
-            connection.close()
-        except Error as e:
-            print(f"[ERROR] Database query failed: {e}\n")
-    else:
-        print("[ERROR] Failed to connect to database\n")
+    clear_metrics_dir()
+    init_worker()
+    print()
 
     print("🚀 Starting Flask server...\n")
 
     # Get port from environment variable (Render sets this) or use 5000 for local dev
     port = int(os.environ.get('PORT', 5000))
-    debug_mode = os.environ.get('FLASK_ENV') != 'production'
+    debug_mode = not PRODUCTION
 
     app.run(host='0.0.0.0', port=port, debug=debug_mode)
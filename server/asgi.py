@@ -0,0 +1,378 @@
+"""
+ASGI entry point (optional)
+Serves the dashboard read endpoints with an async MySQL driver and pool,
+so one process can keep hundreds of requests in flight while they wait
+on the WAN link. Queries, formatters and JSON encoding are shared with
+app.py, so the responses are identical. Every other route is passed
+through to the Flask app.
+
+Headers match the Flask handlers too: every read route sends
+Server-Timing, and the routes Flask caches send an ETag (with
+Cache-Control) and answer a matching If-None-Match with 304. Unlike
+Flask, the body is rebuilt from the database on every request: there is
+no server-side response cache, ?stream=1 is answered buffered, and
+these routes are not counted in /metrics or the latency histogram.
+
+    pip install -r requirements-asgi.txt
+    cd server && uvicorn asgi:app --host 0.0.0.0 --port $PORT
+
+The Flask app (gunicorn app:app) remains the default deployment.
+"""
+
+import asyncio
+import contextlib
+import datetime
+import functools
+import os
+
+import aiomysql
+import pymysql
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import Response
+from starlette.routing import Mount, Route
+from werkzeug.http import parse_etags
+
+import app as flask_app
+from app import (
+    ALLOWED_ORIGINS,
+    DB_CONFIG,
+    DB_CONNECTION_BUDGET,
+    LEADERBOARD_QUERY,
+    TODAYS_ORDERS_CUSTOMERS_QUERY,
+    attention_customers_query,
+    base_customers_count_query,
+    base_customers_query,
+    cache_invalidations,
+    connection_pool,
+    format_attention_customer,
+    format_base_customer,
+    format_nudge_zone_customer,
+    format_so_close_customer,
+    format_todays_orders_customer,
+    group_target_customers,
+    leaderboard_body,
+    leaderboard_cache,
+    leaderboard_window_args,
+    leaderboard_window_payload,
+    nudge_zone_query,
+    schema_cache,
+    so_close_query,
+    target_customers_count_query,
+    target_customers_query,
+    targets_query,
+    targets_result,
+)
+from db_pool import POOL_ACQUIRE_TIMEOUT, POOL_MAX_LIFETIME
+from home_bootstrap import configure_home_executor
+from leaderboard_cache import CACHEABLE_LAYERS, CACHEABLE_PERIODS
+from pagination import PAGE_ARGS_MESSAGE, page_args, page_fields
+from request_timing import close_timer, current_timer, phase, server_timing, timed_request
+from response_cache import CACHE_CONTROL, body_etag
+from structured_log import get_logger
+
+log = get_logger('asgi')
+
+# Async connections are cheap to hold while waiting, but the database's
+# connection limit still applies. Each process gets its share of
+# DB_CONNECTION_BUDGET; the Flask pool behind the pass-through routes keeps
+# ASGI_SYNC_POOL_MAX of it and the async pool gets the rest.
+ASGI_PROCESS_BUDGET = max(2, DB_CONNECTION_BUDGET // max(1, int(os.environ.get('WEB_CONCURRENCY', 1))))
+ASGI_SYNC_POOL_MAX = min(int(os.environ.get('ASGI_SYNC_POOL_MAX', max(1, ASGI_PROCESS_BUDGET // 4))),
+                         ASGI_PROCESS_BUDGET - 1)
+ASGI_POOL_MAX = min(int(os.environ.get('ASGI_DB_POOL_MAX', ASGI_PROCESS_BUDGET)),
+                    ASGI_PROCESS_BUDGET - ASGI_SYNC_POOL_MAX)
+ASGI_POOL_MIN = min(int(os.environ.get('ASGI_DB_POOL_MIN', 2)), ASGI_POOL_MAX)
+ASGI_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', POOL_ACQUIRE_TIMEOUT))
+
+_pool = None
+_pool_lock = asyncio.Lock()
+_leaderboard_locks = {}
+
+
+class DatabaseUnavailable(Exception):
+    """No async connection could be obtained"""
+
+
+async def get_pool():
+    """Create the aiomysql pool on first use (inside the running event loop)"""
+    global _pool
+    if _pool is None:
+        async with _pool_lock:
+            if _pool is None:
+                _pool = await aiomysql.create_pool(
+                    host=DB_CONFIG['host'],
+                    port=DB_CONFIG['port'],
+                    user=DB_CONFIG['user'],
+                    password=DB_CONFIG['password'],
+                    db=DB_CONFIG['database'],
+                    minsize=ASGI_POOL_MIN,
+                    maxsize=ASGI_POOL_MAX,
+                    autocommit=True,
+                    pool_recycle=int(POOL_MAX_LIFETIME)
+                )
+                log.info('Async database pool created', connections=f"{ASGI_POOL_MIN}-{ASGI_POOL_MAX}")
+    return _pool
+
+
+async def fetch_all(query, params=(), dictionary=True):
+    """Run one query on a pooled async connection and return all rows"""
+    try:
+        with phase('pool'):
+            pool = await get_pool()
+            connection = await asyncio.wait_for(pool.acquire(), ASGI_POOL_TIMEOUT)
+    except (asyncio.TimeoutError, pymysql.MySQLError) as e:
+        log.error('Database connection error', error=str(e))
+        raise DatabaseUnavailable() from e
+
+    try:
+        async with connection.cursor(aiomysql.DictCursor if dictionary else aiomysql.Cursor) as cursor:
+            timer = current_timer()
+            if timer is not None:
+                timer.count_query()
+            with phase('query'):
+                await cursor.execute(query, params)
+            with phase('fetch'):
+                return await cursor.fetchall()
+    finally:
+        pool.release(connection)
+
+
+def json_response(payload, status=200):
+    # Encoded by the Flask app's JSON provider so both modes emit the same text
+    return Response(flask_app.app.json.dumps(payload), status_code=status, media_type='application/json')
+
+
+def db_endpoint(handler):
+    """Map database failures to the same error bodies the Flask handlers return,
+    and send the same Server-Timing header"""
+    @functools.wraps(handler)
+    async def wrapper(request):
+        with timed_request() as timer:
+            try:
+                response = await handler(request)
+            except DatabaseUnavailable:
+                response = json_response({'success': False, 'message': 'Database connection failed'}, 500)
+            except pymysql.MySQLError as e:
+                log.error('Database error', error=str(e))
+                response = json_response({'success': False, 'message': 'Database error', 'error': str(e)}, 500)
+        phases_ms, total_ms = close_timer(timer)
+        response.headers['Server-Timing'] = server_timing(phases_ms, total_ms, timer.queries)
+        return response
+    return wrapper
+
+
+def revalidated(handler):
+    """ETag and 304 for the routes Flask's response cache serves (the body is not kept)"""
+    @functools.wraps(handler)
+    async def wrapper(request):
+        response = await handler(request)
+        if response.status_code != 200:
+            return response
+        etag = body_etag(response.body)
+        headers = {'ETag': f'"{etag}"', 'Cache-Control': CACHE_CONTROL}
+        if parse_etags(request.headers.get('if-none-match')).contains(etag):
+            return Response(status_code=304, headers=headers)
+        response.headers.update(headers)
+        return response
+    return wrapper
+
+
+async def health_check(request):
+    try:
+        await fetch_all("SELECT 1", dictionary=False)
+    except (DatabaseUnavailable, pymysql.MySQLError):
+        return json_response({'success': False, 'message': 'Database connection failed'}, 500)
+    return json_response({
+        'success': True,
+        'message': 'Sales Executive App API is running with database!',
+        'timestamp': datetime.datetime.now().isoformat(),
+        'mode': 'asgi'
+    })
+
+
+@db_endpoint
+@revalidated
+async def get_nudge_zone_customers(request):
+    rows = await fetch_all(nudge_zone_query(), (request.path_params['employee_id'],))
+    return json_response({'success': True, 'customers': [format_nudge_zone_customer(row) for row in rows]})
+
+
+@db_endpoint
+@revalidated
+async def get_so_close_customers(request):
+    rows = await fetch_all(so_close_query(), (request.path_params['employee_id'],))
+    return json_response({'success': True, 'customers': [format_so_close_customer(row) for row in rows]})
+
+
+def targets_endpoint(period):
+    @db_endpoint
+    async def get_targets(request):
+        employee_id = request.path_params['employee_id']
+        query, pay_days = targets_query(period)
+        rows = await fetch_all(query, (employee_id,), dictionary=False)
+        include_incentives = 'incentives' in request.query_params.get('include', '').split(',')
+        return json_response({'success': True, **targets_result(rows, employee_id, pay_days, include_incentives)})
+    return get_targets
+
+
+async def get_leaderboard_view(period, layer):
+    """Shared LeaderboardCache, loaded with the async driver on a miss"""
+    # Flask's before_request hook doesn't run for these routes
+    cache_invalidations.poll()
+    view = leaderboard_cache.peek(period, layer)
+    if view is not None:
+        return view
+    if period not in CACHEABLE_PERIODS or layer not in CACHEABLE_LAYERS:
+        return leaderboard_cache.store(period, layer, await fetch_all(LEADERBOARD_QUERY, (period, layer)))
+
+    lock = _leaderboard_locks.setdefault((period, layer), asyncio.Lock())
+    async with lock:
+        view = leaderboard_cache.peek(period, layer)
+        if view is None:
+            view = leaderboard_cache.store(period, layer, await fetch_all(LEADERBOARD_QUERY, (period, layer)))
+        return view
+
+
+@db_endpoint
+async def get_leaderboard(request):
+    employee_id = request.path_params['employee_id']
+    period = request.query_params.get('period', 'day')
+    layer = request.query_params.get('layer', 'city')
+
+    try:
+        window = leaderboard_window_args(request.query_params)
+    except ValueError:
+        return json_response({'success': False, 'message': 'top and around must be non-negative integers'}, 400)
+
+    view = await get_leaderboard_view(period, layer)
+    if window:
+        return json_response(leaderboard_window_payload(view, employee_id, period, layer, window))
+    return Response(leaderboard_body(view, employee_id, period, layer), media_type='application/json')
+
+
+@db_endpoint
+@revalidated
+async def get_target_customers(request):
+    employee_id = request.path_params['employee_id']
+    metric = request.query_params.get('metric', '')
+    period = request.query_params.get('period', 'daily')
+    layer = 'day' if period == 'daily' else 'week'
+
+    try:
+        page = page_args(request.query_params, 'target_customers', 1)
+    except ValueError:
+        return json_response({'success': False, 'message': PAGE_ARGS_MESSAGE}, 400)
+
+    if not page:
+        rows = await fetch_all(*target_customers_query(employee_id, layer, metric))
+        return json_response({
+            'success': True,
+            'customers': group_target_customers(rows),
+            'metric': metric,
+            'period': period
+        })
+
+    rows = await fetch_all(*target_customers_query(
+        employee_id, layer, metric, page.after[0] if page.after else None, page.limit + 1))
+    total = (await fetch_all(*target_customers_count_query(employee_id, layer, metric), dictionary=False))[0][0] \
+        if page.with_total else None
+    customers, paging = page_fields('target_customers', page, group_target_customers(rows),
+                                    lambda customer: (customer['customerId'],), total)
+    return json_response({'success': True, 'customers': customers, 'metric': metric, 'period': period, **paging})
+
+
+@db_endpoint
+@revalidated
+async def get_attention_customers(request):
+    metric = request.query_params.get('metric', '')
+    if not metric:
+        return json_response({'success': False, 'message': 'Metric parameter is required'}, 400)
+
+    rows = await fetch_all(*attention_customers_query(request.path_params['employee_id'], metric))
+    customers = [format_attention_customer(row) for row in rows]
+    return json_response({'success': True, 'customers': customers, 'metric': metric, 'count': len(customers)})
+
+
+@db_endpoint
+@revalidated
+async def get_todays_orders_customers(request):
+    layer = request.query_params.get('layer', '')
+    if not layer:
+        return json_response({'success': False, 'message': 'Layer parameter is required'}, 400)
+
+    rows = await fetch_all(TODAYS_ORDERS_CUSTOMERS_QUERY, (request.path_params['employee_id'], layer))
+    customers = [format_todays_orders_customer(row) for row in rows]
+    return json_response({'success': True, 'customers': customers, 'layer': layer, 'count': len(customers)})
+
+
+@db_endpoint
+@revalidated
+async def get_base_customers(request):
+    filters = (
+        request.path_params['employee_id'],
+        request.query_params.get('customer_id', ''),
+        request.query_params.get('contact', '')
+    )
+    try:
+        page = page_args(request.query_params, 'base_customers', 2)
+    except ValueError:
+        return json_response({'success': False, 'message': PAGE_ARGS_MESSAGE}, 400)
+
+    if not page:
+        rows = await fetch_all(*base_customers_query(*filters))
+        customers = [format_base_customer(row) for row in rows]
+        return json_response({'success': True, 'customers': customers, 'count': len(customers)})
+
+    rows = await fetch_all(*base_customers_query(*filters, page.after, page.limit + 1))
+    total = (await fetch_all(*base_customers_count_query(*filters), dictionary=False))[0][0] \
+        if page.with_total else None
+    rows, paging = page_fields('base_customers', page, rows,
+                               lambda customer: (customer['customername'], customer['customer_id']), total)
+    customers = [format_base_customer(row) for row in rows]
+    return json_response({'success': True, 'customers': customers, 'count': len(customers), **paging})
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    # Shrink the pass-through routes' pool (and home fan-out) to their share
+    connection_pool.resize(min(connection_pool.min_size, ASGI_SYNC_POOL_MAX), ASGI_SYNC_POOL_MAX)
+    configure_home_executor(ASGI_SYNC_POOL_MAX)
+    try:
+        await get_pool()
+        # Validate the column projections (app.init_worker does this for Flask workers)
+        schema_cache.load(await fetch_all(*schema_cache.columns_query(), dictionary=False))
+    except (DatabaseUnavailable, pymysql.MySQLError) as e:
+        # Requests retry pool creation, so a slow database doesn't stop startup
+        log.error('Async database startup failed', error=str(e))
+    yield
+    if _pool is not None:
+        _pool.close()
+        await _pool.wait_closed()
+
+
+routes = [
+    Route('/api/health', health_check),
+    Route('/api/customers/nudge-zone/{employee_id}', get_nudge_zone_customers),
+    Route('/api/customers/so-close/{employee_id}', get_so_close_customers),
+    Route('/api/targets/daily/{employee_id}', targets_endpoint('daily')),
+    Route('/api/targets/weekly/{employee_id}', targets_endpoint('weekly')),
+    Route('/api/leaderboard/{employee_id}', get_leaderboard),
+    Route('/api/target-customers/{employee_id}', get_target_customers),
+    Route('/api/attention/customers/{employee_id}', get_attention_customers),
+    Route('/api/todays-orders/customers/{employee_id}', get_todays_orders_customers),
+    Route('/api/base/customers/{employee_id}', get_base_customers),
+    # Everything else (auth, events, admin, SKU details, ...) runs on the Flask app
+    Mount('', app=WSGIMiddleware(flask_app.app)),
+]
+
+app = Starlette(
+    routes=routes,
+    lifespan=lifespan,
+    middleware=[
+        Middleware(CORSMiddleware, allow_origins=ALLOWED_ORIGINS, allow_credentials=True,
+                   allow_methods=['*'], allow_headers=['*'])
+    ]
+)
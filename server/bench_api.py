@@ -0,0 +1,563 @@
+"""Load test: replay realistic traffic mixes against the API and report latency per route
+
+    python bench_api.py                                    # bench_workload.json against the app in this process
+    python bench_api.py --url http://localhost:5000        # against a running server (gunicorn)
+    python bench_api.py --json results.json                # also write the machine-readable results
+    python bench_api.py --baseline results.json            # fail (exit 1) if a route's p95 regressed
+    python bench_api.py --workload my_workload.json        # another traffic mix / seed / size
+
+Virtual users each pick scenarios from the workload's weighted mix - the
+home page burst of six parallel calls, Target page metric switching,
+attention and today's orders drill-downs, paged base customers, event
+spam - and follow links from the responses the way the app does. Each
+user's choices come from the workload seed, so two runs against the same
+data replay the same traffic. Executive ids come from fixture_db's
+generator; point the server at a database seeded with the same sizes
+(see DEV_GUIDE.md).
+
+Reported per route: p50/p95/p99/mean/max latency, throughput, errors,
+response bytes and any phases the server reports in Server-Timing (pool
+wait, DB time, ...). Pool wait totals come from the connection pool
+(in process) or /api/admin/db/pool (--url, with --admin-token).
+
+The in-process app is only started against a local database (the same
+check as fixture_db: every DB_* variable set, none of them production).
+event_spam writes to SA_AppEvents, so a workload that includes it is
+refused for a --url that isn't on this machine unless --allow-event-writes
+is given.
+"""
+import argparse
+import datetime
+import http.client
+import json
+import random
+import sys
+import threading
+import time
+import urllib.parse
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from fixture_db import ATTENTION_METRICS, TARGET_METRICS, SyntheticData, production_database_error
+
+RESULTS_VERSION = 1
+DEFAULT_WORKLOAD = 'bench_workload.json'
+MIN_SAMPLES_TO_COMPARE = 20
+HOME_BURST_SIZE = 6
+LOCAL_HOSTS = ('localhost', '127.0.0.1', '::1')
+WRITE_SCENARIOS = ('event_spam',)
+
+Request = namedtuple('Request', 'route method path body')
+Response = namedtuple('Response', 'status body')
+
+
+def get(route, path):
+    return Request('GET ' + route, 'GET', path, None)
+
+
+def post(route, path, body):
+    return Request('POST ' + route, 'POST', path, body)
+
+
+def query(path, **params):
+    return f"{path}?{urllib.parse.urlencode(params)}" if params else path
+
+
+# ---------------------------------------------------------------------------
+# Scenarios: generators yielding a Request (or a list sent in parallel) and
+# receiving the Response (or list of Responses) back
+# ---------------------------------------------------------------------------
+
+def home_burst(rng, employee_id):
+    """Home page load: six calls at once, sometimes a leaderboard toggle after"""
+    yield [
+        get('/api/customers/nudge-zone/<employee_id>', f"/api/customers/nudge-zone/{employee_id}"),
+        get('/api/customers/so-close/<employee_id>', f"/api/customers/so-close/{employee_id}"),
+        get('/api/targets/daily/<employee_id>', f"/api/targets/daily/{employee_id}"),
+        get('/api/leaderboard/<employee_id>', query(f"/api/leaderboard/{employee_id}", period='day', layer='city')),
+        get('/api/incentives/daily/<employee_id>', f"/api/incentives/daily/{employee_id}"),
+        get('/api/incentives/weekly/<employee_id>', f"/api/incentives/weekly/{employee_id}"),
+    ]
+    if rng.random() < 0.4:
+        period, layer = rng.choice((('week', 'city'), ('day', 'cluster'), ('week', 'cluster')))
+        yield get('/api/leaderboard/<employee_id>',
+                  query(f"/api/leaderboard/{employee_id}", period=period, layer=layer))
+    if rng.random() < 0.3:
+        yield get('/api/notifications', '/api/notifications')
+
+
+def target_page(rng, employee_id):
+    """Target page: targets, the metric list, then switching between metrics"""
+    yield [
+        get('/api/targets/daily/<employee_id>', f"/api/targets/daily/{employee_id}"),
+        get('/api/targets/weekly/<employee_id>', f"/api/targets/weekly/{employee_id}"),
+    ]
+    period = rng.choice(('daily', 'daily', 'weekly'))
+    response = yield get('/api/target-metrics/<employee_id>',
+                         query(f"/api/target-metrics/{employee_id}", period=period))
+    metrics = body_list(response, 'metrics') or list(TARGET_METRICS)
+    for _ in range(rng.randint(1, 4)):
+        yield get('/api/target-customers/<employee_id>',
+                  query(f"/api/target-customers/{employee_id}", metric=rng.choice(metrics), period=period))
+
+
+def attention_drilldown(rng, employee_id):
+    """Attention tab: metric list, customers of a metric, SKU details of a few of them"""
+    response = yield get('/api/attention/metrics/<employee_id>', f"/api/attention/metrics/{employee_id}")
+    metrics = body_list(response, 'metrics') or list(ATTENTION_METRICS)
+    metric = 'All' if rng.random() < 0.3 else rng.choice(metrics)
+    response = yield get('/api/attention/customers/<employee_id>',
+                         query(f"/api/attention/customers/{employee_id}", metric=metric))
+    customers = body_list(response, 'customers')
+    for customer in rng.sample(customers, min(len(customers), rng.randint(1, 3))):
+        yield get('/api/attention/sku-details/<employee_id>/<customer_id>',
+                  query(f"/api/attention/sku-details/{employee_id}/{customer['customerId']}", metric=metric))
+
+
+def todays_orders(rng, employee_id):
+    """Today's orders tab: layers, customers of a layer, SKU details"""
+    response = yield get('/api/todays-orders/layers/<employee_id>', f"/api/todays-orders/layers/{employee_id}")
+    layers = body_list(response, 'layers')
+    if not layers:
+        return
+    layer = rng.choice(layers)
+    response = yield get('/api/todays-orders/customers/<employee_id>',
+                         query(f"/api/todays-orders/customers/{employee_id}", layer=layer))
+    customers = body_list(response, 'customers')
+    for customer in rng.sample(customers, min(len(customers), rng.randint(1, 2))):
+        yield get('/api/todays-orders/sku-details/<employee_id>/<customer_id>',
+                  query(f"/api/todays-orders/sku-details/{employee_id}/{customer['customerId']}", layer=layer))
+
+
+def base_customers(rng, employee_id):
+    """Base tab: the whole book, or a few keyset pages of it"""
+    route = '/api/base/customers/<employee_id>'
+    if rng.random() < 0.5:
+        yield get(route, f"/api/base/customers/{employee_id}")
+        return
+    params = {'limit': 50}
+    for _ in range(rng.randint(1, 3)):
+        response = yield get(route, query(f"/api/base/customers/{employee_id}", **params))
+        cursor = response.body.get('nextCursor') if isinstance(response.body, dict) else None
+        if not cursor:
+            break
+        params = {'limit': 50, 'after': cursor}
+
+
+def event_spam(rng, employee_id):
+    """Analytics flushes: several batches back to back plus single events"""
+    names = ('Home Page Viewed', 'Called Customer', 'Customers Page Metric Selected', 'Leaderboard Toggled')
+    for _ in range(rng.randint(2, 6)):
+        events = [{'employee_id': employee_id, 'event_name': rng.choice(names),
+                   'meta_data': {'seq': n, 'screen': rng.choice(('home', 'target', 'customers'))}}
+                  for n in range(rng.randint(10, 100))]
+        yield post('/api/events/batch', '/api/events/batch', events)
+    for _ in range(rng.randint(1, 5)):
+        yield post('/api/events/log', '/api/events/log', {'employee_id': employee_id, 'event_name': rng.choice(names)})
+
+
+SCENARIOS = {
+    'home_burst': home_burst,
+    'target_page': target_page,
+    'attention_drilldown': attention_drilldown,
+    'todays_orders': todays_orders,
+    'base_customers': base_customers,
+    'event_spam': event_spam,
+}
+
+
+def body_list(response, field):
+    if response.status == 200 and isinstance(response.body, dict):
+        return response.body.get(field) or []
+    return []
+
+
+# ---------------------------------------------------------------------------
+# Clients
+# ---------------------------------------------------------------------------
+
+class HttpClient:
+    """Keep-alive HTTP connection per thread against a running server"""
+
+    def __init__(self, base_url, admin_token=None, timeout=30):
+        parsed = urllib.parse.urlsplit(base_url)
+        self.target = base_url
+        self.connection_class = http.client.HTTPSConnection if parsed.scheme == 'https' else http.client.HTTPConnection
+        self.netloc = parsed.netloc
+        self.prefix = parsed.path.rstrip('/')
+        self.admin_token = admin_token
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def request(self, method, path, body=None, headers=None):
+        """(status, Server-Timing header, body bytes)"""
+        headers = dict(headers or {})
+        data = None
+        if body is not None:
+            data = json.dumps(body).encode()
+            headers['Content-Type'] = 'application/json'
+        for attempt in (1, 2):
+            connection = getattr(self._local, 'connection', None)
+            if connection is None:
+                connection = self._local.connection = self.connection_class(self.netloc, timeout=self.timeout)
+            try:
+                connection.request(method, self.prefix + path, data, headers)
+                response = connection.getresponse()
+                return response.status, response.getheader('Server-Timing', ''), response.read()
+            except (http.client.HTTPException, OSError):
+                # Server closed the keep-alive connection - reconnect once
+                connection.close()
+                self._local.connection = None
+                if attempt == 2:
+                    raise
+
+    def pool_stats(self):
+        headers = {'X-Admin-Token': self.admin_token} if self.admin_token else {}
+        try:
+            status, _, body = self.request('GET', '/api/admin/db/pool', headers=headers)
+        except (http.client.HTTPException, OSError):
+            return None
+        return json.loads(body).get('pool') if status == 200 else None
+
+
+class InProcessClient:
+    """The Flask app in this process, through one test client per thread"""
+
+    target = 'in-process'
+
+    def __init__(self):
+        import app as app_module
+        self.app_module = app_module
+        app_module.init_worker()
+        self._local = threading.local()
+
+    def request(self, method, path, body=None, headers=None):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app_module.app.test_client()
+        response = client.open(path, method=method, json=body, headers=headers)
+        return response.status_code, response.headers.get('Server-Timing', ''), response.get_data()
+
+    def pool_stats(self):
+        return self.app_module.connection_pool.stats()
+
+
+def parse_server_timing(header):
+    """{phase: milliseconds} from a Server-Timing header"""
+    phases = {}
+    for entry in header.split(','):
+        parts = [part.strip() for part in entry.split(';')]
+        if not parts[0]:
+            continue
+        for part in parts[1:]:
+            if part.startswith('dur='):
+                try:
+                    phases[parts[0]] = phases.get(parts[0], 0.0) + float(part[4:])
+                except ValueError:
+                    pass
+    return phases
+
+
+# ---------------------------------------------------------------------------
+# Recording and reporting
+# ---------------------------------------------------------------------------
+
+class RouteStats:
+    __slots__ = ('latencies', 'statuses', 'errors', 'bytes', 'phases')
+
+    def __init__(self):
+        self.latencies = []
+        self.statuses = Counter()
+        self.errors = 0
+        self.bytes = 0
+        self.phases = {}
+
+
+class Recorder:
+    def __init__(self):
+        self.routes = {}
+        self.scenarios = Counter()
+        self.recording = False
+        self._lock = threading.Lock()
+
+    def record(self, route, elapsed_ms, status, size, phases):
+        if not self.recording:
+            return
+        with self._lock:
+            stats = self.routes.get(route)
+            if stats is None:
+                stats = self.routes[route] = RouteStats()
+            stats.latencies.append(elapsed_ms)
+            stats.statuses[status] += 1
+            if status is None or status >= 500:
+                stats.errors += 1
+            stats.bytes += size
+            for phase, ms in phases.items():
+                stats.phases.setdefault(phase, []).append(ms)
+
+    def scenario_done(self, name):
+        if self.recording:
+            with self._lock:
+                self.scenarios[name] += 1
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not values:
+        return None
+    rank = max(1, -(-len(values) * pct // 100))
+    return values[int(rank) - 1]
+
+
+def summarize(values):
+    values = sorted(values)
+    return {
+        'p50': round(percentile(values, 50), 2),
+        'p95': round(percentile(values, 95), 2),
+        'p99': round(percentile(values, 99), 2),
+        'mean': round(sum(values) / len(values), 2),
+        'max': round(values[-1], 2)
+    }
+
+
+def pool_delta(before, after):
+    if not before or not after:
+        return None
+    delta = {key: round(after[key] - before[key], 1)
+             for key in ('acquired', 'waits', 'wait_ms_total', 'timeouts', 'fallbacks') if key in after}
+    if delta.get('acquired'):
+        delta['wait_ms_avg'] = round(delta['wait_ms_total'] / delta['acquired'], 2)
+    delta['wait_ms_max'] = after.get('wait_ms_max')
+    delta['open'] = after.get('open')
+    return delta
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+class LoadTest:
+    def __init__(self, workload, client):
+        self.workload = workload
+        self.client = client
+        self.recorder = Recorder()
+        self.stop = threading.Event()
+        fixture = workload.get('fixture', {})
+        self.employees = workload.get('employees') or SyntheticData(
+            fixture.get('executives', 50), fixture.get('customers', 40), fixture.get('skus', 30),
+            fixture.get('seed', 7)
+        ).executive_ids()
+        mix = workload['mix']
+        self.scenario_names = [name for name in mix if mix[name] > 0]
+        self.scenario_weights = [mix[name] for name in self.scenario_names]
+        unknown = set(self.scenario_names) - set(SCENARIOS)
+        if unknown:
+            raise ValueError(f"Unknown scenarios in workload: {', '.join(sorted(unknown))}")
+        self.burst_pool = ThreadPoolExecutor(max_workers=workload['concurrency'] * HOME_BURST_SIZE)
+
+    def send(self, request):
+        started = time.perf_counter()
+        try:
+            status, timing, body = self.client.request(request.method, request.path, request.body)
+        except (http.client.HTTPException, OSError) as e:
+            elapsed = (time.perf_counter() - started) * 1000
+            self.recorder.record(request.route, elapsed, None, 0, {})
+            return Response(None, {'error': str(e)})
+        elapsed = (time.perf_counter() - started) * 1000
+        self.recorder.record(request.route, elapsed, status, len(body), parse_server_timing(timing))
+        try:
+            parsed = json.loads(body) if body else None
+        except ValueError:
+            parsed = None
+        return Response(status, parsed)
+
+    def run_scenario(self, name, rng, employee_id):
+        scenario = SCENARIOS[name](rng, employee_id)
+        try:
+            step = next(scenario)
+            while not self.stop.is_set():
+                if isinstance(step, list):
+                    result = list(self.burst_pool.map(self.send, step))
+                else:
+                    result = self.send(step)
+                step = scenario.send(result)
+        except StopIteration:
+            self.recorder.scenario_done(name)
+
+    def virtual_user(self, user):
+        rng = random.Random(f"{self.workload['seed']}:user:{user}")
+        employee_id = self.employees[user % len(self.employees)] if self.workload.get('pin_users') \
+            else rng.choice(self.employees)
+        think_min, think_max = self.workload.get('think_time_ms', (0, 0))
+        runs = self.workload.get('scenarios_per_user')
+        done = 0
+        while not self.stop.is_set() and (runs is None or done < runs):
+            name = rng.choices(self.scenario_names, self.scenario_weights)[0]
+            self.run_scenario(name, rng, employee_id)
+            done += 1
+            if think_max:
+                self.stop.wait(rng.uniform(think_min, think_max) / 1000)
+            if not self.workload.get('pin_users'):
+                employee_id = rng.choice(self.employees)
+
+    def run(self):
+        workload = self.workload
+        users = [threading.Thread(target=self.virtual_user, args=(n,), daemon=True)
+                 for n in range(workload['concurrency'])]
+
+        warmup = workload.get('warmup_s', 0)
+        print(f"🚀 {workload['concurrency']} virtual users, {len(self.employees)} executives, "
+              f"mix {dict(zip(self.scenario_names, self.scenario_weights))}")
+        for thread in users:
+            thread.start()
+        if warmup:
+            print(f"   Warming up for {warmup}s...")
+            time.sleep(warmup)
+
+        pool_before = self.client.pool_stats()
+        self.recorder.recording = True
+        started = time.perf_counter()
+        deadline = started + workload.get('duration_s', 60)
+        print(f"   Measuring for up to {workload.get('duration_s', 60)}s...")
+        for thread in users:
+            thread.join(max(0, deadline - time.perf_counter()))
+        elapsed = time.perf_counter() - started
+        self.recorder.recording = False
+        self.stop.set()
+        for thread in users:
+            thread.join()
+        self.burst_pool.shutdown()
+        pool_after = self.client.pool_stats()
+        return self.results(elapsed, pool_before, pool_after)
+
+    def results(self, elapsed, pool_before, pool_after):
+        routes = {}
+        total = errors = 0
+        for route, stats in sorted(self.recorder.routes.items()):
+            count = len(stats.latencies)
+            total += count
+            errors += stats.errors
+            routes[route] = {
+                'count': count,
+                'errors': stats.errors,
+                'status': {str(status): n for status, n in sorted(stats.statuses.items(), key=str)},
+                'throughput_rps': round(count / elapsed, 2),
+                'latency_ms': summarize(stats.latencies),
+                'bytes_avg': round(stats.bytes / count),
+                'server_timing_ms': {phase: summarize(values) for phase, values in sorted(stats.phases.items())}
+            }
+        return {
+            'version': RESULTS_VERSION,
+            'generated_at': datetime.datetime.now().isoformat(),
+            'target': self.client.target,
+            'workload': self.workload,
+            'duration_s': round(elapsed, 2),
+            'requests': total,
+            'errors': errors,
+            'throughput_rps': round(total / elapsed, 2) if elapsed else 0,
+            'scenarios': dict(self.recorder.scenarios),
+            'pool': pool_delta(pool_before, pool_after),
+            'routes': routes
+        }
+
+
+def print_results(results):
+    print("\n" + "=" * 118)
+    print(f"{'ROUTE':<66}{'COUNT':>7}{'ERR':>5}{'RPS':>8}{'p50':>8}{'p95':>8}{'p99':>8}  SERVER-TIMING (mean ms)")
+    print("=" * 118)
+    for route, stats in results['routes'].items():
+        latency = stats['latency_ms']
+        phases = ' '.join(f"{phase}={values['mean']}" for phase, values in stats['server_timing_ms'].items())
+        print(f"{route:<66}{stats['count']:>7}{stats['errors']:>5}{stats['throughput_rps']:>8}"
+              f"{latency['p50']:>8}{latency['p95']:>8}{latency['p99']:>8}  {phases or '-'}")
+
+    print(f"\n{results['requests']:,} requests in {results['duration_s']}s = {results['throughput_rps']} req/s, "
+          f"{results['errors']} errors")
+    print(f"Scenarios: {results['scenarios']}")
+    pool = results['pool']
+    if pool:
+        print(f"Pool: {pool['acquired']:.0f} acquires, {pool['waits']:.0f} waited, "
+              f"{pool.get('wait_ms_avg', 0)} ms avg wait, {pool['wait_ms_max']} ms max, "
+              f"{pool['timeouts']:.0f} timeouts, {pool['fallbacks']:.0f} fallbacks")
+    else:
+        print("Pool: not available (pass --admin-token for a remote server)")
+
+
+def compare(baseline, results, max_regression):
+    """Print p95 changes per route; returns the routes that regressed beyond max_regression"""
+    print("\n" + "=" * 70)
+    print(f"P95 VS BASELINE {baseline.get('generated_at', '')}")
+    print("=" * 70)
+    regressed = []
+    for route, stats in results['routes'].items():
+        old = baseline.get('routes', {}).get(route)
+        if not old or min(old['count'], stats['count']) < MIN_SAMPLES_TO_COMPARE:
+            continue
+        before, after = old['latency_ms']['p95'], stats['latency_ms']['p95']
+        change = (after - before) / before if before else 0
+        if change > max_regression:
+            regressed.append(route)
+            print(f"   [WARN] {route}: {before} -> {after} ms (+{change:.0%})")
+        else:
+            print(f"   [OK] {route}: {before} -> {after} ms ({change:+.0%})")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workload', default=DEFAULT_WORKLOAD)
+    parser.add_argument('--url', help='base URL of a running server (default: the app in this process)')
+    parser.add_argument('--admin-token', help='X-Admin-Token for /api/admin/db/pool on a remote server')
+    parser.add_argument('--duration', type=float, help='override the workload duration_s')
+    parser.add_argument('--concurrency', type=int, help='override the workload concurrency')
+    parser.add_argument('--json', metavar='PATH', help='write the machine-readable results here')
+    parser.add_argument('--baseline', metavar='PATH', help='earlier --json results to compare p95 against')
+    parser.add_argument('--max-regression', type=float, default=0.2, help='allowed p95 increase (0.2 = 20%%)')
+    parser.add_argument('--allow-event-writes', action='store_true',
+                        help='run event_spam against a --url that is not on this machine')
+    args = parser.parse_args()
+
+    with open(args.workload, encoding='utf-8') as f:
+        workload = json.load(f)
+    if args.duration is not None:
+        workload['duration_s'] = args.duration
+    if args.concurrency is not None:
+        workload['concurrency'] = args.concurrency
+
+    if args.url:
+        host = urllib.parse.urlsplit(args.url).hostname
+        writes = [name for name in WRITE_SCENARIOS if workload['mix'].get(name, 0) > 0]
+        if writes and host not in LOCAL_HOSTS and not args.allow_event_writes:
+            print(f"[ERROR] {', '.join(writes)} writes events to {host}; set its weight to 0 in the workload "
+                  "or pass --allow-event-writes")
+            sys.exit(2)
+        client = HttpClient(args.url, args.admin_token)
+    else:
+        error = production_database_error()
+        if error:
+            print(f"[ERROR] {error}")
+            sys.exit(2)
+        client = InProcessClient()
+    try:
+        results = LoadTest(workload, client).run()
+    except ValueError as e:
+        print(f"[ERROR] {e}")
+        sys.exit(2)
+    print_results(results)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n[OK] Results written to {args.json}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressed = compare(json.load(f), results, args.max_regression)
+        if regressed:
+            print(f"\n[ERROR] p95 regressed more than {args.max_regression:.0%} on {len(regressed)} route(s)")
+            sys.exit(1)
+        print("\n[OK] No p95 regressions")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""Benchmark: SQL CASE ladder vs Python slab calculator
+
+    python bench_incentives.py                      # in-memory calculator on synthetic rows
+    python bench_incentives.py --employees 5000     # bigger synthetic batch
+    python bench_incentives.py --live               # also time both paths against the database
+"""
+import argparse
+import random
+import time
+
+from incentive_calc import (
+    DAILY_PAY_DAYS,
+    WEEKLY_PAY_DAYS,
+    DAILY_SLAB_ROWS_QUERY,
+    WEEKLY_SLAB_ROWS_QUERY,
+    REFERENCE_DAILY_INCENTIVES_QUERY,
+    REFERENCE_WEEKLY_INCENTIVES_QUERY,
+    build_batch,
+    employee_incentives,
+    evaluate_slabs,
+)
+
+
+def synthetic_rows(employees, metrics, seed=7):
+    """Flat slab rows shaped like the DayTargets/DayAchievement join"""
+    rng = random.Random(seed)
+    rows = []
+    for e in range(employees):
+        employee_id = f"EMP{e:05d}"
+        variable_pay = rng.choice([None] + [rng.randint(20000, 60000)] * 20)
+        for m in range(metrics):
+            base = rng.randint(10, 500)
+            achievement = rng.choice([None, rng.uniform(0, base * 4)] + [rng.uniform(0, base * 4)] * 8)
+            for n, segment in enumerate(('slab1', 'slab2', 'slab3'), start=1):
+                rows.append((employee_id, f"metric_{m}", segment, base * n, 0.05 * n, achievement, variable_pay))
+    return rows
+
+
+def time_it(fn, repeat):
+    """Best-of-N wall time in milliseconds"""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000, result
+
+
+def bench_synthetic(employees, metrics, repeat):
+    rows = synthetic_rows(employees, metrics)
+    print(f"\nSynthetic: {employees} employees x {metrics} metrics x 3 slabs = {len(rows)} rows")
+
+    build_ms, batch = time_it(lambda: build_batch(rows, DAILY_PAY_DAYS), repeat)
+    eval_ms, earned = time_it(lambda: evaluate_slabs(batch), repeat)
+    summary_ms, _ = time_it(lambda: employee_incentives(batch, earned), repeat)
+    total = build_ms + eval_ms + summary_ms
+
+    print(f"  build_batch        {build_ms:8.1f} ms")
+    print(f"  evaluate_slabs     {eval_ms:8.1f} ms  ({len(batch)} employee x metric groups)")
+    print(f"  employee_incentives{summary_ms:8.1f} ms")
+    print(f"  total              {total:8.1f} ms  ({len(rows) / total * 1000:,.0f} rows/s)")
+
+
+def bench_live(repeat):
+    from app import get_db_connection
+
+    connection = get_db_connection()
+    if not connection:
+        print("[ERROR] Database connection failed")
+        return
+
+    try:
+        for name, reference_query, flat_query, pay_days in [
+            ('daily', REFERENCE_DAILY_INCENTIVES_QUERY, DAILY_SLAB_ROWS_QUERY, DAILY_PAY_DAYS),
+            ('weekly', REFERENCE_WEEKLY_INCENTIVES_QUERY, WEEKLY_SLAB_ROWS_QUERY, WEEKLY_PAY_DAYS),
+        ]:
+            def sql_path():
+                cursor = connection.cursor()
+                cursor.execute(reference_query)
+                rows = cursor.fetchall()
+                cursor.close()
+                return rows
+
+            def python_path():
+                cursor = connection.cursor()
+                cursor.execute(flat_query)
+                rows = cursor.fetchall()
+                cursor.close()
+                return employee_incentives(build_batch(rows, pay_days))
+
+            sql_ms, sql_rows = time_it(sql_path, repeat)
+            py_ms, incentives = time_it(python_path, repeat)
+            print(f"\nLive {name} (all employees, best of {repeat}):")
+            print(f"  SQL CASE ladder       {sql_ms:8.1f} ms  ({len(sql_rows)} employees)")
+            print(f"  flat fetch + Python   {py_ms:8.1f} ms  ({len(incentives)} employees)")
+    finally:
+        connection.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--employees', type=int, default=1000)
+    parser.add_argument('--metrics', type=int, default=6)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--live', action='store_true', help='also benchmark against the database')
+    args = parser.parse_args()
+
+    bench_synthetic(args.employees, args.metrics, args.repeat)
+    if args.live:
+        bench_live(args.repeat)
@@ -0,0 +1,98 @@
+"""Benchmark: customer/SKU grouping - any() scan vs set-based aggregator
+
+    python bench_sku_grouping.py                  # 50k synthetic rows, scaling by rows and by SKUs per customer
+    python bench_sku_grouping.py --rows 200000    # bigger input
+"""
+import argparse
+import random
+import time
+
+from app import format_target_customer, format_target_sku, group_target_customers, iter_target_customers
+from db_access import ColumnMap
+
+TARGET_COLUMNS = ColumnMap('customer_id', 'customername', 'contactnumber', 'metric', 'skuid', 'Sku')
+
+
+def synthetic_rows(rows, skus_per_customer, seed=7):
+    """SA_CustomerPageCustomers-shaped rows ordered by customer_id.
+
+    Each customer has ``skus_per_customer`` rows; about a third repeat an
+    earlier SKU under another metric, the way the real table does.
+    """
+    rng = random.Random(seed)
+    make = TARGET_COLUMNS.row_type._make
+    result = []
+    customer_id = 0
+    while len(result) < rows:
+        customer_id += 1
+        distinct = max(1, skus_per_customer * 2 // 3)
+        sku_ids = rng.sample(range(1, 100000), distinct)
+        for n in range(min(skus_per_customer, rows - len(result))):
+            sku_id = sku_ids[n] if n < distinct else rng.choice(sku_ids)
+            result.append(make((customer_id, f"Customer {customer_id}", 9000000000 + customer_id,
+                                f"metric_{n % 4}", sku_id, f"SKU {sku_id}")))
+    return result
+
+
+def reference_group(raw_customers):
+    """Previous implementation: any() over the customer's SKU list for every row"""
+    customer_dict = {}
+    for customer in raw_customers:
+        customer_id = customer.get('customer_id')
+        if customer_id not in customer_dict:
+            customer_dict[customer_id] = format_target_customer(customer)
+        if customer.get('skuid') and customer.get('Sku'):
+            sku_exists = any(
+                sku.get('id') == customer.get('skuid')
+                for sku in customer_dict[customer_id]['skusToPitch']
+            )
+            if not sku_exists:
+                customer_dict[customer_id]['skusToPitch'].append(format_target_sku(customer))
+    return list(customer_dict.values())
+
+
+def time_it(fn, repeat):
+    """Best-of-N wall time in milliseconds"""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000, result
+
+
+def bench_case(label, rows, repeat, with_reference=True):
+    agg_ms, grouped = time_it(lambda: group_target_customers(rows), repeat)
+    stream_ms, streamed = time_it(lambda: list(iter_target_customers(rows)), repeat)
+    line = (f"  {label:<28}{agg_ms:8.1f} ms {agg_ms * 1000 / len(rows):6.2f} us/row"
+            f"   streamed {stream_ms:8.1f} ms")
+    if with_reference:
+        ref_ms, reference = time_it(lambda: reference_group(rows), repeat)
+        if reference != grouped or streamed != grouped:
+            print(f"[ERROR] {label}: grouped output differs from the reference")
+        line += f"   any() scan {ref_ms:9.1f} ms ({ref_ms / agg_ms:5.1f}x)"
+    print(line)
+    return agg_ms / len(rows)
+
+
+def bench(rows, repeat):
+    print(f"\nBy input size (8 SKU rows per customer):")
+    per_row = [bench_case(f"{n:,} rows", synthetic_rows(n, 8), repeat) for n in (rows // 8, rows // 4, rows // 2, rows)]
+
+    print(f"\nBy SKUs per customer ({rows:,} rows):")
+    per_row += [bench_case(f"{k} SKU rows/customer", synthetic_rows(rows, k), repeat) for k in (4, 32, 256, 1024)]
+
+    # Linear: time per row stays flat as the input and the SKU lists grow
+    spread = max(per_row) / min(per_row)
+    status = 'OK' if spread < 3 else 'WARN'
+    print(f"\n[{status}] Aggregator time per row varies {spread:.1f}x across all cases")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    bench(args.rows, args.repeat)
@@ -0,0 +1,106 @@
+"""
+Cross-worker cache invalidation
+Every gunicorn worker holds its own response, leaderboard and incentive
+caches, and an admin POST reaches only one of them. The worker that
+handles it applies the invalidation locally and appends it to a small
+shared file; every worker checks that file's size at most every
+CACHE_SYNC_INTERVAL seconds before serving a request and replays the
+invalidations other workers wrote, so all of them stop serving stale data
+within that interval.
+"""
+
+import json
+import os
+import threading
+import time
+
+CACHE_SYNC_INTERVAL = 0.5     # seconds between checks of the shared file
+CACHE_SYNC_FILE = 'invalidations.log'
+
+
+class CacheInvalidations:
+    """Append-only log of invalidations shared by the workers on one host.
+
+    ``handler(name)`` registers the function that applies an invalidation
+    named ``name`` in this process. ``broadcast(name, **args)`` records one
+    for the other workers (the caller applies it locally), and ``poll()``
+    replays what the others recorded. Entries written by this process are
+    skipped.
+    """
+
+    def __init__(self, directory, interval=CACHE_SYNC_INTERVAL):
+        self.path = os.path.join(directory, CACHE_SYNC_FILE) if directory else None
+        self.interval = interval
+        self.applied = 0
+        self._handlers = {}
+        self._offset = 0
+        self._pid = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        if self.path:
+            os.makedirs(directory, exist_ok=True)
+
+    def handler(self, name):
+        def register(apply):
+            self._handlers[name] = apply
+            return apply
+        return register
+
+    def broadcast(self, name, **args):
+        if self.path is None:
+            return
+        # Catch up first so this process's offset is current before its own entry lands
+        self.poll(force=True)
+        line = json.dumps({'pid': os.getpid(), 'cache': name, 'args': args}) + '\n'
+        # One O_APPEND write of a short line is not interleaved with other writers
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line.encode('utf-8'))
+        finally:
+            os.close(fd)
+
+    def poll(self, force=False):
+        """Apply invalidations other workers recorded since the last check"""
+        if self.path is None:
+            return 0
+        now = time.monotonic()
+        if not force and self._pid == os.getpid() and now - self._checked_at < self.interval:
+            return 0
+        with self._lock:
+            self._checked_at = now
+            try:
+                size = os.stat(self.path).st_size
+            except FileNotFoundError:
+                size = 0
+            if self._pid != os.getpid():
+                # First check in this process (e.g. after fork): its caches are
+                # empty, so only invalidations from here on matter
+                self._pid = os.getpid()
+                self._offset = size
+                return 0
+            if size < self._offset:
+                # The file was truncated or replaced; replaying too much is safe
+                self._offset = 0
+            if size == self._offset:
+                return 0
+
+            with open(self.path, 'rb') as f:
+                f.seek(self._offset)
+                data = f.read(size - self._offset)
+            # Leave a partly written last line for the next check
+            complete = data.rfind(b'\n') + 1
+            self._offset += complete
+
+            applied = 0
+            for line in data[:complete].splitlines():
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                apply = self._handlers.get(entry.get('cache'))
+                if entry.get('pid') == self._pid or apply is None:
+                    continue
+                apply(**entry.get('args', {}))
+                applied += 1
+            self.applied += applied
+            return applied
@@ -0,0 +1,419 @@
+"""Query plan report: EXPLAIN every API query template and suggest indexes
+
+Runs EXPLAIN for each query the endpoints issue (built from the same
+templates app.py uses) with representative parameters for one executive,
+flags full table scans, full index scans, filesorts and temporary tables,
+and prints ALTER TABLE ... ADD INDEX statements for recommended composite
+indexes that don't exist yet.
+
+    python check_query_plans.py                              # text report
+    python check_query_plans.py --json plans.json            # also write the machine-readable report
+    python check_query_plans.py --analyze                    # add EXPLAIN ANALYZE (executes the queries, MySQL 8.0.18+)
+    python check_query_plans.py --compare plans.json         # show what changed since an earlier report
+    python check_query_plans.py --employee SNC1063           # executive used for the parameters
+"""
+import argparse
+import datetime
+import io
+import json
+import sys
+from collections import namedtuple
+
+import mysql.connector
+
+# Fix encoding
+if sys.stdout.encoding != 'utf-8':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+from app import (
+    ATTENTION_METRICS_QUERY,
+    DB_CONFIG,
+    LEADERBOARD_QUERY,
+    LOGIN_USER_QUERY,
+    NOTIFICATIONS_QUERY,
+    REGISTERED_USER_QUERY,
+    SIGNUP_EXECUTIVE_QUERY,
+    TARGET_METRICS_QUERY,
+    TODAYS_ORDERS_CUSTOMERS_QUERY,
+    TODAYS_ORDERS_LAYERS_QUERY,
+    attention_customers_query,
+    attention_sku_query,
+    base_customers_count_query,
+    base_customers_query,
+    nudge_zone_query,
+    so_close_query,
+    target_customers_count_query,
+    target_customers_query,
+    todays_orders_sku_query,
+)
+from incentive_calc import (
+    DAILY_EMPLOYEE_SLAB_ROWS_QUERY,
+    DAILY_SLAB_ROWS_QUERY,
+    WEEKLY_EMPLOYEE_SLAB_ROWS_QUERY,
+    WEEKLY_SLAB_ROWS_QUERY,
+)
+
+REPORT_VERSION = 1
+
+# Tables the app only appends to; every secondary index is paid for on each insert
+WRITE_ONLY_TABLES = {'SA_AppEvents': 'written in bulk by the event ingestor and never read by the API'}
+
+# A plan row needs attention when MySQL reads the whole table or index, or sorts / materializes
+FULL_SCAN_TYPES = {'ALL': 'full_scan', 'index': 'full_index_scan'}
+EXTRA_FLAGS = {'Using filesort': 'filesort', 'Using temporary': 'temporary'}
+
+Index = namedtuple('Index', 'table columns alias')
+QueryCase = namedtuple('QueryCase', 'name endpoint query params indexes')
+
+
+def ix(table, *columns, alias=None):
+    """Recommended index; ``alias`` is how the table appears in the query's EXPLAIN"""
+    return Index(table, columns, alias or table)
+
+
+def representative_params(cursor, employee_id):
+    """Parameter values that exist in the data for this executive (with fallbacks)"""
+    def first(query, params, default):
+        try:
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+        except mysql.connector.Error:
+            return default
+        return rows[0][0] if rows and rows[0][0] is not None else default
+
+    return {
+        'employee_id': employee_id,
+        'target_metric': first(TARGET_METRICS_QUERY, (employee_id, 'day'), 'GMV'),
+        'attention_metric': first(ATTENTION_METRICS_QUERY, (employee_id,), 'All'),
+        'todays_layer': first(TODAYS_ORDERS_LAYERS_QUERY, (employee_id,), 'day'),
+        'customer_id': first("SELECT customer_id FROM SA_CustomerPageBase WHERE employee_id = %s LIMIT 1",
+                             (employee_id,), 0),
+        'customer_name': first("SELECT customername FROM SA_CustomerPageBase WHERE employee_id = %s "
+                               "ORDER BY customername LIMIT 1", (employee_id,), 'A'),
+    }
+
+
+def query_cases(p):
+    """Every read query the API issues, with the composite indexes that serve it"""
+    e = p['employee_id']
+    customer_page = ix('SA_CustomerPageCustomers', 'employee_id', 'layer', 'customer_id')
+    base_page = ix('SA_CustomerPageBase', 'employee_id', 'customername', 'customer_id')
+    return [
+        QueryCase('targets_daily', '/api/targets/daily/<employee_id>', DAILY_EMPLOYEE_SLAB_ROWS_QUERY, (e,), [
+            ix('DayTargets', 'employee_id', 'date', 'metric', alias='dt'),
+            ix('DayAchievement', 'employee_id', 'date', 'metric', alias='da'),
+            ix('Executive', 'employee_id', alias='e')]),
+        QueryCase('targets_weekly', '/api/targets/weekly/<employee_id>', WEEKLY_EMPLOYEE_SLAB_ROWS_QUERY, (e,), [
+            ix('WeekTargets', 'employee_id', 'yearweek', 'metric', alias='wt'),
+            ix('WeekAchievement', 'employee_id', 'yearweek', 'metric', alias='wa'),
+            ix('Executive', 'employee_id', alias='e')]),
+        QueryCase('incentive_snapshot_daily', '/api/incentives/daily/<employee_id>', DAILY_SLAB_ROWS_QUERY, (), [
+            ix('DayTargets', 'date', 'employee_id', 'metric', alias='dt'),
+            ix('DayAchievement', 'employee_id', 'date', 'metric', alias='da'),
+            ix('Executive', 'employee_id', alias='e')]),
+        QueryCase('incentive_snapshot_weekly', '/api/incentives/weekly/<employee_id>', WEEKLY_SLAB_ROWS_QUERY, (), [
+            ix('WeekTargets', 'yearweek', 'employee_id', 'metric', alias='wt'),
+            ix('WeekAchievement', 'employee_id', 'yearweek', 'metric', alias='wa'),
+            ix('Executive', 'employee_id', alias='e')]),
+        QueryCase('leaderboard', '/api/leaderboard/<employee_id>', LEADERBOARD_QUERY, ('day', 'city'), [
+            ix('LeaderBoard', 'day_segment', 'layer', 'layer_value', 'Ranking', alias='lb'),
+            ix('Executive', 'employee_id', alias='e')]),
+        QueryCase('nudge_zone', '/api/customers/nudge-zone/<employee_id>', nudge_zone_query(), (e,), [
+            ix('SA_HomePageTargetCustomers', 'employee_id', 'LastOrder')]),
+        QueryCase('so_close', '/api/customers/so-close/<employee_id>', so_close_query(), (e,), [
+            ix('SA_HomePageAppFunnelCustomers', 'employee_id', 'LastOpened')]),
+        QueryCase('target_metrics', '/api/target-metrics/<employee_id>', TARGET_METRICS_QUERY, (e, 'day'), [
+            ix('SA_CustomerPageCustomers', 'employee_id', 'layer', 'metric')]),
+        QueryCase('target_customers', '/api/target-customers/<employee_id>',
+                  *target_customers_query(e, 'day'), [customer_page]),
+        QueryCase('target_customers_metric', '/api/target-customers/<employee_id>?metric=',
+                  *target_customers_query(e, 'day', p['target_metric']), [
+                      ix('SA_CustomerPageCustomers', 'employee_id', 'layer', 'metric', 'customer_id')]),
+        QueryCase('target_customers_page', '/api/target-customers/<employee_id>?limit=',
+                  *target_customers_query(e, 'day', '', p['customer_id'], 51), [
+                      customer_page, customer_page._replace(alias='c')]),
+        QueryCase('target_customers_count', '/api/target-customers/<employee_id>?limit=',
+                  *target_customers_count_query(e, 'day'), [customer_page]),
+        QueryCase('attention_metrics', '/api/attention/metrics/<employee_id>', ATTENTION_METRICS_QUERY, (e,), [
+            ix('SA_CustomerPageAttention', 'employee_id', 'metric')]),
+        QueryCase('attention_customers_all', '/api/attention/customers/<employee_id>?metric=All',
+                  *attention_customers_query(e, 'All'), [
+                      ix('SA_CustomerPageAttention', 'employee_id', 'customer_id')]),
+        QueryCase('attention_customers_metric', '/api/attention/customers/<employee_id>?metric=',
+                  *attention_customers_query(e, p['attention_metric']), [
+                      ix('SA_CustomerPageAttention', 'employee_id', 'metric', 'customer_id')]),
+        QueryCase('attention_sku_details', '/api/attention/sku-details/<employee_id>/<customer_id>',
+                  *attention_sku_query(e, p['customer_id'], p['attention_metric']), [
+                      ix('SA_CustomerPageAttention', 'employee_id', 'customer_id', 'metric', 'date')]),
+        QueryCase('todays_orders_layers', '/api/todays-orders/layers/<employee_id>',
+                  TODAYS_ORDERS_LAYERS_QUERY, (e,), [
+            ix('SA_CustomerPageTodayOrders', 'employee_id', 'layer')]),
+        QueryCase('todays_orders_customers', '/api/todays-orders/customers/<employee_id>',
+                  TODAYS_ORDERS_CUSTOMERS_QUERY, (e, p['todays_layer']), [
+                      ix('SA_CustomerPageTodayOrders', 'employee_id', 'layer', 'customer_id')]),
+        QueryCase('todays_orders_sku_details', '/api/todays-orders/sku-details/<employee_id>/<customer_id>',
+                  todays_orders_sku_query(), (e, p['customer_id'], p['todays_layer']), [
+                      ix('SA_CustomerPageTodayOrders', 'employee_id', 'customer_id', 'layer')]),
+        QueryCase('base_customers', '/api/base/customers/<employee_id>', *base_customers_query(e), [base_page]),
+        QueryCase('base_customers_page', '/api/base/customers/<employee_id>?limit=',
+                  *base_customers_query(e, after=(p['customer_name'], p['customer_id']), limit=51), [base_page]),
+        QueryCase('base_customers_count', '/api/base/customers/<employee_id>?limit=', *base_customers_count_query(e),
+                  [base_page]),
+        QueryCase('notifications', '/api/notifications', NOTIFICATIONS_QUERY, (), [
+            ix('SA_AppNotification', 'priority', 'date')]),
+        QueryCase('signup_executive', '/api/auth/signup', SIGNUP_EXECUTIVE_QUERY,
+                  (e, 'BUSINESS_DEVELOPMENT_EXECUTIVE'), [ix('Executive', 'employee_id')]),
+        QueryCase('signup_registered', '/api/auth/signup', REGISTERED_USER_QUERY, (e,), [
+            ix('SalesExecutiveApp_Login', 'employee_id')]),
+        QueryCase('login', '/api/auth/login', LOGIN_USER_QUERY, (e,), [ix('SalesExecutiveApp_Login', 'employee_id')]),
+    ]
+
+
+def existing_indexes(cursor, tables):
+    """{table: {index name: [columns in order]}} from information_schema"""
+    cursor.execute(
+        f"""SELECT TABLE_NAME, INDEX_NAME, COLUMN_NAME
+            FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN ({', '.join(['%s'] * len(tables))})
+            ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX""",
+        tuple(tables)
+    )
+    indexes = {table: {} for table in tables}
+    for table, index_name, column in cursor.fetchall():
+        indexes.setdefault(table, {}).setdefault(index_name, []).append(column)
+    return indexes
+
+
+def covered(columns, table_indexes):
+    """Name of an existing index whose leading columns are ``columns``, else None"""
+    wanted = [column.lower() for column in columns]
+    for name, index_columns in table_indexes.items():
+        if [column.lower() for column in index_columns[:len(wanted)]] == wanted:
+            return name
+    return None
+
+
+def plan_flags(plan):
+    """Problems in EXPLAIN rows: full scans, full index scans, filesorts, temporary tables"""
+    flags = []
+    for row in plan:
+        table = row.get('table') or ''
+        if table.startswith('<'):
+            # Derived tables and unions are materialized by design; their inputs get their own rows
+            continue
+        issues = []
+        if row.get('type') in FULL_SCAN_TYPES:
+            issues.append(FULL_SCAN_TYPES[row['type']])
+        extra = row.get('Extra') or ''
+        issues += [flag for text, flag in EXTRA_FLAGS.items() if text in extra]
+        if issues:
+            flags.append({'table': table, 'issues': issues, 'rows': row.get('rows'), 'key': row.get('key')})
+    return flags
+
+
+def explain(cursor, case, analyze):
+    result = {
+        'name': case.name,
+        'endpoint': case.endpoint,
+        'sql': ' '.join(case.query.split()),
+        'params': [str(param) for param in case.params],
+        'plan': [],
+        'flags': [],
+        'analyze': None,
+        'error': None
+    }
+    try:
+        cursor.execute('EXPLAIN ' + case.query, case.params)
+        columns = [desc[0] for desc in cursor.description]
+        result['plan'] = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        result['flags'] = plan_flags(result['plan'])
+        if analyze:
+            cursor.execute('EXPLAIN ANALYZE ' + case.query, case.params)
+            result['analyze'] = '\n'.join(str(row[0]) for row in cursor.fetchall())
+    except mysql.connector.Error as e:
+        result['error'] = str(e)
+    return result
+
+
+def index_name(columns):
+    return f"idx_{'_'.join(columns)}".lower()[:64]
+
+
+def recommend(cases, results, indexes):
+    """Recommended indexes with their status and the flagged queries that need them"""
+    flagged = {result['name']: {flag['table'] for flag in result['flags']} for result in results}
+    recommendations = {}
+    for case in cases:
+        for index in case.indexes:
+            key = (index.table, index.columns)
+            entry = recommendations.setdefault(key, {
+                'table': index.table,
+                'columns': list(index.columns),
+                'existing': covered(index.columns, indexes.get(index.table, {})),
+                'used_by': [],
+                'needed_by': []
+            })
+            if case.name not in entry['used_by']:
+                entry['used_by'].append(case.name)
+            if index.alias in flagged.get(case.name, ()) and case.name not in entry['needed_by']:
+                entry['needed_by'].append(case.name)
+
+    entries = list(recommendations.values())
+    for entry in entries:
+        # A longer recommendation on the same table with these leading columns serves both
+        width = len(entry['columns'])
+        longer = [
+            other for other in entries
+            if other['table'] == entry['table'] and len(other['columns']) > width
+            and [c.lower() for c in other['columns'][:width]] == [c.lower() for c in entry['columns']]
+        ]
+        entry['superseded_by'] = None
+        if longer and not entry['existing']:
+            widest = max(longer, key=lambda other: len(other['columns']))
+            entry['superseded_by'] = widest['columns']
+            widest['needed_by'] += [name for name in entry['needed_by'] if name not in widest['needed_by']]
+
+    for entry in entries:
+        if entry['existing']:
+            entry['status'] = 'present'
+            entry['ddl'] = None
+        elif entry['superseded_by']:
+            entry['status'] = 'covered_by_recommendation'
+            entry['ddl'] = None
+        else:
+            entry['status'] = 'missing'
+            columns = ', '.join(f'`{column}`' for column in entry['columns'])
+            entry['ddl'] = f"ALTER TABLE `{entry['table']}` ADD INDEX `{index_name(entry['columns'])}` ({columns});"
+    return entries
+
+
+def compare(previous, report):
+    """Print plan changes against an earlier report"""
+    before = {result['name']: result for result in previous.get('queries', [])}
+    print("\n" + "=" * 70)
+    print(f"CHANGES SINCE {previous.get('generated_at', 'previous report')}")
+    print("=" * 70)
+    changes = 0
+    for result in report['queries']:
+        old = before.get(result['name'])
+        if old is None:
+            print(f"   [NEW] {result['name']}")
+            changes += 1
+            continue
+        old_flags = {(flag['table'], issue) for flag in old['flags'] for issue in flag['issues']}
+        new_flags = {(flag['table'], issue) for flag in result['flags'] for issue in flag['issues']}
+        old_keys = {row.get('table'): row.get('key') for row in old['plan']}
+        new_keys = {row.get('table'): row.get('key') for row in result['plan']}
+        for table, issue in sorted(new_flags - old_flags):
+            print(f"   [WARN] {result['name']}: {table} now {issue}")
+        for table, issue in sorted(old_flags - new_flags):
+            print(f"   [OK] {result['name']}: {table} no longer {issue}")
+        for table in sorted(set(new_keys) & set(old_keys), key=str):
+            if new_keys[table] != old_keys[table]:
+                print(f"   [CHECK] {result['name']}: {table} key {old_keys[table]} -> {new_keys[table]}")
+        changes += len(new_flags ^ old_flags) + sum(
+            1 for table in set(new_keys) & set(old_keys) if new_keys[table] != old_keys[table])
+    print(f"\n{changes} plan change(s)")
+
+
+def print_report(report):
+    print("\n" + "=" * 70)
+    print("QUERY PLANS")
+    print("=" * 70)
+    for result in report['queries']:
+        if result['error']:
+            print(f"[ERROR] {result['name']}: {result['error']}")
+            continue
+        if not result['flags']:
+            print(f"[OK] {result['name']}")
+            continue
+        print(f"[WARN] {result['name']}")
+        for flag in result['flags']:
+            print(f"   - {flag['table']}: {', '.join(flag['issues'])} (rows ~{flag['rows']}, key {flag['key']})")
+        if result['analyze']:
+            print('\n'.join('      ' + line for line in result['analyze'].splitlines()))
+
+    print("\n" + "=" * 70)
+    print("RECOMMENDED INDEXES")
+    print("=" * 70)
+    for entry in report['indexes']['recommended']:
+        columns = ', '.join(entry['columns'])
+        if entry['status'] == 'present':
+            print(f"[OK] {entry['table']} ({columns}) - index {entry['existing']}")
+        elif entry['status'] == 'missing':
+            need = f"needed by {', '.join(entry['needed_by'])}" if entry['needed_by'] else 'no plan issue yet'
+            print(f"[WARN] {entry['table']} ({columns}) - missing, {need}")
+
+    ddl = [entry['ddl'] for entry in report['indexes']['recommended'] if entry['ddl'] and entry['needed_by']]
+    print("\n-- DDL for missing indexes used by flagged queries")
+    for statement in ddl or ['-- none']:
+        print(statement)
+
+    for table, note in report['write_only_tables'].items():
+        print(f"\n[CHECK] {table}: {note}; keep secondary indexes off it")
+
+    summary = report['summary']
+    print(f"\n{summary['queries']} queries, {summary['flagged']} flagged "
+          f"({summary['full_scans']} full scans, {summary['filesorts']} filesorts), "
+          f"{summary['ddl']} index(es) to add")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--employee', default='SNC1063', help='executive used for the query parameters')
+    parser.add_argument('--analyze', action='store_true', help='also run EXPLAIN ANALYZE (executes each query)')
+    parser.add_argument('--json', metavar='PATH', help='write the machine-readable report here ("-" for stdout)')
+    parser.add_argument('--compare', metavar='PATH', help='earlier --json report to diff the plans against')
+    args = parser.parse_args()
+
+    connection = mysql.connector.connect(**DB_CONFIG)
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SELECT VERSION()")
+        version = cursor.fetchone()[0]
+
+        params = representative_params(cursor, args.employee)
+        cases = query_cases(params)
+        tables = sorted({index.table for case in cases for index in case.indexes} | set(WRITE_ONLY_TABLES))
+        indexes = existing_indexes(cursor, tables)
+        results = [explain(cursor, case, args.analyze) for case in cases]
+        cursor.close()
+    finally:
+        connection.close()
+
+    recommended = recommend(cases, results, indexes)
+    all_flags = [issue for result in results for flag in result['flags'] for issue in flag['issues']]
+    report = {
+        'version': REPORT_VERSION,
+        'generated_at': datetime.datetime.now().isoformat(),
+        'database': DB_CONFIG['database'],
+        'server_version': version,
+        'parameters': {name: str(value) for name, value in params.items()},
+        'queries': results,
+        'indexes': {'existing': indexes, 'recommended': recommended},
+        'write_only_tables': WRITE_ONLY_TABLES,
+        'summary': {
+            'queries': len(results),
+            'errors': sum(1 for result in results if result['error']),
+            'flagged': sum(1 for result in results if result['flags']),
+            'full_scans': all_flags.count('full_scan') + all_flags.count('full_index_scan'),
+            'filesorts': all_flags.count('filesort'),
+            'ddl': sum(1 for entry in recommended if entry['ddl'] and entry['needed_by'])
+        }
+    }
+
+    if args.json == '-':
+        json.dump(report, sys.stdout, indent=2, default=str)
+        return
+    print_report(report)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            compare(json.load(f), report)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f"\n[OK] Report written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
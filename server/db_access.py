@@ -0,0 +1,254 @@
+"""
+Data access helpers
+Thin layer over mysql.connector for the hot read paths:
+
+- prepared statements cached per connection, so repeated queries skip
+  sending and parsing the full SQL text
+- tuple-backed rows with an explicit column map instead of one dict per row
+- an unbuffered streaming cursor for large result sets
+"""
+
+import os
+import threading
+import weakref
+from collections import OrderedDict, namedtuple
+
+from mysql.connector import Error
+
+from request_timing import timed_cursor
+
+# Set DB_PREPARED_STATEMENTS=0 to fall back to plain text queries
+PREPARED_STATEMENTS = os.environ.get('DB_PREPARED_STATEMENTS', '1') == '1'
+MAX_STATEMENTS_PER_CONNECTION = 32
+STREAM_BATCH_SIZE = 1000
+
+_row_types = {}
+_row_types_lock = threading.Lock()
+
+
+def _row_type(names):
+    """Tuple subclass with attribute access plus row['name'] / row.get('name')
+    so existing dict-style formatters work unchanged"""
+    with _row_types_lock:
+        row_type = _row_types.get(names)
+        if row_type is not None:
+            return row_type
+
+        base = namedtuple('Row', names, rename=True)
+        index = {name: i for i, name in enumerate(names)}
+
+        def get(self, name, default=None):
+            i = index.get(name)
+            return default if i is None else tuple.__getitem__(self, i)
+
+        def getitem(self, key):
+            if isinstance(key, str):
+                return tuple.__getitem__(self, index[key])
+            return tuple.__getitem__(self, key)
+
+        row_type = type('Row', (base,), {'__slots__': (), 'get': get, '__getitem__': getitem})
+        _row_types[names] = row_type
+        return row_type
+
+
+class ColumnMap:
+    """Column names of a result set, in select order, and the row type built from them"""
+
+    def __init__(self, *names):
+        self.names = tuple(names)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.row_type = _row_type(self.names)
+
+    @classmethod
+    def from_description(cls, description):
+        return cls(*(column[0] for column in description))
+
+    def rows(self, tuples):
+        make = self.row_type._make
+        return [make(row) for row in tuples]
+
+
+class StatementCache:
+    """query text -> prepared cursor for one connection (LRU bounded).
+
+    Re-executing the same text on a prepared cursor reuses the server-side
+    statement, so only the parameters travel over the wire.
+    """
+
+    def __init__(self, max_statements=MAX_STATEMENTS_PER_CONNECTION):
+        self.max_statements = max_statements
+        self._cursors = OrderedDict()
+        self.prepared = 0
+        self.reused = 0
+
+    def cursor_for(self, connection, query):
+        cursor = self._cursors.get(query)
+        if cursor is not None:
+            self._cursors.move_to_end(query)
+            self.reused += 1
+            return cursor
+
+        cursor = connection.cursor(prepared=True)
+        self._cursors[query] = cursor
+        self.prepared += 1
+        while len(self._cursors) > self.max_statements:
+            _, evicted = self._cursors.popitem(last=False)
+            evicted.close()
+        return cursor
+
+    def discard(self, query):
+        cursor = self._cursors.pop(query, None)
+        if cursor is not None:
+            try:
+                cursor.close()
+            except Error:
+                pass
+
+
+# Keyed by the underlying connection, so entries go away with the connection
+_statement_caches = weakref.WeakKeyDictionary()
+_statement_caches_lock = threading.Lock()
+
+
+def statement_cache(connection):
+    """StatementCache of a (pooled) connection"""
+    raw = getattr(connection, 'raw_connection', connection)
+    cache = _statement_caches.get(raw)
+    if cache is None:
+        with _statement_caches_lock:
+            cache = _statement_caches.get(raw)
+            if cache is None:
+                cache = _statement_caches[raw] = StatementCache()
+    return cache
+
+
+def statement_stats():
+    """Prepared statement counts across all live connections"""
+    with _statement_caches_lock:
+        caches = list(_statement_caches.values())
+    return {
+        'enabled': PREPARED_STATEMENTS,
+        'connections': len(caches),
+        'cached': sum(len(cache._cursors) for cache in caches),
+        'prepared': sum(cache.prepared for cache in caches),
+        'reused': sum(cache.reused for cache in caches)
+    }
+
+
+def _execute(connection, query, params, prepared):
+    """Run a query and return (cursor, owned); owned cursors are closed by the caller"""
+    if prepared and PREPARED_STATEMENTS:
+        cache = statement_cache(connection)
+        cursor = timed_cursor(cache.cursor_for(getattr(connection, 'raw_connection', connection), query))
+        try:
+            cursor.execute(query, params)
+        except Error:
+            # Drop the statement so the next call prepares it again
+            cache.discard(query)
+            raise
+        return cursor, False
+
+    cursor = connection.cursor()
+    cursor.execute(query, params)
+    return cursor, True
+
+
+def fetch_tuples(connection, query, params=(), prepared=True):
+    """All rows as plain tuples"""
+    cursor, owned = _execute(connection, query, params, prepared)
+    try:
+        return cursor.fetchall()
+    finally:
+        if owned:
+            cursor.close()
+
+
+def fetch_rows(connection, query, params=(), columns=None, prepared=True):
+    """All rows as tuple-backed named rows.
+
+    ``columns`` is the ColumnMap for an explicit projection; for SELECT *
+    it is read from the cursor description.
+    """
+    cursor, owned = _execute(connection, query, params, prepared)
+    try:
+        tuples = cursor.fetchall()
+        column_map = columns or ColumnMap.from_description(cursor.description)
+    finally:
+        if owned:
+            cursor.close()
+    return column_map.rows(tuples)
+
+
+class RowStream:
+    """Iterator over an unbuffered cursor, ``batch_size`` rows at a time.
+
+    ``close()`` drains any unread rows and closes the cursor, so the
+    connection can be reused whether or not the stream was read to the end.
+    """
+
+    def __init__(self, connection, cursor, batch_size, make=None):
+        self.connection = connection
+        self.batch_size = batch_size
+        self._cursor = cursor
+        self._make = make
+        self._batch = ()
+        self._position = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._position >= len(self._batch):
+            if self._cursor is None:
+                raise StopIteration
+            self._batch = self._cursor.fetchmany(self.batch_size)
+            self._position = 0
+            if not self._batch:
+                self._close_cursor(drain=False)
+                raise StopIteration
+        row = self._batch[self._position]
+        self._position += 1
+        return self._make(row) if self._make else row
+
+    def close(self):
+        self._batch = ()
+        self._close_cursor(drain=True)
+
+    def _close_cursor(self, drain):
+        cursor, self._cursor = self._cursor, None
+        if cursor is None:
+            return
+        try:
+            if drain:
+                # Stopped early - read off the rest of the result set
+                self.connection.consume_results()
+        finally:
+            cursor.close()
+
+
+def stream_tuples(connection, query, params=(), batch_size=STREAM_BATCH_SIZE):
+    """Run a query on an unbuffered cursor and return a RowStream of tuples.
+
+    The query is executed before this returns, so errors surface at the
+    call site. Only ``batch_size`` rows are held in Python at a time, and
+    the connection is busy until the stream is exhausted or closed.
+    """
+    return _stream(connection, query, params, batch_size, named=False)
+
+
+def stream_rows(connection, query, columns=None, params=(), batch_size=STREAM_BATCH_SIZE):
+    """stream_tuples as named rows; ``columns`` defaults to the cursor description"""
+    return _stream(connection, query, params, batch_size, named=True, columns=columns)
+
+
+def _stream(connection, query, params, batch_size, named, columns=None):
+    cursor = connection.cursor(buffered=False)
+    try:
+        cursor.execute(query, params)
+    except Error:
+        cursor.close()
+        raise
+    if not named:
+        return RowStream(connection, cursor, batch_size)
+    columns = columns or ColumnMap.from_description(cursor.description)
+    return RowStream(connection, cursor, batch_size, columns.row_type._make)
@@ -0,0 +1,354 @@
+"""
+Database connection pool
+Sized between a minimum and maximum number of connections. Borrowers
+wait (up to a timeout) for a free connection instead of opening extra
+ones against the remote server. Idle connections are recycled, old ones
+are rotated, and connections idle for a while are pinged before use.
+"""
+
+import threading
+import time
+from collections import deque
+
+import mysql.connector
+from mysql.connector import Error
+
+from request_timing import timed_cursor
+from structured_log import get_logger
+
+log = get_logger('db_pool')
+
+POOL_MIN_SIZE = 2
+POOL_MAX_SIZE = 10
+POOL_ACQUIRE_TIMEOUT = 5.0      # seconds a request waits for a free connection
+POOL_MAX_IDLE = 300.0           # close idle connections above the minimum after this long
+POOL_MAX_LIFETIME = 1800.0      # replace connections older than this (below MySQL wait_timeout)
+POOL_VALIDATE_AFTER = 30.0      # ping a connection on borrow if it sat idle longer than this
+POOL_REAP_INTERVAL = 30.0
+
+
+class PoolTimeout(Error):
+    """No connection became free within the acquire timeout"""
+
+
+class _PoolEntry:
+    __slots__ = ('raw', 'created_at', 'last_used')
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.created_at = self.last_used = time.monotonic()
+
+
+class PooledConnection:
+    """Borrowed connection; ``close()`` hands it back to the pool.
+
+    Everything else is delegated to the underlying mysql.connector
+    connection, so handlers keep their cursor()/commit()/close() code.
+    """
+
+    def __init__(self, pool, entry):
+        self._pool = pool
+        self._entry = entry
+
+    def __getattr__(self, name):
+        entry = self.__dict__.get('_entry')
+        if entry is None:
+            raise Error(msg='Connection already returned to the pool')
+        return getattr(entry.raw, name)
+
+    @property
+    def raw_connection(self):
+        """The underlying mysql.connector connection"""
+        if self._entry is None:
+            raise Error(msg='Connection already returned to the pool')
+        return self._entry.raw
+
+    def cursor(self, *args, **kwargs):
+        """Cursor on the underlying connection, timed when used inside a request"""
+        return timed_cursor(self.raw_connection.cursor(*args, **kwargs))
+
+    def is_connected(self):
+        return self._entry is not None and self._entry.raw.is_connected()
+
+    def close(self):
+        entry, self._entry = self._entry, None
+        if entry is not None:
+            self._pool.release(entry)
+
+    def __del__(self):
+        # A handler that forgot close() must not leak the slot
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    """Bounded MySQL connection pool with metrics.
+
+    ``acquire`` returns an idle connection, opens a new one while fewer
+    than ``max_size`` exist, or waits up to ``acquire_timeout`` and raises
+    PoolTimeout.
+    """
+
+    def __init__(self, config, min_size=POOL_MIN_SIZE, max_size=POOL_MAX_SIZE,
+                 acquire_timeout=POOL_ACQUIRE_TIMEOUT, max_idle=POOL_MAX_IDLE,
+                 max_lifetime=POOL_MAX_LIFETIME, validate_after=POOL_VALIDATE_AFTER):
+        self.config = config
+        self.min_size = min(min_size, max_size)
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.validate_after = validate_after
+
+        self._idle = deque()
+        self._total = 0
+        self._cond = threading.Condition()
+        self._reaper = None
+        self._closed = False
+        self._waiting = 0
+
+        self.acquired = 0
+        self.waits = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+        self.created = 0
+        self.closed_idle = 0
+        self.closed_lifetime = 0
+        self.failed_validation = 0
+        self.fallbacks = 0
+
+    def fill(self):
+        """Open connections up to ``min_size``; returns how many are open"""
+        self._ensure_reaper()
+        while True:
+            with self._cond:
+                if self._total >= self.min_size:
+                    return self._total
+                self._total += 1
+            try:
+                entry = self._connect()
+            except Error:
+                with self._cond:
+                    self._total -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._idle.append(entry)
+                self._cond.notify()
+
+    def acquire(self, timeout=None):
+        timeout = self.acquire_timeout if timeout is None else timeout
+        self._ensure_reaper()
+        started = time.monotonic()
+        deadline = started + timeout
+        waited = False
+
+        while True:
+            stale = None
+            with self._cond:
+                while True:
+                    if self._idle:
+                        # Most recently used first, so surplus connections go idle and get reaped
+                        entry = self._idle.pop()
+                        break
+                    if self._total < self.max_size:
+                        self._total += 1
+                        entry = None
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        self._record_wait(time.monotonic() - started, waited)
+                        raise PoolTimeout(msg=f'No database connection free after {timeout:.1f}s '
+                                              f'({self.max_size} in use)')
+                    waited = True
+                    self._waiting += 1
+                    try:
+                        self._cond.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+
+            if entry is None:
+                try:
+                    entry = self._connect()
+                except Error:
+                    with self._cond:
+                        self._total -= 1
+                        self._cond.notify()
+                    raise
+            else:
+                now = time.monotonic()
+                if now - entry.created_at > self.max_lifetime:
+                    self.closed_lifetime += 1
+                    stale = entry
+                elif now - entry.last_used > self.validate_after and not self._alive(entry):
+                    self.failed_validation += 1
+                    stale = entry
+
+            if stale is not None:
+                # Discard it and try again; the freed slot lets us open a new one
+                self._discard(stale)
+                continue
+
+            with self._cond:
+                self.acquired += 1
+                self._record_wait(time.monotonic() - started, waited)
+            return PooledConnection(self, entry)
+
+    def release(self, entry):
+        try:
+            if getattr(entry.raw, 'in_transaction', False):
+                entry.raw.rollback()
+        except Exception:
+            self._discard(entry)
+            return
+
+        if self._closed or time.monotonic() - entry.created_at > self.max_lifetime:
+            if not self._closed:
+                self.closed_lifetime += 1
+            self._discard(entry)
+            return
+
+        entry.last_used = time.monotonic()
+        with self._cond:
+            if self._total > self.max_size:
+                shrink = True
+            else:
+                shrink = False
+                self._idle.append(entry)
+                self._cond.notify()
+        if shrink:
+            self._discard(entry)
+
+    def resize(self, min_size, max_size):
+        """Change the bounds; surplus connections close as they are released or reaped"""
+        with self._cond:
+            self.max_size = max_size
+            self.min_size = min(min_size, max_size)
+            self._cond.notify_all()
+
+    def record_fallback(self):
+        """Count a direct connection opened because the pool timed out"""
+        with self._cond:
+            self.fallbacks += 1
+
+    def reset_after_fork(self):
+        """Forget connections inherited from the parent process.
+
+        Their sockets belong to the parent, so they are dropped without
+        being closed (closing would send COM_QUIT on the parent's session).
+        Locks are recreated because another thread may have held them at
+        fork time.
+        """
+        self._idle = deque()
+        self._total = 0
+        self._waiting = 0
+        self._cond = threading.Condition()
+        self._reaper = None
+
+    def close_all(self):
+        self._closed = True
+        with self._cond:
+            entries = list(self._idle)
+            self._idle.clear()
+        for entry in entries:
+            self._discard(entry)
+
+    def stats(self):
+        with self._cond:
+            idle = len(self._idle)
+            total = self._total
+            return {
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'open': total,
+                'idle': idle,
+                'in_use': total - idle,
+                'waiting': self._waiting,
+                'acquired': self.acquired,
+                'waits': self.waits,
+                'wait_ms_total': round(self.wait_seconds * 1000, 1),
+                'wait_ms_avg': round(self.wait_seconds * 1000 / self.acquired, 2) if self.acquired else 0,
+                'wait_ms_max': round(self.max_wait_seconds * 1000, 1),
+                'timeouts': self.timeouts,
+                'created': self.created,
+                'closed_idle': self.closed_idle,
+                'closed_lifetime': self.closed_lifetime,
+                'failed_validation': self.failed_validation,
+                'fallbacks': self.fallbacks
+            }
+
+    def _record_wait(self, elapsed, waited):
+        # Called with the condition held
+        if waited:
+            self.waits += 1
+        self.wait_seconds += elapsed
+        self.max_wait_seconds = max(self.max_wait_seconds, elapsed)
+
+    def _connect(self):
+        raw = mysql.connector.connect(**self.config)
+        self.created += 1
+        return _PoolEntry(raw)
+
+    def _alive(self, entry):
+        try:
+            entry.raw.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, entry):
+        with self._cond:
+            self._total -= 1
+            self._cond.notify()
+        try:
+            entry.raw.close()
+        except Exception:
+            pass
+
+    def _ensure_reaper(self):
+        # Started lazily so the thread belongs to the process that uses the pool
+        if self._reaper is not None and self._reaper.is_alive():
+            return
+        with self._cond:
+            if self._reaper is None or not self._reaper.is_alive():
+                self._reaper = threading.Thread(target=self._reap_loop, name='db-pool-reaper', daemon=True)
+                self._reaper.start()
+
+    def _reap_loop(self):
+        while not self._closed:
+            time.sleep(POOL_REAP_INTERVAL)
+            self.reap()
+            try:
+                # Top back up after rotation so the next requests find warm connections
+                self.fill()
+            except Error as e:
+                log.warning('Could not refill connection pool', error=str(e))
+
+    def reap(self):
+        """Close idle connections past max_idle (above min_size) or max_lifetime"""
+        now = time.monotonic()
+        expired = []
+        with self._cond:
+            keep = deque()
+            # Oldest-used connections sit at the left of the deque
+            for entry in self._idle:
+                too_old = now - entry.created_at > self.max_lifetime
+                too_idle = (now - entry.last_used > self.max_idle
+                            and self._total - len(expired) > self.min_size)
+                if too_old or too_idle:
+                    expired.append(entry)
+                    if too_old:
+                        self.closed_lifetime += 1
+                    else:
+                        self.closed_idle += 1
+                else:
+                    keep.append(entry)
+            self._idle = keep
+
+        for entry in expired:
+            self._discard(entry)
+        return len(expired)
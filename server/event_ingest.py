@@ -0,0 +1,258 @@
+"""
+Event ingestion pipeline
+Analytics events are validated and acknowledged on the request thread,
+queued in memory, and written to SA_AppEvents by one background writer
+using multi-row inserts
+"""
+
+import atexit
+import collections
+import datetime
+import json
+import queue
+import threading
+import time
+
+from mysql.connector import Error
+from mysql.connector.errors import DataError, IntegrityError
+
+from structured_log import get_logger
+
+log = get_logger('events')
+
+INSERT_EVENTS_QUERY = """
+    INSERT INTO SA_AppEvents (entry_date, entry_time, employee_id, event_name, meta_data)
+    VALUES (%s, %s, %s, %s, %s)
+"""
+
+EVENT_QUEUE_SIZE = 10000      # events held in memory before new ones are rejected
+EVENT_BATCH_SIZE = 200        # flush as soon as this many events are waiting...
+EVENT_FLUSH_INTERVAL = 1.0    # ...or this many seconds after the first one arrived
+EVENT_WRITE_RETRIES = 3
+EVENT_MAX_CLIENT_AGE = 3600   # seconds; older client timestamps are clamped to this age
+
+# Errors caused by the rows themselves (bad value, duplicate key); retrying
+# will not help. ProgrammingError is left out: an unknown table or column or
+# a revoked grant fails every row, so it is retried like a connection error.
+PERMANENT_ERRORS = (DataError, IntegrityError)
+
+
+def event_time(client_ts, now, max_age=EVENT_MAX_CLIENT_AGE):
+    """When the event happened: the client's epoch-milliseconds ``client_ts``
+    clamped to [now - max_age, now], or ``now`` if it is missing or invalid"""
+    if isinstance(client_ts, bool) or not isinstance(client_ts, (int, float)):
+        return now
+    try:
+        occurred = datetime.datetime.fromtimestamp(client_ts / 1000)
+    except (OverflowError, OSError, ValueError):
+        return now
+    return min(now, max(occurred, now - datetime.timedelta(seconds=max_age)))
+
+
+def normalize_event(data, now=None):
+    """Validate a request payload and build the SA_AppEvents row tuple.
+
+    Raises ValueError when employee_id or event_name is missing. The row is
+    dated by the client's ``client_ts`` (see event_time), since the app
+    buffers events before sending them; without one it gets the time the
+    server accepted it, never the flush time.
+    """
+    if not isinstance(data, dict):
+        raise ValueError('Event must be a JSON object')
+
+    employee_id = data.get('employee_id')
+    event_name = data.get('event_name')
+    meta_data = data.get('meta_data', '')
+
+    if not employee_id or not event_name:
+        raise ValueError('Missing required fields: employee_id and event_name')
+
+    occurred = event_time(data.get('client_ts'), now or datetime.datetime.now())
+    entry_date = occurred.strftime('%Y-%m-%d')
+    entry_time = occurred.strftime('%H:%M:%S')
+
+    # Parse meta_data if it's a string (convert back to dict for JSON column)
+    if isinstance(meta_data, str):
+        try:
+            meta_data_json = json.loads(meta_data) if meta_data else {}
+        except ValueError:
+            meta_data_json = {"raw": meta_data}
+    else:
+        meta_data_json = meta_data if meta_data else {}
+
+    # Convert to JSON string for MySQL JSON column
+    return (entry_date, entry_time, employee_id, event_name, json.dumps(meta_data_json))
+
+
+class EventIngestor:
+    """Bounded queue plus a single writer thread.
+
+    ``submit`` never touches the database. When the queue is full the
+    event is rejected and counted in ``dropped`` so the caller can apply
+    backpressure.
+    """
+
+    def __init__(self, connection_factory, queue_size=EVENT_QUEUE_SIZE,
+                 batch_size=EVENT_BATCH_SIZE, flush_interval=EVENT_FLUSH_INTERVAL):
+        self.connection_factory = connection_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stopping = threading.Event()
+        self._writer = None
+        self._start_lock = threading.Lock()
+        # Request threads and the writer both update the counters
+        self._counts_lock = threading.Lock()
+        self.accepted = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+
+    def submit(self, row):
+        """Queue one SA_AppEvents row; False if the queue is full"""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self._count(dropped=1)
+            return False
+        self._count(accepted=1)
+        return True
+
+    def stop(self, timeout=10.0):
+        """Stop accepting new batches and flush everything still queued"""
+        self._stopping.set()
+        writer = self._writer
+        if writer is not None and writer.is_alive():
+            writer.join(timeout)
+
+    def stats(self):
+        with self._counts_lock:
+            return {
+                'queued': self._queue.qsize(),
+                'accepted': self.accepted,
+                'written': self.written,
+                'dropped': self.dropped,
+                'failed': self.failed,
+                'batches': self.batches
+            }
+
+    def _count(self, **amounts):
+        with self._counts_lock:
+            for name, amount in amounts.items():
+                setattr(self, name, getattr(self, name) + amount)
+
+    def _ensure_started(self):
+        # Started lazily so the thread is created in the process that serves
+        # requests (after a gunicorn fork), not at import time
+        if self._writer is not None:
+            return
+        with self._start_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run, name='event-writer', daemon=True)
+                self._writer.start()
+                atexit.register(self.stop)
+
+    def _next_batch(self):
+        """Block for the first event, then collect until size or time trigger"""
+        try:
+            first = self._queue.get(timeout=self.flush_interval)
+        except queue.Empty:
+            return []
+
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self._stopping.is_set():
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _drain(self):
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stopping.is_set():
+            batch = self._next_batch()
+            if batch:
+                self._write(batch)
+
+        # Shutdown: flush whatever is left
+        batch = self._drain()
+        while batch:
+            self._write(batch)
+            batch = self._drain()
+
+    def _write(self, batch):
+        chunks = collections.deque([batch])
+        rejected = []
+        for attempt in range(1, EVENT_WRITE_RETRIES + 1):
+            try:
+                self._write_chunks(chunks, rejected)
+                break
+            except Error as e:
+                log.warning('Event batch failed', events=sum(len(chunk) for chunk in chunks),
+                            attempt=f"{attempt}/{EVENT_WRITE_RETRIES}", error=str(e))
+                if attempt < EVENT_WRITE_RETRIES and not self._stopping.is_set():
+                    time.sleep(0.5 * attempt)
+
+        unwritten = sum(len(chunk) for chunk in chunks)
+        if len(rejected) + unwritten < len(batch):
+            self._count(batches=1)
+        if rejected:
+            self._count(failed=len(rejected))
+            log.error('Dropped rejected events', events=len(rejected), error=str(rejected[0][1]))
+        if unwritten:
+            self._count(failed=unwritten)
+            log.error('Dropped event batch', events=unwritten, attempts=EVENT_WRITE_RETRIES)
+
+    def _write_chunks(self, chunks, rejected, write=None):
+        """Write a deque of row lists, splitting any list the database rejects.
+
+        A list that fails with a PERMANENT_ERRORS error is halved until the
+        offending rows are alone; those go to ``rejected`` as (row, error)
+        and the rest are written. Lists are removed as they are written, so
+        after a connection error the caller retries only what is left.
+        """
+        write = write or self.write_rows
+        while chunks:
+            chunk = chunks[0]
+            try:
+                write(chunk)
+            except PERMANENT_ERRORS as e:
+                chunks.popleft()
+                if len(chunk) == 1:
+                    rejected.append((chunk[0], e))
+                else:
+                    middle = len(chunk) // 2
+                    chunks.extendleft((chunk[middle:], chunk[:middle]))
+                continue
+            chunks.popleft()
+            self._count(written=len(chunk))
+
+    def write_rows(self, rows):
+        """Insert rows into SA_AppEvents with one multi-row INSERT"""
+        connection = self.connection_factory()
+        if not connection:
+            raise Error(msg='Database connection failed')
+
+        cursor = connection.cursor()
+        try:
+            # executemany rewrites a simple INSERT ... VALUES into one multi-row statement
+            cursor.executemany(INSERT_EVENTS_QUERY, rows)
+            connection.commit()
+        finally:
+            cursor.close()
+            if connection.is_connected():
+                connection.close()
@@ -0,0 +1,393 @@
+"""
+Durable event spool
+Events are appended to local segment files before they are acknowledged,
+and a replayer ships the segments to SA_AppEvents in bulk. A checkpoint
+file records how far the replayer got, so after a crash or restart it
+resumes where it stopped instead of losing or re-sending events.
+"""
+
+import atexit
+import collections
+import fcntl
+import json
+import os
+import threading
+import time
+
+from mysql.connector import Error
+
+from event_ingest import EVENT_BATCH_SIZE, EVENT_FLUSH_INTERVAL, EventIngestor
+from structured_log import get_logger
+
+log = get_logger('events')
+
+SPOOL_SEGMENT_BYTES = 8 * 1024 * 1024   # start a new segment file after this size
+SPOOL_FSYNC_INTERVAL = 0.05             # appends are fsynced together at most this often
+SPOOL_MAX_BACKOFF = 30.0                # cap for retry delay while the database is unreachable
+
+SEGMENT_PREFIX = 'segment-'
+SEGMENT_SUFFIX = '.log'
+CHECKPOINT_FILE = 'checkpoint.json'
+DEAD_LETTER_FILE = 'dead-letter.log'
+
+
+def _segment_name(seq):
+    return f'{SEGMENT_PREFIX}{seq:012d}{SEGMENT_SUFFIX}'
+
+
+def _fsync_dir(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class EventSpool:
+    """Append-only, segmented log of SA_AppEvents rows (one JSON array per line).
+
+    Each process claims its own slot directory under ``root`` with an
+    exclusive lock, so gunicorn workers never share files and a restarted
+    worker picks up the segments its predecessor left behind.
+    """
+
+    def __init__(self, root, segment_bytes=SPOOL_SEGMENT_BYTES, fsync_interval=SPOOL_FSYNC_INTERVAL):
+        self.root = root
+        self.segment_bytes = segment_bytes
+        self.fsync_interval = fsync_interval
+        self.directory = None
+        self._lock_file = None
+        self._file = None
+        self._active_seq = 0
+        self._active_size = 0
+        self._append_lock = threading.Lock()
+        self._dirty = False
+        self._syncer = None
+        self._closing = threading.Event()
+        self.new_data = threading.Event()
+        self.appended = 0
+
+    # ---- lifecycle ----
+
+    def open(self):
+        """Claim a slot directory and start a fresh active segment"""
+        os.makedirs(self.root, exist_ok=True)
+        slot = 0
+        while True:
+            directory = os.path.join(self.root, f'slot-{slot}')
+            os.makedirs(directory, exist_ok=True)
+            lock_file = open(os.path.join(directory, '.lock'), 'a')
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except OSError:
+                lock_file.close()
+                slot += 1
+
+        self.directory = directory
+        self._lock_file = lock_file
+
+        # Segments left by a previous process are sealed; append to a new one
+        existing = self.segments()
+        self._open_segment(existing[-1] + 1 if existing else 1)
+        self._syncer = threading.Thread(target=self._sync_loop, name='event-spool-sync', daemon=True)
+        self._syncer.start()
+        log.info('Event spool ready', directory=self.directory, segments_to_replay=len(existing))
+
+    def close(self):
+        self._closing.set()
+        if self._syncer is not None:
+            self._syncer.join(1.0)
+        with self._append_lock:
+            if self._file is not None:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+                self._file = None
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    # ---- writing ----
+
+    def append(self, rows):
+        """Append rows; returns once they are in the OS page cache.
+
+        Surviving a process crash only needs the write(); the syncer thread
+        fsyncs pending appends every ``fsync_interval`` for power loss, so
+        one fsync covers all events logged in that window.
+        """
+        data = ''.join(json.dumps(list(row), separators=(',', ':')) + '\n' for row in rows).encode('utf-8')
+        with self._append_lock:
+            if self._active_size >= self.segment_bytes:
+                self._rotate()
+            self._file.write(data)
+            self._file.flush()
+            self._active_size += len(data)
+            self._dirty = True
+            self.appended += len(rows)
+        self.new_data.set()
+
+    def _open_segment(self, seq):
+        self._active_seq = seq
+        self._file = open(os.path.join(self.directory, _segment_name(seq)), 'ab')
+        self._active_size = self._file.tell()
+        _fsync_dir(self.directory)
+
+    def _rotate(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self._dirty = False
+        self._open_segment(self._active_seq + 1)
+
+    def _sync_loop(self):
+        while not self._closing.wait(self.fsync_interval):
+            if not self._dirty:
+                continue
+            with self._append_lock:
+                if self._file is None:
+                    return
+                self._dirty = False
+                fileno = self._file.fileno()
+                # fsync under the lock so rotation cannot close the file mid-sync
+                try:
+                    os.fsync(fileno)
+                except OSError as e:
+                    log.warning('Event spool fsync failed', error=str(e))
+
+    # ---- reading (replayer side) ----
+
+    @property
+    def active_seq(self):
+        return self._active_seq
+
+    def segments(self):
+        """Sequence numbers of all segment files, oldest first"""
+        seqs = []
+        for name in os.listdir(self.directory):
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX):
+                try:
+                    seqs.append(int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]))
+                except ValueError:
+                    continue
+        return sorted(seqs)
+
+    def read(self, seq, offset, limit):
+        """Up to ``limit`` complete lines from a segment starting at ``offset``.
+
+        Returns (lines, next_offset). A trailing line without a newline is
+        still being written and is left for the next read.
+        """
+        lines = []
+        with open(os.path.join(self.directory, _segment_name(seq)), 'rb') as f:
+            f.seek(offset)
+            while len(lines) < limit:
+                line = f.readline()
+                if not line.endswith(b'\n'):
+                    break
+                lines.append(line)
+                offset += len(line)
+        return lines, offset
+
+    def remove_segment(self, seq):
+        try:
+            os.remove(os.path.join(self.directory, _segment_name(seq)))
+        except FileNotFoundError:
+            pass
+
+    def pending_bytes(self, seq, offset):
+        total = 0
+        for s in self.segments():
+            if s >= seq:
+                try:
+                    total += os.path.getsize(os.path.join(self.directory, _segment_name(s)))
+                except OSError:
+                    continue
+        return max(0, total - offset)
+
+    def load_checkpoint(self):
+        """(segment, offset) the replayer had shipped up to"""
+        try:
+            with open(os.path.join(self.directory, CHECKPOINT_FILE)) as f:
+                data = json.load(f)
+            seq, offset = int(data['segment']), int(data['offset'])
+            if seq <= self._active_seq:
+                return seq, offset
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        # No usable checkpoint: replay everything still on disk
+        existing = self.segments()
+        return (existing[0] if existing else self._active_seq), 0
+
+    def save_checkpoint(self, seq, offset):
+        """Atomically replace the checkpoint (write, fsync, rename)"""
+        path = os.path.join(self.directory, CHECKPOINT_FILE)
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'segment': seq, 'offset': offset, 'saved_at': time.time()}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def dead_letter(self, lines):
+        with open(os.path.join(self.directory, DEAD_LETTER_FILE), 'ab') as f:
+            f.writelines(lines)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class SpooledEventIngestor(EventIngestor):
+    """EventIngestor whose queue is an on-disk spool.
+
+    ``submit`` only appends to local disk, so event logging latency never
+    depends on the database. The writer thread becomes a replayer that
+    ships spooled rows in bulk and checkpoints after every batch. Rows the
+    database rejects as invalid are moved to a dead-letter file rather
+    than blocking the spool.
+    """
+
+    def __init__(self, connection_factory, spool_dir, batch_size=EVENT_BATCH_SIZE,
+                 flush_interval=EVENT_FLUSH_INTERVAL, segment_bytes=SPOOL_SEGMENT_BYTES,
+                 fsync_interval=SPOOL_FSYNC_INTERVAL):
+        super().__init__(connection_factory, batch_size=batch_size, flush_interval=flush_interval)
+        self.spool = EventSpool(spool_dir, segment_bytes=segment_bytes, fsync_interval=fsync_interval)
+        self._position = None
+        self.corrupt = 0
+        self.dead_lettered = 0
+        self.last_error = None
+
+    def submit(self, row):
+        """Append one SA_AppEvents row to the spool; False if the disk write fails"""
+        try:
+            self._ensure_started()
+            self.spool.append([row])
+        except OSError as e:
+            log.error('Event spool append failed', error=str(e))
+            self._count(dropped=1)
+            return False
+        self._count(accepted=1)
+        return True
+
+    def stop(self, timeout=10.0):
+        """Stop the replayer; unshipped events stay in the spool for the next start"""
+        self._stopping.set()
+        self.spool.new_data.set()
+        super().stop(timeout)
+        if self.spool.directory is not None:
+            self.spool.close()
+
+    def stats(self):
+        with self._counts_lock:
+            stats = {
+                'spool_dir': self.spool.directory,
+                'accepted': self.accepted,
+                'written': self.written,
+                'dropped': self.dropped,
+                'failed': self.failed,
+                'batches': self.batches,
+                'corrupt': self.corrupt,
+                'dead_lettered': self.dead_lettered,
+                'last_error': self.last_error
+            }
+        if self._position is not None:
+            seq, offset = self._position
+            stats['checkpoint'] = {'segment': seq, 'offset': offset}
+            stats['pending_bytes'] = self.spool.pending_bytes(seq, offset)
+            stats['segments'] = len(self.spool.segments())
+        return stats
+
+    def _ensure_started(self):
+        if self._writer is not None:
+            return
+        with self._start_lock:
+            if self._writer is None:
+                self.spool.open()
+                self._position = self.spool.load_checkpoint()
+                self._writer = threading.Thread(target=self._run, name='event-replayer', daemon=True)
+                self._writer.start()
+                atexit.register(self.stop)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            shipped_full_batch = self._replay_once()
+            if not shipped_full_batch:
+                # Caught up: wait for new appends, or the flush interval so
+                # small trickles are still shipped in groups
+                self.spool.new_data.wait(self.flush_interval)
+                self.spool.new_data.clear()
+
+    def _replay_once(self):
+        """Ship one batch from the checkpoint position; True if a full batch went out"""
+        seq, offset = self._position
+        # Checked before reading: the writer may append to this segment and
+        # rotate while we read, and only a segment sealed before an empty
+        # read is known to be fully shipped
+        sealed = seq < self.spool.active_seq
+        try:
+            lines, next_offset = self.spool.read(seq, offset, self.batch_size)
+        except FileNotFoundError:
+            lines, next_offset = [], offset
+
+        if not lines:
+            if sealed:
+                # Sealed segment fully shipped: move on and delete it
+                later = [s for s in self.spool.segments() if s > seq]
+                self._position = (later[0] if later else self.spool.active_seq, 0)
+                self.spool.save_checkpoint(*self._position)
+                self.spool.remove_segment(seq)
+                return True
+            return False
+
+        entries = []
+        for line in lines:
+            try:
+                entries.append((tuple(json.loads(line)), line))
+            except ValueError:
+                self._count(corrupt=1)
+                log.warning('Skipping corrupt spool line', segment=seq)
+
+        if entries and not self._ship(entries):
+            return False
+
+        self._position = (seq, next_offset)
+        self.spool.save_checkpoint(seq, next_offset)
+        return len(lines) == self.batch_size
+
+    def _ship(self, entries):
+        """Write (row, spool line) entries, retrying while the database is unreachable.
+
+        Rows the database rejects on their own are isolated by splitting
+        the batch and only their lines are dead-lettered. Returns False only
+        when stopping before anything was written; the rows stay in the spool.
+        """
+        chunks = collections.deque([entries])
+        rejected = []
+        attempt = 0
+        while not self._stopping.is_set():
+            attempt += 1
+            try:
+                self._write_chunks(chunks, rejected, write=lambda chunk: self.write_rows([row for row, _ in chunk]))
+                self._count(batches=1)
+                self.last_error = None
+                break
+            except Error as e:
+                self.last_error = str(e)
+                if attempt == 1 or attempt % 10 == 0:
+                    log.warning('Event replay failed, will retry',
+                                events=sum(len(chunk) for chunk in chunks), attempt=attempt, error=str(e))
+
+            self._stopping.wait(min(SPOOL_MAX_BACKOFF, 0.5 * 2 ** min(attempt, 6)))
+
+        if chunks:
+            if sum(len(chunk) for chunk in chunks) == len(entries):
+                return False
+            # Stopped part-way: re-spool the unwritten rows so moving the
+            # checkpoint past this batch neither loses nor duplicates any
+            self.spool.append([row for chunk in chunks for row, _ in chunk])
+        if rejected:
+            self.last_error = str(rejected[0][1])
+            log.error('Moving events to dead letter', events=len(rejected), error=self.last_error)
+            self.spool.dead_letter([line for (_, line), _ in rejected])
+            self._count(dead_lettered=len(rejected), failed=len(rejected))
+        return True
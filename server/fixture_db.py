@@ -0,0 +1,628 @@
+"""Local MySQL fixture: every table the API touches, filled with seeded synthetic data
+
+Start a throwaway MySQL 8 server, point the app at it through the DB_*
+environment variables and seed it:
+
+    docker run -d --name sales-mysql -p 3307:3306 -e MYSQL_ROOT_PASSWORD=local mysql:8.0
+    export DB_HOST=127.0.0.1 DB_PORT=3307 DB_USER=root DB_PASSWORD=local DB_NAME=sales_fixture
+
+    python fixture_db.py                                             # 50 executives x 40 customers x 30 SKUs
+    python fixture_db.py --drop-existing                             # re-seed over an earlier run
+    python fixture_db.py --executives 500 --customers 200 --skus 80  # bigger book
+    python fixture_db.py --seed 11                                   # different (but repeatable) data
+    python fixture_db.py --schema-only                               # empty tables
+
+Fixture tables left by an earlier run are only dropped and recreated
+with --drop-existing; the same arguments always produce the same rows.
+Only primary keys are created; run check_query_plans.py against the
+fixture to see which indexes to add. The script refuses to run unless
+every DB_* variable is set and none of them points at the production
+datalake (host, user or database), so it can't write there by accident.
+Every seeded login uses FIXTURE_PASSWORD.
+"""
+import argparse
+import datetime
+import io
+import os
+import random
+import sys
+import time
+from collections import namedtuple
+
+import mysql.connector
+from mysql.connector import Error
+
+# Fix encoding
+if sys.stdout.encoding != 'utf-8':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+from app import DB_CONFIG, hash_password
+
+FIXTURE_PASSWORD = 'fixture123'
+INSERT_BATCH_SIZE = 1000
+
+# Every one must be set explicitly; the app's defaults point at production
+DB_ENV_VARS = ('DB_HOST', 'DB_PORT', 'DB_USER', 'DB_PASSWORD', 'DB_NAME')
+PRODUCTION_DB = {'host': '116.202.114.156', 'user': 'datalake_trw', 'database': 'datalake'}
+
+FIXTURE_TABLES = {
+    'Executive': """
+        CREATE TABLE Executive (
+            employee_id VARCHAR(20) PRIMARY KEY,
+            Name VARCHAR(100),
+            email VARCHAR(100),
+            role VARCHAR(50),
+            city VARCHAR(50),
+            cluster VARCHAR(50),
+            variable_pay DECIMAL(12, 2)
+        )""",
+    'DayTargets': """
+        CREATE TABLE DayTargets (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            date DATE,
+            employee_id VARCHAR(20),
+            metric VARCHAR(50),
+            slab_segment VARCHAR(10),
+            target DECIMAL(14, 2),
+            incentive_percent DECIMAL(6, 4),
+            unit VARCHAR(20)
+        )""",
+    'DayAchievement': """
+        CREATE TABLE DayAchievement (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            date DATE,
+            employee_id VARCHAR(20),
+            metric VARCHAR(50),
+            Achievement DECIMAL(14, 2)
+        )""",
+    'WeekTargets': """
+        CREATE TABLE WeekTargets (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            yearweek INT,
+            employee_id VARCHAR(20),
+            metric VARCHAR(50),
+            slab_segment VARCHAR(10),
+            target DECIMAL(14, 2),
+            incentive_percent DECIMAL(6, 4),
+            unit VARCHAR(20)
+        )""",
+    'WeekAchievement': """
+        CREATE TABLE WeekAchievement (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            yearweek INT,
+            employee_id VARCHAR(20),
+            metric VARCHAR(50),
+            Achievement DECIMAL(14, 2)
+        )""",
+    'LeaderBoard': """
+        CREATE TABLE LeaderBoard (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            day_segment VARCHAR(10),
+            layer VARCHAR(10),
+            layer_value VARCHAR(50),
+            employee_id VARCHAR(20),
+            Ranking INT,
+            Achievement DECIMAL(8, 4)
+        )""",
+    'SA_HomePageTargetCustomers': """
+        CREATE TABLE SA_HomePageTargetCustomers (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            employee_id VARCHAR(20),
+            customer_id BIGINT,
+            customername VARCHAR(100),
+            contactnumber BIGINT,
+            LastOrder INT
+        )""",
+    'SA_HomePageAppFunnelCustomers': """
+        CREATE TABLE SA_HomePageAppFunnelCustomers (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            employee_id VARCHAR(20),
+            customer_id BIGINT,
+            customername VARCHAR(100),
+            contactnumber BIGINT,
+            LastOpened DOUBLE
+        )""",
+    'SA_CustomerPageCustomers': """
+        CREATE TABLE SA_CustomerPageCustomers (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            employee_id VARCHAR(20),
+            layer VARCHAR(10),
+            metric VARCHAR(50),
+            customer_id BIGINT,
+            customername VARCHAR(100),
+            contactnumber BIGINT,
+            skuid INT,
+            Sku VARCHAR(100)
+        )""",
+    'SA_CustomerPageAttention': """
+        CREATE TABLE SA_CustomerPageAttention (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            employee_id VARCHAR(20) NULL,
+            customer_id BIGINT,
+            customername VARCHAR(100),
+            contactnumber BIGINT,
+            metric VARCHAR(50),
+            skuid INT,
+            skuname VARCHAR(100),
+            orderkg DECIMAL(10, 2),
+            billedkg DECIMAL(10, 2),
+            salekg DECIMAL(10, 2),
+            returnkg DECIMAL(10, 2),
+            readjustmentkg DECIMAL(10, 2),
+            shopreachtime TIME,
+            ontime TINYINT,
+            date DATE
+        )""",
+    'SA_CustomerPageTodayOrders': """
+        CREATE TABLE SA_CustomerPageTodayOrders (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            employee_id VARCHAR(20),
+            layer VARCHAR(20),
+            customer_id BIGINT,
+            customername VARCHAR(100),
+            contactnumber BIGINT,
+            ordertime DATETIME,
+            skuid INT,
+            Sku VARCHAR(100),
+            orderqty INT,
+            orderkg DECIMAL(10, 2),
+            date DATE
+        )""",
+    'SA_CustomerPageBase': """
+        CREATE TABLE SA_CustomerPageBase (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            employee_id VARCHAR(20),
+            customer_id BIGINT,
+            customername VARCHAR(100),
+            contactnumber BIGINT,
+            customertype VARCHAR(30),
+            customernature VARCHAR(30),
+            locality VARCHAR(50),
+            facility VARCHAR(50),
+            cluster VARCHAR(50),
+            latestsubscriptionenddate DATE,
+            latestsubscriptionamount DECIMAL(12, 2),
+            LOD DATE
+        )""",
+    'SA_AppNotification': """
+        CREATE TABLE SA_AppNotification (
+            Id INT AUTO_INCREMENT PRIMARY KEY,
+            date DATE,
+            heading VARCHAR(200),
+            description TEXT,
+            priority DECIMAL(4, 1)
+        )""",
+    'SA_AppEvents': """
+        CREATE TABLE SA_AppEvents (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            entry_date DATE,
+            entry_time TIME,
+            employee_id VARCHAR(20),
+            event_name VARCHAR(100),
+            meta_data TEXT
+        )""",
+    'SalesExecutiveApp_Login': """
+        CREATE TABLE SalesExecutiveApp_Login (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            employee_id VARCHAR(50) UNIQUE NOT NULL,
+            password_hash VARCHAR(255) NOT NULL,
+            full_name VARCHAR(100) NOT NULL,
+            email VARCHAR(100) NOT NULL,
+            role VARCHAR(50) NOT NULL,
+            status VARCHAR(20) DEFAULT 'active',
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            last_login DATETIME DEFAULT CURRENT_TIMESTAMP,
+            deleted TINYINT DEFAULT 0,
+            reset_token VARCHAR(255) DEFAULT NULL,
+            reset_token_expiry DATETIME DEFAULT NULL
+        )""",
+}
+
+# metric -> (unit, daily slab2 target for an average executive)
+TARGET_METRICS = {'GMV': ('₹', 60000), 'Orders': ('orders', 40), 'Lines': ('lines', 160), 'Fill': ('%', 95)}
+SLAB_LADDER = (('slab1', 0.8, 0.1), ('slab2', 1.0, 0.2), ('slab3', 1.25, 0.3))   # (segment, x target, incentive %)
+ATTENTION_METRICS = ('Late Delivery', 'Short Supply', 'Returns', 'Low Fill')
+TODAYS_ORDER_LAYERS = ('Early', 'Regular', 'Late')
+CUSTOMER_TYPES = (('Retail', 70), ('HoReCa', 20), ('Distributor', 10))
+CUSTOMER_NATURES = (('Repeat', 60), ('New', 25), ('Dormant', 15))
+CITIES = ('Chennai', 'Bengaluru', 'Hyderabad', 'Pune', 'Mumbai', 'Delhi', 'Kolkata', 'Coimbatore')
+SKU_FAMILIES = ('Basmati Rice', 'Toor Dal', 'Sunflower Oil', 'Atta', 'Sugar', 'Moong Dal', 'Ghee', 'Besan')
+ROLE = 'BUSINESS_DEVELOPMENT_EXECUTIVE'
+
+TableData = namedtuple('TableData', 'table columns rows')
+
+
+def yearweek(day):
+    """MySQL YEARWEEK(day, 1) - ISO weeks starting on Monday"""
+    year, week, _ = day.isocalendar()
+    return year * 100 + week
+
+
+class SyntheticData:
+    """Deterministic rows for every fixture table.
+
+    ``executives`` executives each own ``customers`` customers and draw
+    from a catalogue of ``skus`` SKUs. Each table gets its own random
+    stream derived from ``seed``, so a table's rows depend only on the
+    seed and the sizes. ``executive_ids()`` and ``customer_ids()`` let
+    load tests pick real keys without querying the database.
+    """
+
+    def __init__(self, executives=50, customers=40, skus=30, seed=7, days=7, weeks=4, today=None):
+        self.executives = executives
+        self.customers = customers
+        self.skus = skus
+        self.seed = seed
+        self.days = days
+        self.weeks = weeks
+        self.today = today or datetime.date.today()
+
+        rng = self.rng('roster')
+        clusters = max(1, executives // 8)
+        self.roster = []
+        for n in range(executives):
+            cluster = n % clusters
+            self.roster.append({
+                'employee_id': f"SNC{1000 + n}",
+                'name': f"Executive {n + 1}",
+                'cluster': f"Cluster {cluster + 1}",
+                'city': CITIES[cluster % len(CITIES)],
+                'variable_pay': round(rng.uniform(15000, 45000), -2),
+                # Some executives consistently over- or under-perform
+                'form': rng.lognormvariate(0, 0.2)
+            })
+
+        # Current-period achievement / slab2 target per metric, shared by the
+        # achievement tables and the leaderboard so the two agree
+        rng = self.rng('current')
+        self.current = {
+            (period_col, executive['employee_id'], metric): self.achievement_ratio(rng, executive)
+            for period_col in ('date', 'yearweek') for executive in self.roster for metric in TARGET_METRICS
+        }
+
+    def rng(self, name):
+        return random.Random(f"{self.seed}:{name}")
+
+    def executive_ids(self):
+        return [executive['employee_id'] for executive in self.roster]
+
+    def customer_ids(self, employee_id):
+        n = self.executive_ids().index(employee_id)
+        return list(range(n * self.customers + 1, (n + 1) * self.customers + 1))
+
+    def customer(self, n, c):
+        customer_id = n * self.customers + c + 1
+        return customer_id, f"Customer {customer_id}", 9000000000 + customer_id
+
+    def sku(self, sku_index):
+        sku_id = 1001 + sku_index
+        return sku_id, f"{SKU_FAMILIES[sku_index % len(SKU_FAMILIES)]} {sku_index // len(SKU_FAMILIES) + 1}kg"
+
+    def customer_skus(self, rng, count):
+        """SKUs a customer buys - popular SKUs come up far more often"""
+        weights = [1 / (i + 1) for i in range(self.skus)]
+        return sorted({rng.choices(range(self.skus), weights)[0] for _ in range(count)})
+
+    def tables(self):
+        """TableData for every table, in FIXTURE_TABLES order (SA_AppEvents stays empty)"""
+        return [
+            self.executive_table(),
+            *self.targets(),
+            self.leaderboard(),
+            self.home_target_customers(),
+            self.home_funnel_customers(),
+            self.customer_page_customers(),
+            self.attention(),
+            self.todays_orders(),
+            self.base_customers(),
+            self.notifications(),
+            self.logins(),
+        ]
+
+    def executive_table(self):
+        rng = self.rng('Executive')
+        rows = []
+        for executive in self.roster:
+            role = ROLE if rng.random() < 0.9 else 'AREA_MANAGER'
+            rows.append((executive['employee_id'], executive['name'],
+                         f"{executive['employee_id'].lower()}@example.com", role,
+                         executive['city'], executive['cluster'], executive['variable_pay']))
+        return TableData('Executive', ('employee_id', 'Name', 'email', 'role', 'city', 'cluster', 'variable_pay'), rows)
+
+    def achievement_ratio(self, rng, executive):
+        """Achievement / slab2 target: most land between slab1 and slab3, with tails either side"""
+        return rng.lognormvariate(0, 0.3) * executive['form']
+
+    def targets(self):
+        """DayTargets, DayAchievement, WeekTargets, WeekAchievement"""
+        rng = self.rng('targets')
+        periods = [
+            ('date', [self.today - datetime.timedelta(days=d) for d in range(self.days)], 1),
+            ('yearweek', [yearweek(self.today + datetime.timedelta(days=1 - 7 * w)) for w in range(self.weeks)], 6)
+        ]
+        tables = []
+        for period_col, values, scale in periods:
+            target_rows, achievement_rows = [], []
+            for value in values:
+                for executive in self.roster:
+                    for metric, (unit, base) in TARGET_METRICS.items():
+                        # Percentages don't scale with the period or the executive
+                        target = base if unit == '%' else round(base * scale * rng.uniform(0.7, 1.3))
+                        for segment, factor, incentive in SLAB_LADDER:
+                            slab_target = min(100, target * factor) if unit == '%' else round(target * factor)
+                            target_rows.append((value, executive['employee_id'], metric, segment,
+                                                slab_target, incentive, unit))
+                        if value == values[0]:
+                            ratio = self.current[(period_col, executive['employee_id'], metric)]
+                        else:
+                            ratio = self.achievement_ratio(rng, executive)
+                        # A few executives have no achievement row yet (LEFT JOIN reads NULL)
+                        if rng.random() < 0.05:
+                            continue
+                        achieved = min(100, target * ratio) if unit == '%' else round(target * ratio)
+                        achievement_rows.append((value, executive['employee_id'], metric, achieved))
+            prefix = 'Day' if period_col == 'date' else 'Week'
+            tables.append(TableData(f"{prefix}Targets", (period_col, 'employee_id', 'metric', 'slab_segment',
+                                                         'target', 'incentive_percent', 'unit'), target_rows))
+            tables.append(TableData(f"{prefix}Achievement", (period_col, 'employee_id', 'metric', 'Achievement'),
+                                    achievement_rows))
+        return tables
+
+    def overall(self, period_col, employee_id):
+        """Mean achievement ratio over all metrics in the current period"""
+        return sum(self.current[(period_col, employee_id, metric)] for metric in TARGET_METRICS) / len(TARGET_METRICS)
+
+    def leaderboard(self):
+        """Rankings by city and by cluster, from the current period's achievements"""
+        rows = []
+        for day_segment, period_col in (('day', 'date'), ('week', 'yearweek')):
+            for layer, field in (('city', 'city'), ('cluster', 'cluster')):
+                groups = {}
+                for executive in self.roster:
+                    groups.setdefault(executive[field], []).append(executive['employee_id'])
+                for layer_value, employee_ids in groups.items():
+                    scores = sorted(((self.overall(period_col, e), e) for e in employee_ids), reverse=True)
+                    for rank, (score, employee_id) in enumerate(scores, 1):
+                        rows.append((day_segment, layer, layer_value, employee_id, rank, round(score, 4)))
+        return TableData('LeaderBoard', ('day_segment', 'layer', 'layer_value', 'employee_id', 'Ranking',
+                                         'Achievement'), rows)
+
+    def home_target_customers(self):
+        rng = self.rng('SA_HomePageTargetCustomers')
+        rows = []
+        for n, executive in enumerate(self.roster):
+            for c in range(self.customers):
+                if rng.random() < 0.3:
+                    last_order = int(rng.expovariate(1 / 12)) + 1 if rng.random() < 0.9 else None
+                    rows.append((executive['employee_id'], *self.customer(n, c), last_order))
+        return TableData('SA_HomePageTargetCustomers',
+                         ('employee_id', 'customer_id', 'customername', 'contactnumber', 'LastOrder'), rows)
+
+    def home_funnel_customers(self):
+        rng = self.rng('SA_HomePageAppFunnelCustomers')
+        rows = []
+        for n, executive in enumerate(self.roster):
+            for c in range(self.customers):
+                if rng.random() < 0.2:
+                    rows.append((executive['employee_id'], *self.customer(n, c), round(rng.uniform(0.1, 12), 1)))
+        return TableData('SA_HomePageAppFunnelCustomers',
+                         ('employee_id', 'customer_id', 'customername', 'contactnumber', 'LastOpened'), rows)
+
+    def customer_page_customers(self):
+        """Target customers per layer and metric with the SKUs to pitch (repeated across metrics)"""
+        rng = self.rng('SA_CustomerPageCustomers')
+        rows = []
+        for n, executive in enumerate(self.roster):
+            for layer, share in (('day', 0.4), ('week', 0.7)):
+                for c in range(self.customers):
+                    if rng.random() >= share:
+                        continue
+                    customer = self.customer(n, c)
+                    for metric in rng.sample(list(TARGET_METRICS), rng.randint(1, 3)):
+                        for sku_index in self.customer_skus(rng, rng.randint(1, 4)):
+                            rows.append((executive['employee_id'], layer, metric, *customer, *self.sku(sku_index)))
+        return TableData('SA_CustomerPageCustomers', ('employee_id', 'layer', 'metric', 'customer_id', 'customername',
+                                                      'contactnumber', 'skuid', 'Sku'), rows)
+
+    def attention(self):
+        """Customers needing attention, with per-SKU delivery records over the last few days"""
+        rng = self.rng('SA_CustomerPageAttention')
+        rows = []
+        for n, executive in enumerate(self.roster):
+            for c in range(self.customers):
+                if rng.random() >= 0.25:
+                    continue
+                customer = self.customer(n, c)
+                # A few rows are not assigned to an executive; their metrics show for everyone
+                employee_id = executive['employee_id'] if rng.random() < 0.97 else None
+                for metric in rng.sample(ATTENTION_METRICS, rng.randint(1, 2)):
+                    for sku_index in self.customer_skus(rng, rng.randint(1, 4)):
+                        for d in range(rng.randint(1, 3)):
+                            ordered = round(rng.uniform(5, 120), 2)
+                            billed = round(ordered * rng.uniform(0.7, 1.0), 2)
+                            returned = round(billed * rng.uniform(0, 0.15), 2)
+                            reach = datetime.time(rng.randint(6, 13), rng.randint(0, 59))
+                            rows.append((employee_id, *customer, metric, *self.sku(sku_index), ordered, billed,
+                                         round(billed - returned, 2), returned, round(rng.uniform(-2, 2), 2),
+                                         reach, int(reach.hour < 10), self.today - datetime.timedelta(days=d + 1)))
+        return TableData('SA_CustomerPageAttention', (
+            'employee_id', 'customer_id', 'customername', 'contactnumber', 'metric', 'skuid', 'skuname', 'orderkg',
+            'billedkg', 'salekg', 'returnkg', 'readjustmentkg', 'shopreachtime', 'ontime', 'date'), rows)
+
+    def todays_orders(self):
+        rng = self.rng('SA_CustomerPageTodayOrders')
+        rows = []
+        midnight = datetime.datetime.combine(self.today, datetime.time())
+        for n, executive in enumerate(self.roster):
+            for c in range(self.customers):
+                if rng.random() >= 0.35:
+                    continue
+                customer = self.customer(n, c)
+                layer = rng.choices(TODAYS_ORDER_LAYERS, (2, 6, 2))[0]
+                ordered_at = midnight + datetime.timedelta(minutes=rng.randint(5 * 60, 22 * 60))
+                for sku_index in self.customer_skus(rng, rng.randint(1, 6)):
+                    qty = rng.randint(1, 20)
+                    rows.append((executive['employee_id'], layer, *customer, ordered_at, *self.sku(sku_index), qty,
+                                 round(qty * rng.choice((1, 5, 10, 25)), 2), self.today))
+        return TableData('SA_CustomerPageTodayOrders', (
+            'employee_id', 'layer', 'customer_id', 'customername', 'contactnumber', 'ordertime', 'skuid', 'Sku',
+            'orderqty', 'orderkg', 'date'), rows)
+
+    def base_customers(self):
+        rng = self.rng('SA_CustomerPageBase')
+        types, type_weights = zip(*CUSTOMER_TYPES)
+        natures, nature_weights = zip(*CUSTOMER_NATURES)
+        rows = []
+        for n, executive in enumerate(self.roster):
+            for c in range(self.customers):
+                nature = rng.choices(natures, nature_weights)[0]
+                last_order = self.today - datetime.timedelta(
+                    days=rng.randint(30, 120) if nature == 'Dormant' else rng.randint(0, 14))
+                subscribed = rng.random() < 0.6
+                rows.append((executive['employee_id'], *self.customer(n, c), rng.choices(types, type_weights)[0],
+                             nature, f"{executive['city']} {rng.choice(('North', 'South', 'East', 'West'))}",
+                             f"{executive['city']} DC {rng.randint(1, 3)}", executive['cluster'],
+                             self.today + datetime.timedelta(days=rng.randint(-30, 180)) if subscribed else None,
+                             round(rng.uniform(499, 4999), 2) if subscribed else None,
+                             last_order if rng.random() < 0.95 else None))
+        return TableData('SA_CustomerPageBase', (
+            'employee_id', 'customer_id', 'customername', 'contactnumber', 'customertype', 'customernature',
+            'locality', 'facility', 'cluster', 'latestsubscriptionenddate', 'latestsubscriptionamount', 'LOD'), rows)
+
+    def notifications(self):
+        rng = self.rng('SA_AppNotification')
+        rows = []
+        for n in range(25):
+            # A few are scheduled for later and must not show yet
+            day = self.today + datetime.timedelta(days=rng.randint(-30, 0) if n < 22 else rng.randint(1, 10))
+            rows.append((day, f"Notification {n + 1}", f"Synthetic announcement number {n + 1}.",
+                         rng.choice((2, 3, 5, 6, 8, 9))))
+        return TableData('SA_AppNotification', ('date', 'heading', 'description', 'priority'), rows)
+
+    def logins(self):
+        """Most executives already signed up, so both signup and login paths get traffic"""
+        rng = self.rng('SalesExecutiveApp_Login')
+        password_hash = hash_password(FIXTURE_PASSWORD)
+        rows = [
+            (executive['employee_id'], password_hash, executive['name'],
+             f"{executive['employee_id'].lower()}@example.com", ROLE)
+            for executive in self.roster if rng.random() < 0.8
+        ]
+        return TableData('SalesExecutiveApp_Login', ('employee_id', 'password_hash', 'full_name', 'email', 'role'),
+                         rows)
+
+
+def production_database_error(config=DB_CONFIG):
+    """Why tooling must not write to the configured database, or None"""
+    missing = [name for name in DB_ENV_VARS if name not in os.environ]
+    if missing:
+        return f"Set {', '.join(missing)} to the local database first (the defaults are production)"
+    for key, value in PRODUCTION_DB.items():
+        if str(config[key]).strip().lower() == value:
+            return f"{key} {config[key]} is the production datalake"
+    return None
+
+
+def existing_tables(connection):
+    """Fixture tables the database already has"""
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SHOW TABLES")
+        return sorted(set(FIXTURE_TABLES) & {row[0] for row in cursor.fetchall()})
+    finally:
+        cursor.close()
+
+
+def create_database(config):
+    """Create the configured database if the server doesn't have it yet"""
+    server_config = {key: value for key, value in config.items() if key != 'database'}
+    connection = mysql.connector.connect(**server_config)
+    try:
+        cursor = connection.cursor()
+        cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{config['database']}`")
+        cursor.close()
+    finally:
+        connection.close()
+
+
+def create_tables(connection):
+    """Drop and recreate every fixture table"""
+    cursor = connection.cursor()
+    for table, ddl in FIXTURE_TABLES.items():
+        cursor.execute(f"DROP TABLE IF EXISTS `{table}`")
+        cursor.execute(ddl)
+        print(f"   [OK] {table}")
+    cursor.close()
+
+
+def insert_table(connection, data, batch_size=INSERT_BATCH_SIZE):
+    """Insert a TableData in multi-row batches; returns the row count"""
+    cursor = connection.cursor()
+    query = (f"INSERT INTO `{data.table}` ({', '.join(f'`{column}`' for column in data.columns)}) "
+             f"VALUES ({', '.join(['%s'] * len(data.columns))})")
+    try:
+        for start in range(0, len(data.rows), batch_size):
+            cursor.executemany(query, data.rows[start:start + batch_size])
+        connection.commit()
+    finally:
+        cursor.close()
+    return len(data.rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--executives', type=int, default=50)
+    parser.add_argument('--customers', type=int, default=40, help='customers per executive')
+    parser.add_argument('--skus', type=int, default=30, help='SKUs in the catalogue')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--days', type=int, default=7, help='days of daily target history')
+    parser.add_argument('--weeks', type=int, default=4, help='weeks of weekly target history')
+    parser.add_argument('--schema-only', action='store_true', help='create empty tables')
+    parser.add_argument('--drop-existing', action='store_true', help='drop fixture tables left by an earlier run')
+    args = parser.parse_args()
+
+    error = production_database_error()
+    if error:
+        print(f"[ERROR] {error}")
+        sys.exit(1)
+
+    print(f"🗄️  Fixture database: {DB_CONFIG['database']} @ {DB_CONFIG['host']}:{DB_CONFIG['port']}")
+    try:
+        create_database(DB_CONFIG)
+        connection = mysql.connector.connect(**DB_CONFIG)
+    except Error as e:
+        print(f"[ERROR] Could not connect: {e}")
+        sys.exit(1)
+
+    try:
+        existing = existing_tables(connection)
+        if existing and not args.drop_existing:
+            print(f"[ERROR] {DB_CONFIG['database']} already has {', '.join(existing)}; "
+                  "pass --drop-existing to replace them")
+            sys.exit(1)
+
+        print("\n1. Creating tables...")
+        create_tables(connection)
+        if args.schema_only:
+            return
+
+        print(f"\n2. Seeding {args.executives} executives x {args.customers} customers x {args.skus} SKUs "
+              f"(seed {args.seed})...")
+        data = SyntheticData(args.executives, args.customers, args.skus, args.seed, args.days, args.weeks)
+        total = 0
+        for table in data.tables():
+            started = time.perf_counter()
+            count = insert_table(connection, table)
+            total += count
+            print(f"   [OK] {table.table}: {count:,} rows ({time.perf_counter() - started:.1f}s)")
+
+        print(f"\n[OK] {total:,} rows. Log in as {data.executive_ids()[0]} / {FIXTURE_PASSWORD}")
+    except Error as e:
+        print(f"[ERROR] Database error: {e}")
+        sys.exit(1)
+    finally:
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()
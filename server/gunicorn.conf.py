@@ -0,0 +1,29 @@
+"""
+Gunicorn settings for the Flask backend (picked up automatically when
+gunicorn is started from the server directory)
+
+Each worker builds its own database pool after fork, sized to an equal
+share of DB_CONNECTION_BUDGET, so adding workers never raises the total
+number of connections to MySQL.
+"""
+
+import os
+
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+
+
+def on_starting(server):
+    """Start /metrics totals from zero: drop worker snapshots left by the last run"""
+    from metrics import clear_metrics_dir
+
+    clear_metrics_dir()
+
+
+def post_fork(server, worker):
+    """Set up this worker's connection pool and run its readiness check"""
+    import app
+
+    app.init_worker(workers=server.cfg.workers)
+    server.log.info("Worker %s ready=%s", worker.pid, app.worker_status['ready'])
@@ -0,0 +1,118 @@
+"""
+Home page bootstrap
+Runs the independent home page sections concurrently on a small shared
+worker pool and collects whatever finished within the deadline
+"""
+
+import concurrent.futures
+import contextvars
+import os
+import time
+
+# Shared by all requests so home page fan-out can never hold more DB
+# connections than this, however many users open the app at once.
+# 0 sizes it from the worker's connection share (see configure_home_executor)
+HOME_MAX_WORKERS = int(os.environ.get('HOME_MAX_WORKERS', 0))
+
+# Sections one request runs at a time, so a single page load can't take
+# every shared thread and make other requests' sections queue behind it
+HOME_REQUEST_CONCURRENCY = int(os.environ.get('HOME_REQUEST_CONCURRENCY', 2))
+
+# A section still running this many seconds after it started is reported as
+# timed out; one that hasn't started after twice that gives up unrun
+HOME_SECTION_TIMEOUT = float(os.environ.get('HOME_SECTION_TIMEOUT', 8.0))
+
+home_executor = concurrent.futures.ThreadPoolExecutor(
+    max_workers=HOME_MAX_WORKERS or 2,
+    thread_name_prefix='home-section'
+)
+
+
+def configure_home_executor(connections):
+    """Replace the shared pool with one sized for this worker's DB connections.
+
+    Called from init_worker after fork. Unless HOME_MAX_WORKERS is set, home
+    sections get half of the worker's connections and request threads keep
+    the rest.
+    """
+    global home_executor
+    previous = home_executor
+    size = HOME_MAX_WORKERS or max(1, connections // 2)
+    home_executor = concurrent.futures.ThreadPoolExecutor(max_workers=size, thread_name_prefix='home-section')
+    previous.shutdown(wait=False)
+    return size
+
+
+def _timed(loader, name, started_at):
+    """Run a section loader and return (payload, error, elapsed_ms)"""
+    started = started_at[name] = time.perf_counter()
+    try:
+        return loader(), None, (time.perf_counter() - started) * 1000
+    except Exception as e:
+        return None, e, (time.perf_counter() - started) * 1000
+
+
+def run_sections(sections, timeout=HOME_SECTION_TIMEOUT, executor=None, concurrency=None):
+    """Run {name: zero-arg loader} concurrently.
+
+    Returns (data, errors, timings_ms). At most ``concurrency`` sections of
+    this call run at once, and each one's ``timeout`` counts from when it
+    started rather than from when it was queued. A failing or slow section
+    only lands in ``errors``; every other section is still returned.
+    """
+    executor = executor or home_executor
+    concurrency = max(1, concurrency or HOME_REQUEST_CONCURRENCY)
+    give_up_at = time.perf_counter() + 2 * timeout
+    queued = list(sections.items())
+    started_at = {}   # section name -> perf_counter() when its loader began
+    running = {}
+    data, errors, timings = {}, {}, {}
+
+    def submit_queued():
+        while queued and len(running) < concurrency:
+            name, loader = queued.pop(0)
+            # Each section runs in a copy of the caller's context so its DB time counts toward the request
+            future = executor.submit(contextvars.copy_context().run, _timed, loader, name, started_at)
+            running[future] = name
+
+    submit_queued()
+    while running:
+        deadlines = [started_at[name] + timeout for name in running.values() if name in started_at]
+        unstarted = len(deadlines) < len(running)
+        if queued or unstarted:
+            # Sections that haven't started give up at give_up_at; a submitted
+            # one that couldn't be cancelled is about to record its start
+            deadlines.append(give_up_at if time.perf_counter() < give_up_at else time.perf_counter() + 0.001)
+        wait_for = min(deadlines) - time.perf_counter()
+        done, _ = concurrent.futures.wait(
+            running, timeout=max(0.0, wait_for), return_when=concurrent.futures.FIRST_COMPLETED
+        )
+        for future in done:
+            name = running.pop(future)
+            payload, error, timings[name] = future.result()
+            if error is None:
+                data[name] = payload
+            else:
+                errors[name] = str(error)
+
+        now = time.perf_counter()
+        for future, name in list(running.items()):
+            started = started_at.get(name)
+            if started is not None and now - started >= timeout:
+                # Running sections finish in the background; the response doesn't wait
+                del running[future]
+                errors[name] = f'Timed out after {timeout:.1f}s'
+                timings[name] = timeout * 1000
+            elif started is None and now >= give_up_at and future.cancel():
+                del running[future]
+                errors[name] = 'Not started: home section pool busy'
+                timings[name] = 0.0
+
+        if now >= give_up_at:
+            for name, _ in queued:
+                errors[name] = 'Not started: home section pool busy'
+                timings[name] = 0.0
+            queued.clear()
+        submit_queued()
+
+    return data, errors, {name: round(ms, 1) for name, ms in timings.items()}
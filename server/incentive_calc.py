@@ -0,0 +1,312 @@
+"""
+Slab incentive calculator
+Evaluates the slab1/slab2/slab3 incentive ladder in Python over flat
+target/achievement rows, in column-oriented batches, so MySQL only has
+to return a plain join instead of running the CASE ladder itself
+"""
+
+from array import array
+
+# SQL NULL is represented as NaN inside the column arrays. Every comparison
+# against NaN is False, which is exactly how the SQL CASE ladder treats NULL.
+NULL = float('nan')
+
+SLAB_SEGMENTS = ('slab1', 'slab2', 'slab3')
+
+# Variable pay is monthly; a day is 1/31 of it and a week 7/31
+DAILY_PAY_DAYS = 1
+WEEKLY_PAY_DAYS = 7
+
+# Flat row layout returned by the slab row queries below
+COL_EMPLOYEE_ID = 0
+COL_METRIC = 1
+COL_SLAB_SEGMENT = 2
+COL_TARGET = 3
+COL_INCENTIVE_PERCENT = 4
+COL_ACHIEVEMENT = 5
+COL_VARIABLE_PAY = 6
+COL_UNIT = 7
+
+EMPTY_INCENTIVES = {
+    'max_target': 0,
+    'achieved_amount': 0,
+    'remaining_amount': 0,
+    'slab1_target': 0,
+    'slab2_target': 0,
+    'slab3_target': 0
+}
+
+_SLAB_ROWS_SELECT = """
+    SELECT
+        {t}.employee_id,
+        {t}.metric,
+        {t}.slab_segment,
+        {t}.target,
+        {t}.incentive_percent,
+        {a}.Achievement,
+        e.variable_pay,
+        {t}.unit
+    FROM {target_table} {t}
+    LEFT JOIN {achievement_table} {a}
+        ON {t}.{period_col} = {a}.{period_col}
+        AND {t}.metric = {a}.metric
+        AND {t}.employee_id = {a}.employee_id
+    LEFT JOIN Executive e
+        ON e.employee_id = {t}.employee_id
+    WHERE {t}.{period_col} = {period_value}"""
+
+_DAILY_SLAB_ROWS = _SLAB_ROWS_SELECT.format(
+    t='dt', a='da', target_table='DayTargets', achievement_table='DayAchievement',
+    period_col='date', period_value='CURDATE()'
+)
+_WEEKLY_SLAB_ROWS = _SLAB_ROWS_SELECT.format(
+    t='wt', a='wa', target_table='WeekTargets', achievement_table='WeekAchievement',
+    period_col='yearweek', period_value='YEARWEEK(CURDATE() + INTERVAL 1 DAY, 1)'
+)
+
+# All employees - used by the incentive snapshots
+DAILY_SLAB_ROWS_QUERY = _DAILY_SLAB_ROWS
+WEEKLY_SLAB_ROWS_QUERY = _WEEKLY_SLAB_ROWS
+
+# One employee - used by the targets endpoints
+DAILY_EMPLOYEE_SLAB_ROWS_QUERY = _DAILY_SLAB_ROWS + "\n      AND dt.employee_id = %s"
+WEEKLY_EMPLOYEE_SLAB_ROWS_QUERY = _WEEKLY_SLAB_ROWS + "\n      AND wt.employee_id = %s"
+
+
+def _to_float(value):
+    """Driver value (Decimal, int, float or None) to float, NULL as NaN"""
+    return NULL if value is None else float(value)
+
+
+def _or_zero(value):
+    """NaN/NULL to 0 - matches the endpoints' `float(x) if x else 0`"""
+    return value if value == value else 0
+
+
+class SlabBatch:
+    """Column-oriented batch of (employee_id, metric) groups.
+
+    Each group collapses its slab rows with MAX(), mirroring the GROUP BY
+    employee_id, metric stage of the SQL: the overall target, achievement
+    and max variable pay, plus the target and pay of each slab.
+    """
+
+    def __init__(self):
+        self.keys = []
+        self.index = {}
+        self.units = []
+        self.target = array('d')
+        self.achievement = array('d')
+        self.max_pay = array('d')
+        self.slab_target = (array('d'), array('d'), array('d'))
+        self.slab_pay = (array('d'), array('d'), array('d'))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _group(self, key):
+        i = self.index.get(key)
+        if i is None:
+            i = len(self.keys)
+            self.index[key] = i
+            self.keys.append(key)
+            self.units.append('')
+            for column in (self.target, self.achievement, self.max_pay) + self.slab_target + self.slab_pay:
+                column.append(NULL)
+        return i
+
+
+def _max_into(column, i, value):
+    """MAX() aggregate step - NULL inputs are ignored"""
+    if value == value:
+        current = column[i]
+        if not current >= value:  # also true when current is NULL
+            column[i] = value
+
+
+def build_batch(rows, pay_days):
+    """Group flat slab rows (see COL_* layout, unit optional) into a SlabBatch"""
+    batch = SlabBatch()
+    slab_slots = {segment: n for n, segment in enumerate(SLAB_SEGMENTS)}
+    target_col, achievement_col, max_pay_col = batch.target, batch.achievement, batch.max_pay
+    slab_target, slab_pay = batch.slab_target, batch.slab_pay
+    units = batch.units
+
+    for row in rows:
+        i = batch._group((row[COL_EMPLOYEE_ID], row[COL_METRIC]))
+        if len(row) > COL_UNIT:
+            units[i] = row[COL_UNIT]
+
+        target = _to_float(row[COL_TARGET])
+        variable_pay = _to_float(row[COL_VARIABLE_PAY]) / 31 * pay_days
+        pay = variable_pay * _to_float(row[COL_INCENTIVE_PERCENT])
+
+        _max_into(target_col, i, target)
+        _max_into(achievement_col, i, _to_float(row[COL_ACHIEVEMENT]))
+        _max_into(max_pay_col, i, pay)
+
+        slot = slab_slots.get(row[COL_SLAB_SEGMENT])
+        if slot is not None:
+            _max_into(slab_target[slot], i, target)
+            _max_into(slab_pay[slot], i, pay)
+
+    return batch
+
+
+def evaluate_slabs(batch):
+    """Evaluate the slab ladder for every group and return the earned amounts.
+
+    Mirrors the SQL CASE exactly, including NULL behaviour: a NULL
+    achievement falls through to the ELSE branch, and division by a zero
+    target yields NULL as MySQL does.
+    """
+    t1, t2, t3 = batch.slab_target
+    p1, p2, p3 = batch.slab_pay
+    earned = array('d', bytes(8 * len(batch)))
+
+    for i, achieved in enumerate(batch.achievement):
+        if achieved <= t1[i]:
+            target, pay = t1[i], p1[i]
+        elif t1[i] <= achieved <= t2[i]:
+            target, pay = t2[i], p2[i]
+        elif t2[i] <= achieved <= t3[i]:
+            target, pay = t3[i], p3[i]
+        else:
+            earned[i] = p3[i]
+            continue
+        earned[i] = achieved / target * pay if target != 0 else NULL
+
+    return earned
+
+
+def metric_results(batch, earned=None):
+    """Per-metric target rows for one employee, in the targets API shape"""
+    if earned is None:
+        earned = evaluate_slabs(batch)
+
+    t1, t2, t3 = batch.slab_target
+    results = []
+    for i, (employee_id, metric) in enumerate(batch.keys):
+        results.append({
+            'metric': metric,
+            'unit': batch.units[i],
+            'target': _or_zero(batch.target[i]),
+            'achieved': _or_zero(batch.achievement[i]),
+            'slab1_target': _or_zero(t1[i]),
+            'slab2_target': _or_zero(t2[i]),
+            'slab3_target': _or_zero(t3[i]),
+            # MAX(max_variable_pay) - IFNULL(earned, 0)
+            'incentive_pending': _or_zero(batch.max_pay[i] - _or_zero(earned[i]))
+        })
+
+    results.sort(key=lambda result: result['metric'])
+    return results
+
+
+def employee_incentives(batch, earned=None):
+    """Overall incentive summary per employee, in the incentives API shape"""
+    if earned is None:
+        earned = evaluate_slabs(batch)
+
+    p1, p2, p3 = batch.slab_pay
+    totals = {}
+    for i, (employee_id, metric) in enumerate(batch.keys):
+        # SUM() ignores NULL, and an all-NULL sum is reported as 0
+        sums = totals.get(employee_id)
+        if sums is None:
+            sums = totals[employee_id] = [0.0, 0.0, 0.0, 0.0, 0.0]
+        sums[0] += _or_zero(batch.max_pay[i])
+        sums[1] += _or_zero(earned[i])
+        sums[2] += _or_zero(p1[i])
+        sums[3] += _or_zero(p2[i])
+        sums[4] += _or_zero(p3[i])
+
+    return {
+        employee_id: {
+            'max_target': max_target,
+            'achieved_amount': achieved,
+            'remaining_amount': max_target - achieved,
+            'slab1_target': slab1,
+            'slab2_target': slab2,
+            'slab3_target': slab3
+        }
+        for employee_id, (max_target, achieved, slab1, slab2, slab3) in totals.items()
+    }
+
+
+# ============================================================================
+# SQL REFERENCE - the original CASE ladder, kept for the benchmark and the
+# golden comparison in test_incentive_calc.py. Not used by the API.
+# ============================================================================
+
+_REFERENCE_SQL = """SELECT
+    employee_id,
+    sum(max_variable_pay) as max_variable_pay,
+    sum(Achievement) as Achievement,
+    sum(slab1_target) as slab1_target,
+    sum(slab2_target) as slab2_target,
+    sum(slab3_target) as slab3_target
+FROM
+(SELECT
+    employee_id,
+    metric,
+    MAX(max_variable_pay) AS max_variable_pay,
+    MAX(CASE WHEN slab_segment = 'slab1' THEN variable_pay * incentive_percent END) AS slab1_target,
+    MAX(CASE WHEN slab_segment = 'slab2' THEN variable_pay * incentive_percent END) AS slab2_target,
+    MAX(CASE WHEN slab_segment = 'slab3' THEN variable_pay * incentive_percent END) AS slab3_target,
+    CASE
+        WHEN MAX(Achievement) <= MAX(CASE WHEN slab_segment = 'slab1' THEN target END)
+            THEN (MAX(Achievement) / MAX(CASE WHEN slab_segment = 'slab1' THEN target END))
+                 * MAX(CASE WHEN slab_segment = 'slab1' THEN variable_pay * incentive_percent END)
+
+        WHEN MAX(Achievement) BETWEEN MAX(CASE WHEN slab_segment = 'slab1' THEN target END) AND MAX(CASE WHEN slab_segment = 'slab2' THEN target END)
+            THEN (MAX(Achievement) / MAX(CASE WHEN slab_segment = 'slab2' THEN target END))
+                 * MAX(CASE WHEN slab_segment = 'slab2' THEN variable_pay * incentive_percent END)
+
+        WHEN MAX(Achievement) BETWEEN MAX(CASE WHEN slab_segment = 'slab2' THEN target END) AND MAX(CASE WHEN slab_segment = 'slab3' THEN target END)
+            THEN (MAX(Achievement) / MAX(CASE WHEN slab_segment = 'slab3' THEN target END))
+                 * MAX(CASE WHEN slab_segment = 'slab3' THEN variable_pay * incentive_percent END)
+
+        ELSE MAX(CASE WHEN slab_segment = 'slab3' THEN variable_pay * incentive_percent END)
+    END AS Achievement
+FROM (
+    SELECT
+        {t}.employee_id,
+        {t}.{period_col},
+        {t}.metric,
+        {t}.incentive_percent,
+        ({variable_pay}) * {t}.incentive_percent as max_variable_pay,
+        ({variable_pay}) AS variable_pay,
+        {t}.contribution,
+        {t}.slab_segment,
+        MAX({t}.target) AS target,
+        MAX({a}.Achievement) AS Achievement
+    FROM {target_table} {t}
+    LEFT JOIN {achievement_table} {a}
+        ON {t}.{period_col} = {a}.{period_col}
+        AND {t}.metric = {a}.metric
+        AND {t}.employee_id = {a}.employee_id
+    LEFT JOIN Executive e
+        ON e.employee_id = {t}.employee_id
+    WHERE {t}.{period_col} = {period_value}
+    GROUP BY
+        {t}.employee_id,
+        {t}.{period_col},
+        {t}.metric,
+        e.variable_pay,
+        {t}.contribution,
+        {t}.slab_segment,
+        {t}.incentive_percent
+) AS base
+GROUP BY employee_id, metric) base1
+GROUP BY employee_id"""
+
+REFERENCE_DAILY_INCENTIVES_QUERY = _REFERENCE_SQL.format(
+    t='dt', a='da', target_table='DayTargets', achievement_table='DayAchievement',
+    period_col='date', period_value='CURDATE()', variable_pay='(e.variable_pay / 31)'
+)
+REFERENCE_WEEKLY_INCENTIVES_QUERY = _REFERENCE_SQL.format(
+    t='wt', a='wa', target_table='WeekTargets', achievement_table='WeekAchievement',
+    period_col='yearweek', period_value='YEARWEEK(CURDATE() + INTERVAL 1 DAY, 1)',
+    variable_pay='(e.variable_pay / 31) * 7'
+)
@@ -0,0 +1,134 @@
+"""
+Incentive snapshot engine
+Computes slab incentives for every employee from one flat set-based
+fetch and serves per-employee lookups from an in-process snapshot
+"""
+
+import threading
+import time
+
+from mysql.connector import Error
+
+from db_access import stream_tuples
+from incentive_calc import EMPTY_INCENTIVES, build_batch, employee_incentives
+from structured_log import get_logger
+
+log = get_logger('incentives')
+
+# Snapshot lifetime in seconds - achievement tables are refreshed by batch jobs,
+# so a few minutes of staleness is invisible to the app
+SNAPSHOT_TTL_SECONDS = 300
+
+
+class SnapshotUnavailable(Exception):
+    """Raised when no snapshot exists and one could not be built"""
+
+
+class IncentiveSnapshot:
+    """Immutable result of one refresh - never mutated after it is published"""
+
+    __slots__ = ('incentives', 'built_at', 'build_ms')
+
+    def __init__(self, incentives, built_at, build_ms):
+        self.incentives = incentives
+        self.built_at = built_at
+        self.build_ms = build_ms
+
+
+class IncentiveSnapshotStore:
+    """Holds the latest snapshot for one period (daily or weekly).
+
+    Readers only ever dereference ``self._snapshot`` once, and a refresh
+    publishes a fully built snapshot with a single reference assignment,
+    so lookups never see a half-built result and never take a lock.
+    """
+
+    def __init__(self, name, query, pay_days, connection_factory, ttl_seconds=SNAPSHOT_TTL_SECONDS):
+        self.name = name
+        self.query = query
+        self.pay_days = pay_days
+        self.connection_factory = connection_factory
+        self.ttl_seconds = ttl_seconds
+        self._snapshot = None
+        self._refresh_lock = threading.Lock()
+
+    def get(self, employee_id):
+        """Return the incentive dict for an employee from the current snapshot"""
+        snapshot = self._snapshot
+
+        if snapshot is None:
+            snapshot = self._refresh_blocking()
+        elif time.monotonic() - snapshot.built_at > self.ttl_seconds:
+            # Serve the stale snapshot while a single background thread rebuilds it
+            self._refresh_in_background()
+
+        return snapshot.incentives.get(employee_id, EMPTY_INCENTIVES)
+
+    def refresh(self):
+        """Rebuild the snapshot from the database and publish it atomically"""
+        connection = self.connection_factory()
+        if not connection:
+            raise SnapshotUnavailable('Database connection failed')
+
+        rows = None
+        try:
+            started = time.monotonic()
+            # Streamed, so the whole team's rows are never held as one list
+            rows = stream_tuples(connection, self.query)
+            incentives = employee_incentives(build_batch(rows, self.pay_days))
+            finished = time.monotonic()
+        finally:
+            if connection.is_connected():
+                if rows:
+                    rows.close()
+                connection.close()
+
+        snapshot = IncentiveSnapshot(incentives, finished, (finished - started) * 1000)
+        self._snapshot = snapshot
+        log.info('Incentive snapshot built', snapshot=self.name, employees=len(incentives), build_ms=round(snapshot.build_ms))
+        return snapshot
+
+    def invalidate(self):
+        """Drop the current snapshot so the next lookup rebuilds it"""
+        self._snapshot = None
+
+    def status(self):
+        """Describe the current snapshot for the admin endpoint"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return {'name': self.name, 'loaded': False}
+
+        age = time.monotonic() - snapshot.built_at
+        return {
+            'name': self.name,
+            'loaded': True,
+            'employees': len(snapshot.incentives),
+            'age_seconds': round(age, 1),
+            'stale': age > self.ttl_seconds,
+            'build_ms': round(snapshot.build_ms, 1)
+        }
+
+    def _refresh_blocking(self):
+        with self._refresh_lock:
+            # Another thread may have finished the build while we waited
+            snapshot = self._snapshot
+            if snapshot is not None:
+                return snapshot
+            try:
+                return self.refresh()
+            except Error as e:
+                raise SnapshotUnavailable(str(e)) from e
+
+    def _refresh_in_background(self):
+        if not self._refresh_lock.acquire(blocking=False):
+            return  # A rebuild is already running
+
+        def run():
+            try:
+                self.refresh()
+            except (Error, SnapshotUnavailable) as e:
+                log.warning('Incentive snapshot refresh failed, serving stale data', snapshot=self.name, error=str(e))
+            finally:
+                self._refresh_lock.release()
+
+        threading.Thread(target=run, name=f'{self.name}-incentive-snapshot', daemon=True).start()
@@ -0,0 +1,76 @@
+"""
+Streaming JSON responses
+Opt-in mode (?stream=1 or an X-Stream-Response: 1 header) for the large
+list endpoints. Rows come off an unbuffered cursor and are formatted and
+encoded a chunk at a time, so memory stays flat however many rows there
+are, and the first bytes leave before the query has been fully read.
+
+The body carries the same fields as the buffered response. The list is
+written first and the scalar fields (count, success, ...) after it,
+because the count is only known at the end. If the database fails part
+way through, the body still closes as valid JSON with success false.
+"""
+
+from flask import Response, current_app, request
+from mysql.connector import Error
+
+from structured_log import get_logger
+
+log = get_logger('stream')
+
+STREAM_CHUNK_BYTES = 16 * 1024
+STREAM_HEADER = 'X-Stream-Response'
+
+
+def wants_stream():
+    """True when the client opted in to a streamed body"""
+    return (request.args.get('stream', '') in ('1', 'true')
+            or request.headers.get(STREAM_HEADER, '') in ('1', 'true'))
+
+
+def streamed_list_response(connection, rows, items, list_field, count_field=None, **fields):
+    """Response streaming ``{list_field: [...items], count_field: n, **fields, 'success': True}``.
+
+    ``rows`` is the RowStream from db_access.stream_rows and ``items`` the
+    formatted list items built from it. The response takes over
+    ``connection`` and closes it (after draining any unread rows) once
+    the body is written or the client goes away.
+    """
+    dumps = current_app.json.dumps
+
+    def release():
+        rows.close()
+        connection.close()
+
+    def generate():
+        count = 0
+        try:
+            chunk = ['{', dumps(list_field), ':[']
+            size = 0
+            try:
+                for item in items:
+                    encoded = dumps(item)
+                    chunk.append(',' + encoded if count else encoded)
+                    count += 1
+                    size += len(encoded)
+                    if size >= STREAM_CHUNK_BYTES:
+                        yield ''.join(chunk)
+                        chunk = []
+                        size = 0
+                tail = dict(fields, success=True)
+                if count_field:
+                    tail[count_field] = count
+                log.debug('Streamed list', field=list_field, count=count)
+            except Error as e:
+                log.error('Database error while streaming', field=list_field, count=count, error=str(e))
+                tail = {'success': False, 'message': 'Database error', 'error': str(e)}
+            chunk.append('],' + dumps(tail)[1:])
+            yield ''.join(chunk)
+        finally:
+            release()
+
+    response = Response(generate(), mimetype='application/json')
+    response.headers[STREAM_HEADER] = '1'
+    # Also runs if the body is never iterated; closing twice is harmless
+    response.call_on_close(release)
+    return response
@@ -0,0 +1,228 @@
+"""
+Leaderboard cache
+Holds the grouped, JSON-encoded leaderboard per (period, layer) once per
+process. Per-user responses splice the isCurrentUser marker into the
+shared encoded text instead of rebuilding the ranking list.
+"""
+
+import json
+import threading
+import time
+
+from structured_log import get_logger
+
+log = get_logger('leaderboard')
+
+LEADERBOARD_CACHE_TTL = 300
+
+# Only these keys are kept; anything else is built per request so arbitrary
+# query strings cannot grow the cache
+CACHEABLE_PERIODS = ('day', 'week')
+CACHEABLE_LAYERS = ('city', 'cluster')
+
+
+def _encode(value):
+    return json.dumps(value, separators=(',', ':'))
+
+
+def format_ranking(rank_data):
+    """LeaderBoard row to the API ranking shape (without isCurrentUser)"""
+    return {
+        'rank': int(rank_data['rank']),
+        'name': rank_data['name'],
+        'employee_id': rank_data['employee_id'],
+        'achievement': float(rank_data['achievement']) if rank_data['achievement'] is not None else 0.0,
+        'cluster': rank_data['cluster'] if rank_data['cluster'] else 'Unknown'
+    }
+
+
+class LeaderboardView:
+    """Immutable leaderboard for one (period, layer).
+
+    ``groups`` is a list of (cluster_name, rankings); the city layer has a
+    single group with no name. ``rankings_json`` is the encoded value of
+    the API 'rankings' field with every isCurrentUser false. ``positions``
+    maps employee_id to (group, index) pairs and ``spans`` to the matching
+    [start, end) offsets of their entries in the encoded text.
+    """
+
+    def __init__(self, period, layer, raw_rows):
+        self.period = period
+        self.layer = layer
+        self.grouped = layer == 'cluster'
+        self.built_at = time.monotonic()
+
+        if self.grouped:
+            grouped = {}
+            for rank_data in raw_rows:
+                grouped.setdefault(rank_data['layer_value'], []).append(format_ranking(rank_data))
+            self.groups = list(grouped.items())
+        else:
+            self.groups = [(None, [format_ranking(rank_data) for rank_data in raw_rows])]
+
+        self.count = sum(len(rankings) for _, rankings in self.groups)
+        self.positions = {}
+        for g, (_, rankings) in enumerate(self.groups):
+            for i, ranking in enumerate(rankings):
+                self.positions.setdefault(ranking['employee_id'], []).append((g, i))
+
+        self._encode_rankings()
+
+    def _encode_rankings(self):
+        parts = []
+        length = 0
+        spans = {}
+
+        def emit(text):
+            nonlocal length
+            parts.append(text)
+            length += len(text)
+
+        emit('[')
+        for g, (cluster_name, rankings) in enumerate(self.groups):
+            if g:
+                emit(',')
+            if self.grouped:
+                emit('{"cluster":' + _encode(cluster_name) + ',"rankings":[')
+            for i, ranking in enumerate(rankings):
+                if i:
+                    emit(',')
+                start = length
+                emit(_encode({**ranking, 'isCurrentUser': False}))
+                spans.setdefault(ranking['employee_id'], []).append((start, length))
+            if self.grouped:
+                emit(']}')
+        emit(']')
+
+        self.rankings_json = ''.join(parts)
+        self.spans = spans
+
+    def rankings_json_for(self, employee_id):
+        """Encoded 'rankings' value with the caller's entries marked"""
+        spans = self.spans.get(employee_id)
+        if not spans:
+            return self.rankings_json
+
+        pieces = []
+        cursor = 0
+        # spans and positions are recorded in the same order
+        for (start, end), (g, i) in zip(spans, self.positions[employee_id]):
+            pieces.append(self.rankings_json[cursor:start])
+            pieces.append(_encode({**self.groups[g][1][i], 'isCurrentUser': True}))
+            cursor = end
+        pieces.append(self.rankings_json[cursor:])
+        return ''.join(pieces)
+
+    def rankings_for(self, employee_id):
+        """Python 'rankings' value with the caller's entries marked"""
+        def overlay(rankings):
+            return [{**ranking, 'isCurrentUser': ranking['employee_id'] == employee_id} for ranking in rankings]
+
+        if self.grouped:
+            return [{'cluster': name, 'rankings': overlay(rankings)} for name, rankings in self.groups]
+        return overlay(self.groups[0][1])
+
+    def window_for(self, employee_id, top=0, around=0):
+        """'rankings' value cut down to the top rows plus a window around the caller.
+
+        Applied per cluster for the cluster layer. The caller's position
+        comes from the positions index, so no list is scanned.
+        """
+        mine = {}
+        for g, i in self.positions.get(employee_id, ()):
+            mine.setdefault(g, []).append(i)
+
+        def pick(g, rankings):
+            keep = set(range(min(top, len(rankings))))
+            for i in mine.get(g, ()):
+                keep.update(range(max(0, i - around), min(len(rankings), i + around + 1)))
+            return [
+                {**rankings[i], 'isCurrentUser': rankings[i]['employee_id'] == employee_id}
+                for i in sorted(keep)
+            ]
+
+        if self.grouped:
+            return [
+                {'cluster': name, 'rankings': pick(g, rankings), 'total': len(rankings)}
+                for g, (name, rankings) in enumerate(self.groups)
+            ]
+        return pick(0, self.groups[0][1])
+
+
+class LeaderboardCache:
+    """(period, layer) -> LeaderboardView with TTL and explicit invalidation.
+
+    ``loader(period, layer)`` returns the raw LeaderBoard rows. Only one
+    thread per key runs the loader; concurrent callers wait for its result.
+    """
+
+    def __init__(self, loader, ttl_seconds=LEADERBOARD_CACHE_TTL):
+        self.loader = loader
+        self.ttl_seconds = ttl_seconds
+        self._views = {}
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, period, layer):
+        key = (period, layer)
+        if period not in CACHEABLE_PERIODS or layer not in CACHEABLE_LAYERS:
+            return LeaderboardView(period, layer, self.loader(period, layer))
+
+        view = self.peek(period, layer)
+        if view is not None:
+            return view
+
+        with self._lock_for(key):
+            # Another request may have rebuilt it while we waited
+            view = self.peek(period, layer)
+            if view is not None:
+                return view
+            return self.store(period, layer, self.loader(period, layer))
+
+    def peek(self, period, layer):
+        """Fresh cached view, or None; never calls the loader"""
+        view = self._views.get((period, layer))
+        if view is not None and time.monotonic() - view.built_at <= self.ttl_seconds:
+            self.hits += 1
+            return view
+        return None
+
+    def store(self, period, layer, raw_rows):
+        """Build a view from rows loaded elsewhere (e.g. by the async app) and cache it"""
+        self.misses += 1
+        view = LeaderboardView(period, layer, raw_rows)
+        if period in CACHEABLE_PERIODS and layer in CACHEABLE_LAYERS:
+            self._views[(period, layer)] = view
+            log.info('Cached rankings', period=period, layer=layer, rankings=view.count)
+        return view
+
+    def invalidate(self, period=None, layer=None):
+        """Drop cached views matching period/layer (None matches all)"""
+        dropped = 0
+        for key in list(self._views):
+            if (period is None or key[0] == period) and (layer is None or key[1] == layer):
+                if self._views.pop(key, None) is not None:
+                    dropped += 1
+        return dropped
+
+    def status(self):
+        now = time.monotonic()
+        return {
+            'entries': [
+                {'period': period, 'layer': layer, 'rankings': view.count,
+                 'age_seconds': round(now - view.built_at, 1)}
+                for (period, layer), view in self._views.items()
+            ],
+            'hits': self.hits,
+            'misses': self.misses,
+            'ttl_seconds': self.ttl_seconds
+        }
+
+    def _lock_for(self, key):
+        with self._locks_guard:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+            return lock
@@ -0,0 +1,421 @@
+"""
+Prometheus metrics
+In-process counters and histograms rendered in the Prometheus text
+exposition format by GET /metrics. Request and query metrics are recorded
+by the request_timing hooks; pool, cache and event-ingest numbers are read
+from the objects' own counters when the endpoint is scraped, so a scrape
+never touches the database.
+
+Every gunicorn worker keeps its own numbers and a scrape is answered by
+whichever worker accepts it, so workers also write snapshots to
+METRICS_DIR and a scrape reports the sum over all of them (see
+SharedMetrics). Counters stay monotonic when a worker exits or a
+different worker answers the next scrape.
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+from structured_log import get_logger
+
+METRICS_PREFIX = 'sales_assistant'
+METRICS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS_SECONDS = (0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS_BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+log = get_logger('metrics')
+
+# Worker snapshots summed at scrape time (empty = report this worker only)
+METRICS_DIR = os.environ.get('METRICS_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'metrics_data'))
+METRICS_SYNC_INTERVAL = float(os.environ.get('METRICS_SYNC_INTERVAL', 5.0))
+
+# Distinct query labels kept; anything past this is reported as 'other'
+MAX_QUERY_TEMPLATES = 200
+
+_PLACEHOLDER_LIST = re.compile(r'%s(\s*,\s*%s)+')
+_FIRST_TABLE = re.compile(r'\b(?:FROM|INTO|UPDATE)\s+`?(\w+)', re.IGNORECASE)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    __slots__ = ('name', 'help', 'labelnames', '_values', '_lock')
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def family(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        samples = [(self.name, tuple(zip(self.labelnames, labels)), value) for labels, value in values]
+        return self.name, 'counter', self.help, samples
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set (bounds are upper bounds, +Inf is implied)"""
+
+    __slots__ = ('name', 'help', 'labelnames', 'bounds', '_series', '_lock')
+
+    def __init__(self, name, help, labelnames=(), bounds=LATENCY_BUCKETS_SECONDS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.bounds = bounds
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        bucket = len(self.bounds)
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                bucket = i
+                break
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # [per-bucket counts..., sum]
+                series = self._series[labels] = [0] * (len(self.bounds) + 1) + [0.0]
+            series[bucket] += 1
+            series[-1] += value
+
+    def family(self):
+        with self._lock:
+            series = sorted((labels, list(values)) for labels, values in self._series.items())
+        samples = []
+        for labels, values in series:
+            label_pairs = tuple(zip(self.labelnames, labels))
+            seen = 0
+            for bound, count in zip(self.bounds + (float('inf'),), values):
+                seen += count
+                samples.append((f'{self.name}_bucket', label_pairs + (('le', _format_value(bound)),), seen))
+            samples.append((f'{self.name}_sum', label_pairs, values[-1]))
+            samples.append((f'{self.name}_count', label_pairs, seen))
+        return self.name, 'histogram', self.help, samples
+
+
+class QueryTemplates:
+    """Maps SQL text to a short, bounded label for the query metrics.
+
+    Queries held in a ``*_QUERY`` constant of a registered module are named
+    after it (LEADERBOARD_QUERY -> leaderboard). Other statements get
+    <verb>_<first table>_<hash of the normalized text>, with IN-lists of
+    placeholders collapsed so the label doesn't change with the list length.
+    """
+
+    def __init__(self, max_templates=MAX_QUERY_TEMPLATES):
+        self.max_templates = max_templates
+        self._sources = []
+        self._labels = {}
+        self._lock = threading.Lock()
+
+    def add_source(self, namespace):
+        """Module globals to look up *_QUERY constants in (read on first use)"""
+        self._sources.append(namespace)
+
+    def label(self, query):
+        label = self._labels.get(query)
+        if label is not None:
+            return label
+        if isinstance(query, bytes):
+            query = query.decode('utf-8', 'replace')
+        label = self._constant_name(query) or self._derived_name(query)
+        with self._lock:
+            if len(set(self._labels.values())) >= self.max_templates and label not in self._labels.values():
+                return 'other'
+            self._labels[query] = label
+        return label
+
+    def _constant_name(self, query):
+        for namespace in self._sources:
+            for name, value in list(namespace.items()):
+                if name.endswith('_QUERY') and value == query:
+                    return name[:-len('_QUERY')].lower()
+        return None
+
+    def _derived_name(self, query):
+        normalized = _PLACEHOLDER_LIST.sub('%s, ...', ' '.join(query.split()))
+        verb = normalized.split(' ', 1)[0].lower() or 'query'
+        table = _FIRST_TABLE.search(normalized)
+        digest = hashlib.sha1(normalized.encode()).hexdigest()[:8]
+        return f"{verb}_{table.group(1) if table else 'sql'}_{digest}"
+
+
+def _render(families):
+    """Exposition text for (name, kind, help, [(sample name, ((label, value), ...), value)]) families"""
+    lines = []
+    for name, kind, help, samples in families:
+        lines.append(f'# HELP {name} {help}')
+        lines.append(f'# TYPE {name} {kind}')
+        for sample, labels, value in samples:
+            label_text = _format_labels(tuple(label for label, _ in labels), tuple(value for _, value in labels))
+            lines.append(f'{sample}{label_text} {_format_value(round(value, 6))}')
+    return '\n'.join(lines) + '\n'
+
+
+def _live(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class SharedMetrics:
+    """Per-worker snapshot files in one directory, summed when scraped.
+
+    Each worker rewrites its own file every ``interval`` seconds and right
+    before it answers a scrape. Counters and histograms are summed over
+    every file, including those of workers that have exited, so totals never
+    go down when gunicorn replaces a worker; gauges only count live workers.
+    The scraping worker folds files of exited workers into ``archive.json``.
+    """
+
+    ARCHIVE = 'archive.json'
+
+    def __init__(self, directory, interval=METRICS_SYNC_INTERVAL):
+        self.directory = directory
+        self.interval = interval
+        self._pid = None
+        self._path = None
+        self._started_at = None
+        self._thread = None
+        self._lock = threading.Lock()
+        # Held while reading this process's values and writing its file, so
+        # an older snapshot never replaces a newer one
+        self._write_lock = threading.Lock()
+
+    def start(self, registry):
+        """Start this process's snapshot thread (after fork); cheap once running"""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            self._started_at = time.time()
+            self._path = os.path.join(self.directory, f'worker-{os.getpid()}-{int(self._started_at * 1000)}.json')
+            self._thread = threading.Thread(target=self._sync_loop, args=(registry,), name='metrics-sync', daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def _sync_loop(self, registry):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.snapshot(registry)
+            except OSError as e:
+                log.warning('Could not write metrics snapshot', error=str(e))
+
+    def snapshot(self, registry):
+        """Write this process's current values to its file; returns them"""
+        with self._write_lock:
+            families = registry.families()
+            self._write_json(self._path, {'pid': os.getpid(), 'started_at': self._started_at, 'families': families})
+        return families
+
+    def merge(self, registry):
+        """This worker's families plus every other snapshot; returns (families, earliest start)"""
+        families = self.snapshot(registry)
+        totals = {}
+        started_at = [self._started_at]
+        self._add(totals, families, gauges=True)
+
+        lock_path = os.path.join(self.directory, '.lock')
+        with open(lock_path, 'a') as lock_file:
+            # One scrape at a time, so an exited worker is folded into the archive exactly once
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            archive = self._read(os.path.join(self.directory, self.ARCHIVE)) or {'folded': [], 'families': []}
+            folded = set(archive['folded'])
+            self._add(totals, archive['families'], gauges=False)
+            if archive.get('started_at'):
+                started_at.append(archive['started_at'])
+
+            exited = []
+            for name in sorted(os.listdir(self.directory)):
+                path = os.path.join(self.directory, name)
+                if not name.startswith('worker-') or path == self._path or name in folded:
+                    continue
+                snapshot = self._read(path)
+                if snapshot is None:
+                    continue
+                started_at.append(snapshot['started_at'])
+                live = _live(snapshot['pid'])
+                self._add(totals, snapshot['families'], gauges=live)
+                if not live:
+                    exited.append((name, snapshot))
+
+            if exited:
+                self._fold(archive, exited, min(started_at))
+        return self._families(totals), min(started_at)
+
+    def _fold(self, archive, exited, started_at):
+        archived = {}
+        self._add(archived, archive['families'], gauges=False)
+        for _, snapshot in exited:
+            self._add(archived, snapshot['families'], gauges=False)
+        archive = {
+            'folded': archive['folded'] + [name for name, _ in exited],
+            'started_at': started_at,
+            'families': self._families(archived)
+        }
+        # The archive lists what it folded, so a crash before the unlinks can't count a file twice
+        self._write_json(os.path.join(self.directory, self.ARCHIVE), archive)
+        for name, _ in exited:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+        archive['folded'] = []
+        self._write_json(os.path.join(self.directory, self.ARCHIVE), archive)
+
+    @staticmethod
+    def _add(totals, families, gauges):
+        for name, kind, help, samples in families:
+            if kind == 'gauge' and not gauges:
+                continue
+            family = totals.setdefault(name, (kind, help, {}))[2]
+            for sample, labels, value in samples:
+                key = (sample, tuple(tuple(pair) for pair in labels))
+                family[key] = family.get(key, 0) + value
+
+    @staticmethod
+    def _families(totals):
+        return [(name, kind, help, [(sample, labels, value) for (sample, labels), value in samples.items()])
+                for name, (kind, help, samples) in totals.items()]
+
+    @staticmethod
+    def _read(path):
+        try:
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write_json(path, data):
+        tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp, path)
+
+
+def clear_metrics_dir(directory=METRICS_DIR):
+    """Remove snapshots left by a previous run (called once before workers start)"""
+    if not directory or not os.path.isdir(directory):
+        return
+    for name in os.listdir(directory):
+        if name.endswith('.json') or name.endswith('.tmp'):
+            os.remove(os.path.join(directory, name))
+
+
+class MetricsRegistry:
+    """Counters and histograms recorded as requests run, plus collectors
+    called at scrape time that return (name, kind, help, samples) tuples"""
+
+    def __init__(self, prefix=METRICS_PREFIX, directory=METRICS_DIR):
+        self.prefix = prefix
+        self.started_at = time.time()
+        self.shared = SharedMetrics(directory) if directory else None
+        self.query_templates = QueryTemplates()
+        self._metrics = []
+        self._collectors = []
+
+        self.requests = self.counter(
+            'http_requests_total', 'HTTP requests by route, method and status', ('route', 'method', 'status'))
+        self.request_seconds = self.histogram(
+            'http_request_duration_seconds', 'Request latency up to the response headers', ('route', 'method'))
+        self.request_phase_seconds = self.counter(
+            'http_request_phase_seconds_total', 'Request time by phase (pool, query, fetch, transform, serialize)',
+            ('route', 'method', 'phase'))
+        self.response_bytes = self.histogram(
+            'http_response_size_bytes', 'Response body sizes (streamed bodies are not counted)', ('route', 'method'),
+            SIZE_BUCKETS_BYTES)
+        self.query_seconds = self.histogram(
+            'db_query_duration_seconds', 'Query execute time during requests by query template', ('query',))
+
+    def counter(self, name, help, labelnames=()):
+        metric = Counter(f'{self.prefix}_{name}', help, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, labelnames=(), bounds=LATENCY_BUCKETS_SECONDS):
+        metric = Histogram(f'{self.prefix}_{name}', help, labelnames, bounds)
+        self._metrics.append(metric)
+        return metric
+
+    def collector(self, collect):
+        """Register ``collect()`` to be called on every scrape; usable as a decorator"""
+        self._collectors.append(collect)
+        return collect
+
+    def observe_request(self, route, method, status, seconds, phases_seconds, size):
+        if self.shared is not None:
+            self.shared.start(self)
+        self.requests.inc((route, method, str(status)))
+        self.request_seconds.observe((route, method), seconds)
+        for phase, value in phases_seconds.items():
+            self.request_phase_seconds.inc((route, method, phase), value)
+        if size is not None:
+            self.response_bytes.observe((route, method), size)
+
+    def observe_query(self, query, seconds):
+        self.query_seconds.observe((self.query_templates.label(query),), seconds)
+
+    def families(self):
+        """This process's metrics and collector output as (name, kind, help, samples)"""
+        families = [metric.family() for metric in self._metrics]
+        for collect in self._collectors:
+            try:
+                collected = collect()
+            except Exception as e:
+                log.warning('Metrics collector failed', collector=getattr(collect, '__name__', collect), error=str(e))
+                continue
+            for name, kind, help, samples in collected:
+                name = f'{self.prefix}_{name}'
+                families.append((name, kind, help, [(name, tuple(labels.items()), value) for labels, value in samples]))
+        return families
+
+    def render(self):
+        if self.shared is not None:
+            self.shared.start(self)
+            families, started_at = self.shared.merge(self)
+        else:
+            families, started_at = self.families(), self.started_at
+        name = f'{self.prefix}_process_start_time_seconds'
+        started = (name, 'gauge', 'Unix time the oldest worker counted here started', [(name, (), round(started_at, 3))])
+        return _render([started] + families)
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,94 @@
+"""
+Keyset pagination
+?limit=&after= paging for the long customer lists. Each page continues
+from the sort key of the last row of the previous page (WHERE key > last
+ORDER BY key LIMIT n), so every page costs one index range read no matter
+how deep the client scrolls, and rows inserted or removed between pages
+don't shift the window.
+
+Cursors are opaque to clients: URL-safe base64 of the endpoint name and
+the key values. A cursor from one endpoint is rejected by the others.
+"""
+
+import base64
+import binascii
+import json
+
+PAGE_LIMIT_MAX = 500
+PAGE_ARGS_MESSAGE = f'limit must be 1-{PAGE_LIMIT_MAX} and after a cursor returned by this endpoint'
+
+
+class PageRequest:
+    __slots__ = ('limit', 'after', 'with_total')
+
+    def __init__(self, limit, after, with_total):
+        self.limit = limit
+        self.after = after
+        self.with_total = with_total
+
+
+def encode_cursor(kind, key):
+    payload = json.dumps([kind, *key], default=str, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(payload).rstrip(b'=').decode()
+
+
+def decode_cursor(kind, token, arity):
+    """Key tuple of a cursor issued by ``encode_cursor(kind, ...)``; ValueError if it isn't one"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError('invalid cursor')
+    if not isinstance(payload, list) or len(payload) != arity + 1 or payload[0] != kind:
+        raise ValueError('invalid cursor')
+    return tuple(payload[1:])
+
+
+def page_args(args, kind, arity):
+    """Parse ?limit=&after=&total= into a PageRequest, or None when no limit is given.
+
+    The total row count is returned on the first page unless total=0, and
+    on later pages only with total=1, since counting reads the whole list.
+    """
+    limit = args.get('limit')
+    if limit is None or limit == '':
+        return None
+
+    limit = int(limit)
+    if not 1 <= limit <= PAGE_LIMIT_MAX:
+        raise ValueError('limit out of range')
+
+    after = args.get('after') or None
+    if after is not None:
+        after = decode_cursor(kind, after, arity)
+
+    total = args.get('total', '')
+    with_total = total == '1' if total else after is None
+    return PageRequest(limit, after, with_total)
+
+
+def page_fields(kind, page, items, key, total=None):
+    """Trim the look-ahead and return (items, paging fields for the response).
+
+    ``items`` are in key order and the page holds ``limit`` distinct keys;
+    consecutive items with the same key (several rows of one customer)
+    count once, so a key is never split across pages.
+    """
+    keys = 0
+    previous = cut = None
+    for index, item in enumerate(items):
+        item_key = key(item)
+        if index == 0 or item_key != previous:
+            keys += 1
+            previous = item_key
+            if keys > page.limit:
+                cut = index
+                break
+    has_more = cut is not None
+    items = items[:cut]
+    fields = {
+        'hasMore': has_more,
+        'nextCursor': encode_cursor(kind, key(items[-1])) if has_more else None
+    }
+    if page.with_total:
+        fields['total'] = total
+    return items, fields
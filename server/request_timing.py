@@ -0,0 +1,344 @@
+"""
+Request timing
+Splits every request's wall time into phases - pool (waiting for a
+connection), query (cursor execute), fetch (reading rows), serialize
+(JSON encoding) and transform (everything else the view does) - and
+reports them three ways: a Server-Timing response header, one structured
+'request' log record per request, and a rolling per-route latency histogram
+served by the admin routes. Request, query-template and response size
+metrics for /metrics are recorded from the same hooks (see metrics).
+
+The current request's timer lives in a context variable, so code that
+never runs inside a request (snapshot refreshes, the event writer) pays
+nothing. Work handed to another thread is only counted when it runs in a
+copy of the request's context (see home_bootstrap). Phases of parallel
+sections add up, so they can exceed the total; transform is then 0.
+Streamed bodies are produced after the header is sent and are not
+included.
+"""
+
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, request
+from flask.json.provider import DefaultJSONProvider
+
+from metrics import registry as metrics
+from structured_log import get_logger
+
+# Phases in Server-Timing order; 'transform' is derived from the total
+PHASES = ('pool', 'query', 'fetch', 'transform', 'serialize')
+
+# Histogram bucket upper bounds in milliseconds (the last bucket is open)
+HISTOGRAM_BOUNDS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+HISTOGRAM_WINDOW_SECONDS = 60
+HISTOGRAM_WINDOWS = 15
+
+# One log record per request; set REQUEST_TIMING_LOG=0 to keep only the header and histogram
+REQUEST_TIMING_LOG = os.environ.get('REQUEST_TIMING_LOG', '1') == '1'
+
+_current = contextvars.ContextVar('request_timer', default=None)
+
+log = get_logger('timing')
+
+
+class RequestTimer:
+    """Seconds spent per phase by one request (thread-safe for fan-out)"""
+
+    __slots__ = ('started', 'phases', 'queries', 'closed', '_lock')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.queries = 0
+        self.closed = False
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds):
+        if self.closed:
+            return
+        with self._lock:
+            self.phases[name] += seconds
+
+    def count_query(self):
+        with self._lock:
+            self.queries += 1
+
+
+def current_timer():
+    return _current.get()
+
+
+@contextmanager
+def timed_request():
+    """Time the enclosed block as one request outside Flask (the ASGI routes)"""
+    timer = RequestTimer()
+    token = _current.set(timer)
+    try:
+        yield timer
+    finally:
+        _current.reset(token)
+
+
+def close_timer(timer):
+    """Stop ``timer``; (phases_ms, total_ms) with transform as the unaccounted rest"""
+    total_ms = (time.perf_counter() - timer.started) * 1000
+    timer.closed = True
+    phases_ms = {name: seconds * 1000 for name, seconds in timer.phases.items()}
+    phases_ms['transform'] = max(0.0, total_ms - sum(phases_ms.values()))
+    return phases_ms, total_ms
+
+
+@contextmanager
+def phase(name):
+    """Add the time spent in the block to the current request's ``name`` phase"""
+    timer = _current.get()
+    if timer is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(name, time.perf_counter() - started)
+
+
+class TimedCursor:
+    """Cursor proxy charging execute to 'query' and fetch* to 'fetch'"""
+
+    __slots__ = ('_cursor', '_timer')
+
+    def __init__(self, cursor, timer):
+        self._cursor = cursor
+        self._timer = timer
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def _timed(self, name, method, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            self._timer.add(name, time.perf_counter() - started)
+
+    def _query(self, method, operation, *args, **kwargs):
+        self._timer.count_query()
+        started = time.perf_counter()
+        try:
+            return method(operation, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            self._timer.add('query', elapsed)
+            metrics.observe_query(operation, elapsed)
+
+    def execute(self, operation, *args, **kwargs):
+        return self._query(self._cursor.execute, operation, *args, **kwargs)
+
+    def executemany(self, operation, *args, **kwargs):
+        return self._query(self._cursor.executemany, operation, *args, **kwargs)
+
+    def fetchone(self):
+        return self._timed('fetch', self._cursor.fetchone)
+
+    def fetchmany(self, *args, **kwargs):
+        return self._timed('fetch', self._cursor.fetchmany, *args, **kwargs)
+
+    def fetchall(self):
+        return self._timed('fetch', self._cursor.fetchall)
+
+
+def timed_cursor(cursor):
+    """Wrap ``cursor`` when called during a request; otherwise return it as is"""
+    timer = _current.get()
+    return cursor if timer is None else TimedCursor(cursor, timer)
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider charging jsonify's encoding to 'serialize'"""
+
+    def dumps(self, obj, **kwargs):
+        with phase('serialize'):
+            return super().dumps(obj, **kwargs)
+
+
+class RouteWindow:
+    __slots__ = ('buckets', 'count', 'errors', 'total_ms', 'max_ms', 'phase_ms')
+
+    def __init__(self):
+        self.buckets = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.phase_ms = dict.fromkeys(PHASES, 0.0)
+
+
+class RollingHistogram:
+    """Per-route latency histograms over the last ``windows`` x ``window_seconds``.
+
+    Requests land in the current window; windows older than the horizon
+    are dropped, so the numbers follow recent traffic without unbounded
+    growth.
+    """
+
+    def __init__(self, window_seconds=HISTOGRAM_WINDOW_SECONDS, windows=HISTOGRAM_WINDOWS,
+                 bounds=HISTOGRAM_BOUNDS_MS):
+        self.window_seconds = window_seconds
+        self.windows = windows
+        self.bounds = bounds
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def observe(self, route, total_ms, phases_ms, status):
+        window = int(time.time() // self.window_seconds)
+        bucket = len(self.bounds)
+        for i, bound in enumerate(self.bounds):
+            if total_ms <= bound:
+                bucket = i
+                break
+        with self._lock:
+            routes = self._windows.get(window)
+            if routes is None:
+                routes = self._windows[window] = {}
+                for old in [w for w in self._windows if w <= window - self.windows]:
+                    del self._windows[old]
+            stats = routes.get(route)
+            if stats is None:
+                stats = routes[route] = RouteWindow()
+            stats.buckets[bucket] += 1
+            stats.count += 1
+            stats.errors += status >= 500
+            stats.total_ms += total_ms
+            stats.max_ms = max(stats.max_ms, total_ms)
+            for name, ms in phases_ms.items():
+                stats.phase_ms[name] += ms
+
+    def _quantile(self, buckets, count, q):
+        """Upper bound of the bucket holding the q-th request (None past the last bound)"""
+        target = q * count
+        seen = 0
+        for i, n in enumerate(buckets):
+            seen += n
+            if seen >= target:
+                return self.bounds[i] if i < len(self.bounds) else None
+        return None
+
+    def snapshot(self):
+        now_window = int(time.time() // self.window_seconds)
+        merged = {}
+        with self._lock:
+            for window, routes in self._windows.items():
+                if window <= now_window - self.windows:
+                    continue
+                for route, stats in routes.items():
+                    total = merged.get(route)
+                    if total is None:
+                        total = merged[route] = RouteWindow()
+                    total.buckets = [a + b for a, b in zip(total.buckets, stats.buckets)]
+                    total.count += stats.count
+                    total.errors += stats.errors
+                    total.total_ms += stats.total_ms
+                    total.max_ms = max(total.max_ms, stats.max_ms)
+                    for name, ms in stats.phase_ms.items():
+                        total.phase_ms[name] += ms
+
+        return {
+            'window_seconds': self.window_seconds * self.windows,
+            'bucket_bounds_ms': list(self.bounds),
+            'routes': {
+                route: {
+                    'count': stats.count,
+                    'errors': stats.errors,
+                    'mean_ms': round(stats.total_ms / stats.count, 2),
+                    'max_ms': round(stats.max_ms, 2),
+                    'p50_ms': self._quantile(stats.buckets, stats.count, 0.5),
+                    'p95_ms': self._quantile(stats.buckets, stats.count, 0.95),
+                    'p99_ms': self._quantile(stats.buckets, stats.count, 0.99),
+                    'phase_mean_ms': {name: round(ms / stats.count, 2) for name, ms in stats.phase_ms.items()},
+                    'buckets': stats.buckets
+                }
+                for route, stats in sorted(merged.items())
+            }
+        }
+
+    def reset(self):
+        with self._lock:
+            self._windows.clear()
+
+
+histogram = RollingHistogram()
+
+
+def route_rule():
+    """'/api/targets/daily/<employee_id>' - the rule, not the concrete path"""
+    rule = request.url_rule
+    return rule.rule if rule is not None else '<unmatched>'
+
+
+def route_name():
+    return f"{request.method} {route_rule()}"
+
+
+def server_timing(phases_ms, total_ms, queries):
+    entries = []
+    for name in PHASES:
+        entry = f"{name};dur={phases_ms[name]:.1f}"
+        if name == 'query' and queries:
+            entry += f';desc="{queries} quer{"y" if queries == 1 else "ies"}"'
+        entries.append(entry)
+    entries.append(f"total;dur={total_ms:.1f}")
+    return ', '.join(entries)
+
+
+def install_request_timing(app):
+    """Register the timing hooks and JSON provider on a Flask app"""
+    app.json = TimedJSONProvider(app)
+
+    @app.before_request
+    def start_request_timer():
+        timer = RequestTimer()
+        g.request_timer_token = _current.set(timer)
+
+    @app.after_request
+    def finish_request_timer(response):
+        timer = _current.get()
+        if timer is None:
+            return response
+        phases_ms, total_ms = close_timer(timer)
+        total = total_ms / 1000
+
+        response.headers['Server-Timing'] = server_timing(phases_ms, total_ms, timer.queries)
+        route = route_name()
+        histogram.observe(route, total_ms, phases_ms, response.status_code)
+        metrics.observe_request(
+            route_rule(), request.method, response.status_code, total,
+            {name: ms / 1000 for name, ms in phases_ms.items()},
+            None if response.is_streamed else response.content_length
+        )
+
+        if REQUEST_TIMING_LOG:
+            log.info(
+                'request',
+                route=route,
+                path=request.path,
+                status=response.status_code,
+                total_ms=round(total_ms, 2),
+                queries=timer.queries,
+                **{f"{name}_ms": round(ms, 2) for name, ms in phases_ms.items()}
+            )
+        return response
+
+    @app.teardown_request
+    def clear_request_timer(error=None):
+        token = g.pop('request_timer_token', None)
+        if token is not None:
+            _current.reset(token)
+
+    return histogram
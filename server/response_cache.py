@@ -0,0 +1,157 @@
+"""
+Response cache
+Read-through cache for GET endpoints whose tables are only refreshed by
+batch jobs. Encoded response bodies are kept per (endpoint, view args,
+query args) with a per-endpoint TTL, a total size bound with LRU
+eviction, and a strong ETag so revalidating clients get a 304.
+"""
+
+import functools
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flask import make_response, request
+
+RESPONSE_CACHE_MAX_BYTES = 32 * 1024 * 1024
+RESPONSE_CACHE_TTL = 300
+
+# Clients may keep the body but must revalidate with If-None-Match every time
+CACHE_CONTROL = 'private, no-cache'
+
+
+def body_etag(body):
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+class CachedResponse:
+    __slots__ = ('body', 'etag', 'mimetype', 'stored_at', 'expires_at')
+
+    def __init__(self, body, mimetype, ttl):
+        self.body = body
+        self.etag = body_etag(body)
+        self.mimetype = mimetype
+        self.stored_at = time.monotonic()
+        self.expires_at = self.stored_at + ttl
+
+
+class ResponseCache:
+    """LRU map of cache key -> CachedResponse bounded by total body bytes.
+
+    Use ``cached(name, ttl)`` under ``@app.route``. Only 200 responses are
+    stored; errors always go back to the database on the next request.
+    A TTL can be overridden per endpoint with RESPONSE_CACHE_TTL_<NAME>.
+    """
+
+    def __init__(self, max_bytes=RESPONSE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.ttls = {}
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.evictions = 0
+
+    def cached(self, name, ttl=RESPONSE_CACHE_TTL):
+        ttl = float(os.environ.get(f'RESPONSE_CACHE_TTL_{name.upper()}', ttl))
+        self.ttls[name] = ttl
+
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(**view_args):
+                if self.max_bytes <= 0 or ttl <= 0:
+                    return view(**view_args)
+
+                key = (name, tuple(sorted(view_args.items())), tuple(sorted(request.args.items(multi=True))))
+                entry = self._get(key)
+                if entry is None:
+                    self.misses += 1
+                    response = make_response(view(**view_args))
+                    # Streamed bodies are never buffered into the cache
+                    if response.status_code != 200 or response.direct_passthrough or response.is_streamed:
+                        return response
+                    entry = CachedResponse(response.get_data(), response.mimetype, ttl)
+                    self._put(key, entry)
+                    state = 'MISS'
+                else:
+                    self.hits += 1
+                    state = 'HIT'
+
+                if request.if_none_match.contains(entry.etag):
+                    self.not_modified += 1
+                    response = make_response('', 304)
+                else:
+                    response = make_response(entry.body, 200)
+                    response.mimetype = entry.mimetype
+                response.set_etag(entry.etag)
+                response.headers['Cache-Control'] = CACHE_CONTROL
+                response.headers['X-Cache'] = state
+                return response
+
+            return wrapper
+
+        return decorator
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() >= entry.expires_at:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def _put(self, key, entry):
+        size = len(entry.body)
+        # One huge response must not flush everyone else's entries
+        if size > self.max_bytes // 4:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._size += size
+            while self._size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._size -= len(entry.body)
+
+    def invalidate(self, name=None, employee_id=None):
+        """Drop entries for an endpoint and/or employee (None matches all)"""
+        with self._lock:
+            keys = [
+                key for key in self._entries
+                if (name is None or key[0] == name)
+                and (employee_id is None or ('employee_id', employee_id) in key[1])
+            ]
+            for key in keys:
+                self._remove(key)
+        return len(keys)
+
+    def status(self):
+        with self._lock:
+            per_endpoint = {}
+            for (name, _, _), entry in self._entries.items():
+                stats = per_endpoint.setdefault(name, {'entries': 0, 'bytes': 0})
+                stats['entries'] += 1
+                stats['bytes'] += len(entry.body)
+            return {
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'max_bytes': self.max_bytes,
+                'endpoints': per_endpoint,
+                'ttl_seconds': self.ttls,
+                'hits': self.hits,
+                'misses': self.misses,
+                'not_modified': self.not_modified,
+                'evictions': self.evictions
+            }
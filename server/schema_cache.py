@@ -0,0 +1,123 @@
+"""
+Schema cache and projection registry
+Each endpoint that reads a batch-job table registers the exact columns
+it serializes. Column lists are loaded from information_schema once per
+process (and again on demand through the admin route) and every
+registered projection is validated against them, so queries select
+those columns only - wider upstream tables cost nothing extra - and
+column discovery costs nothing per request.
+"""
+
+import datetime
+import threading
+
+from db_access import ColumnMap, fetch_tuples
+from structured_log import get_logger
+
+log = get_logger('schema')
+
+COLUMNS_QUERY = """
+    SELECT TABLE_NAME, COLUMN_NAME
+    FROM information_schema.COLUMNS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN ({tables})
+    ORDER BY TABLE_NAME, ORDINAL_POSITION
+"""
+
+
+class Projection:
+    """Columns one endpoint reads from one table.
+
+    ``columns`` starts as the declared fields and is narrowed to the
+    ones the table actually has when the schema is loaded; fields the
+    table lacks then read as None, as they did with SELECT *.
+    """
+
+    __slots__ = ('table', 'fields', 'columns', 'missing')
+
+    def __init__(self, table, fields):
+        self.table = table
+        self.fields = tuple(fields)
+        self.columns = ColumnMap(*self.fields)
+        self.missing = ()
+
+    def select_list(self):
+        """Backquoted column list for a SELECT"""
+        return ', '.join(f"`{name}`" for name in self.columns.names)
+
+    def validate(self, available):
+        """Narrow ``columns`` to ``available``; returns the missing fields"""
+        if not available:
+            # Table not visible in information_schema - keep the declared fields
+            self.missing = ()
+            self.columns = ColumnMap(*self.fields)
+            return self.missing
+        names = [name for name in self.fields if name in available]
+        self.missing = tuple(name for name in self.fields if name not in available)
+        self.columns = ColumnMap(*(names or self.fields))
+        return self.missing
+
+
+class SchemaCache:
+    """table -> column names for every table with a registered projection"""
+
+    def __init__(self):
+        self.projections = []
+        self._columns = None
+        self._lock = threading.Lock()
+        self.loaded_at = None
+        self.loads = 0
+
+    @property
+    def tables(self):
+        return tuple(dict.fromkeys(projection.table for projection in self.projections))
+
+    def project(self, table, *fields):
+        """Register the columns an endpoint reads from ``table``"""
+        projection = Projection(table, fields)
+        self.projections.append(projection)
+        return projection
+
+    def columns_query(self):
+        """(query, params) reading the column lists of all registered tables"""
+        tables = self.tables
+        return COLUMNS_QUERY.format(tables=', '.join(['%s'] * len(tables))), tables
+
+    def refresh(self, connection):
+        """Reload the column lists over a mysql.connector connection"""
+        return self.load(fetch_tuples(connection, *self.columns_query()))
+
+    def load(self, rows):
+        """Store (table, column) rows and validate every registered projection"""
+        columns = {table: [] for table in self.tables}
+        for table, column in rows:
+            columns.setdefault(table, []).append(column)
+
+        with self._lock:
+            self._columns = {table: tuple(names) for table, names in columns.items()}
+            for projection in self.projections:
+                missing = projection.validate(set(columns.get(projection.table, ())))
+                if missing:
+                    log.warning('Missing columns will read as empty', table=projection.table, columns=list(missing))
+            self.loaded_at = datetime.datetime.now().isoformat()
+            self.loads += 1
+
+        unknown = [table for table, names in columns.items() if not names]
+        if unknown:
+            log.warning('No columns found in information_schema', tables=', '.join(unknown))
+        log.info('Schema cache loaded', projections=len(self.projections), tables=len(columns))
+        return self._columns
+
+    def status(self):
+        return {
+            'loaded_at': self.loaded_at,
+            'loads': self.loads,
+            'tables': {table: list(names) for table, names in (self._columns or {}).items()},
+            'projections': [
+                {
+                    'table': projection.table,
+                    'columns': list(projection.columns.names),
+                    'missing': list(projection.missing)
+                }
+                for projection in self.projections
+            ]
+        }
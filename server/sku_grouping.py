@@ -0,0 +1,77 @@
+"""
+Customer / SKU grouping
+Folds flat (customer, SKU) rows into one entry per customer carrying a
+list of distinct SKUs. Each row is visited once; groups live in a dict
+and already-seen SKUs in a per-group set, so the work is linear in the
+number of rows however long a customer's SKU list gets. Customers and
+SKUs keep the order of their first row.
+"""
+
+
+class SkuGrouping:
+    """How one endpoint's rows fold into customers with SKU lists.
+
+    ``group_key(row)`` identifies the customer and ``make_group(row)``
+    builds its entry from the first row, which must contain an empty
+    list under ``skus_field``. ``sku_key(row)`` identifies the SKU, or
+    returns None for rows without one; ``make_sku(row)`` builds the list
+    item. Rows can be dicts or db_access rows.
+    """
+
+    __slots__ = ('group_key', 'make_group', 'sku_key', 'make_sku', 'skus_field')
+
+    def __init__(self, group_key, make_group, sku_key, make_sku, skus_field):
+        self.group_key = group_key
+        self.make_group = make_group
+        self.sku_key = sku_key
+        self.make_sku = make_sku
+        self.skus_field = skus_field
+
+    def aggregate(self, rows):
+        """List of grouped entries, in first-seen order (rows in any order)"""
+        group_key, make_group, sku_key, make_sku = self.group_key, self.make_group, self.sku_key, self.make_sku
+        skus_field = self.skus_field
+        groups = {}
+
+        for row in rows:
+            key = group_key(row)
+            slot = groups.get(key)
+            if slot is None:
+                entry = make_group(row)
+                slot = groups[key] = (entry, set(), entry[skus_field])
+
+            sku = sku_key(row)
+            if sku is not None and sku not in slot[1]:
+                slot[1].add(sku)
+                slot[2].append(make_sku(row))
+
+        return [slot[0] for slot in groups.values()]
+
+    def iter_sorted(self, rows):
+        """Yield grouped entries from rows ordered by the group key.
+
+        Same output as ``aggregate`` for sorted input, but only the current
+        group is held in memory, so it suits streamed result sets.
+        """
+        group_key, make_group, sku_key, make_sku = self.group_key, self.make_group, self.sku_key, self.make_sku
+        skus_field = self.skus_field
+        entry = current = None
+        seen = skus = None
+
+        for row in rows:
+            key = group_key(row)
+            if entry is None or key != current:
+                if entry is not None:
+                    yield entry
+                entry = make_group(row)
+                current = key
+                seen = set()
+                skus = entry[skus_field]
+
+            sku = sku_key(row)
+            if sku is not None and sku not in seen:
+                seen.add(sku)
+                skus.append(make_sku(row))
+
+        if entry is not None:
+            yield entry
@@ -0,0 +1,192 @@
+"""
+Structured logging
+Leveled log records carrying key/value fields. Request threads only put
+records on a bounded in-memory queue; one background thread formats them
+and writes to stdout, so a slow or blocked console never holds up a
+request. When the queue is full new records are dropped and counted
+rather than waited on.
+
+Debug payloads (sample rows, full metric lists) are off by default. With
+LOG_DEBUG=1 they are logged for one request in LOG_DEBUG_SAMPLE_EVERY per
+route; LOG_DEBUG_SAMPLE_EVERY_<ENDPOINT> overrides that for one view
+(1 logs every request, 0 none).
+"""
+
+import atexit
+import datetime
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+from flask import g, has_request_context, request
+
+LOG_DEBUG = os.environ.get('LOG_DEBUG', '0') == '1'
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'DEBUG' if LOG_DEBUG else 'INFO').upper()
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'text')    # 'text' or 'json' (one object per line)
+LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', 10000))
+LOG_DEBUG_SAMPLE_EVERY = int(os.environ.get('LOG_DEBUG_SAMPLE_EVERY', 100))
+
+LOGGER_NAME = 'sales_assistant'
+
+
+class StructuredFormatter(logging.Formatter):
+    """'time LEVEL logger: message key=value ...' or one JSON object per record"""
+
+    def __init__(self, style=LOG_FORMAT):
+        super().__init__()
+        self.json = style == 'json'
+
+    def format(self, record):
+        fields = getattr(record, 'fields', None) or {}
+        timestamp = datetime.datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds')
+        name = record.name[len(LOGGER_NAME) + 1:] or record.name
+        if self.json:
+            entry = {'ts': timestamp, 'level': record.levelname, 'logger': name, 'msg': record.getMessage(), **fields}
+            if record.exc_info:
+                entry['exc'] = self.formatException(record.exc_info)
+            return json.dumps(entry, default=str)
+
+        line = f"{timestamp} {record.levelname:<7} {name}: {record.getMessage()}"
+        if fields:
+            line += ' ' + ' '.join(f"{key}={value}" for key, value in fields.items())
+        if record.exc_info:
+            line += '\n' + self.formatException(record.exc_info)
+        return line
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that drops records when the queue is full and starts
+    its writer thread lazily, in the process that logs (after a gunicorn fork)"""
+
+    def __init__(self, handler, queue_size=LOG_QUEUE_SIZE):
+        super().__init__(queue.Queue(maxsize=queue_size))
+        self.target = handler
+        self.dropped = 0
+        self._listener = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+
+    def prepare(self, record):
+        # Only the message arguments are resolved here; formatting and the
+        # traceback rendering happen on the writer thread
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        self._ensure_started()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self):
+        """Write out everything still queued and stop the writer thread"""
+        listener = self._listener
+        if listener is not None and self._pid == os.getpid():
+            listener.stop()
+        self._listener = None
+
+    def stats(self):
+        return {'queued': self.queue.qsize(), 'dropped': self.dropped}
+
+    def _ensure_started(self):
+        if self._listener is not None and self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._listener is None or self._pid != os.getpid():
+                # A listener inherited through fork has no thread in this process
+                self._listener = QueueListener(self.queue, self.target, respect_handler_level=True)
+                self._listener.start()
+                if self._pid is None:
+                    atexit.register(self.stop)
+                self._pid = os.getpid()
+
+
+class DebugSampler:
+    """Decides once per request whether its debug payloads are logged"""
+
+    def __init__(self, every=LOG_DEBUG_SAMPLE_EVERY):
+        self.every = every
+        self._counts = {}
+        self._every_by_endpoint = {}
+        self._lock = threading.Lock()
+
+    def every_for(self, endpoint):
+        every = self._every_by_endpoint.get(endpoint)
+        if every is None:
+            every = int(os.environ.get(f'LOG_DEBUG_SAMPLE_EVERY_{str(endpoint).upper()}', self.every))
+            self._every_by_endpoint[endpoint] = every
+        return every
+
+    def sampled(self):
+        if not has_request_context():
+            return True
+        decision = g.get('log_debug_sampled')
+        if decision is None:
+            endpoint = request.endpoint
+            every = self.every_for(endpoint)
+            with self._lock:
+                count = self._counts.get(endpoint, 0)
+                self._counts[endpoint] = count + 1
+            decision = g.log_debug_sampled = every > 0 and count % every == 0
+        return decision
+
+
+class StructuredLogger:
+    """``log.info('Found customers', count=3)`` - keyword arguments become record fields.
+
+    Inside a request the view's endpoint name is added as ``route``.
+    """
+
+    def __init__(self, name):
+        self._logger = logging.getLogger(f'{LOGGER_NAME}.{name}')
+
+    def _log(self, level, message, fields, exc_info=None):
+        if not self._logger.isEnabledFor(level):
+            return
+        if has_request_context() and 'route' not in fields:
+            fields['route'] = request.endpoint
+        self._logger.log(level, message, exc_info=exc_info, extra={'fields': fields})
+
+    def debug(self, message, **fields):
+        self._log(logging.DEBUG, message, fields)
+
+    def info(self, message, **fields):
+        self._log(logging.INFO, message, fields)
+
+    def warning(self, message, **fields):
+        self._log(logging.WARNING, message, fields)
+
+    def error(self, message, exc_info=None, **fields):
+        self._log(logging.ERROR, message, fields, exc_info)
+
+    def payload(self, message, **fields):
+        """Debug payload (sample rows, full lists): logged only in debug mode, for sampled requests"""
+        if LOG_DEBUG and sampler.sampled():
+            self._log(logging.DEBUG, message, fields)
+
+
+_stdout_handler = logging.StreamHandler(sys.stdout)
+_stdout_handler.setFormatter(StructuredFormatter())
+queue_handler = NonBlockingQueueHandler(_stdout_handler)
+sampler = DebugSampler()
+
+_root = logging.getLogger(LOGGER_NAME)
+_root.setLevel(LOG_LEVEL)
+_root.addHandler(queue_handler)
+# gunicorn/werkzeug may configure the root logger; don't log everything twice
+_root.propagate = False
+
+
+def get_logger(name):
+    return StructuredLogger(name)
+
+
+def log_stats():
+    """Records waiting for the writer thread and records dropped on a full queue"""
+    return queue_handler.stats()
@@ -0,0 +1,219 @@
+"""Shared API contract test for the Flask (app.py) and ASGI (asgi.py) entry points
+
+Each contract is a route plus the fields its JSON must carry. The same
+contracts are checked in both modes; when two targets are given the
+parsed JSON bodies must also match exactly. Every response must carry
+Server-Timing, and the routes behind Flask's response cache an ETag that
+a repeat request with If-None-Match turns into a 304.
+
+    python test_api_contract.py                        # Flask and ASGI apps in-process
+    python test_api_contract.py http://localhost:5000  # one running server
+    python test_api_contract.py http://localhost:5000 http://localhost:8000   # Flask vs ASGI
+
+The in-process mode (and pytest, one test per contract) only runs
+against the fixture database: every DB_* variable must be set and none
+may point at production (see fixture_db.py). Without that the pytest
+tests are skipped. CONTRACT_EMPLOYEE_ID picks the executive (default
+SNC1063).
+"""
+import json
+import os
+import sys
+import urllib.error
+import urllib.request
+
+import pytest
+
+from fixture_db import production_database_error
+
+EMPLOYEE_ID = os.environ.get('CONTRACT_EMPLOYEE_ID', 'SNC1063')
+
+CUSTOMER_FIELDS = ['customerId', 'customerName', 'phoneNumber']
+TARGET_FIELDS = ['metric', 'unit', 'target', 'achieved', 'slab1_target', 'slab2_target',
+                 'slab3_target', 'incentive_pending']
+RANKING_FIELDS = ['rank', 'name', 'employee_id', 'achievement', 'cluster', 'isCurrentUser']
+
+# (path, top-level fields, {list field: item fields})
+CONTRACTS = [
+    ('/api/customers/nudge-zone/{e}', ['success', 'customers'],
+     {'customers': CUSTOMER_FIELDS + ['lastOrder']}),
+    ('/api/customers/so-close/{e}', ['success', 'customers'],
+     {'customers': CUSTOMER_FIELDS + ['lastSeen']}),
+    ('/api/targets/daily/{e}', ['success', 'targets'], {'targets': TARGET_FIELDS}),
+    ('/api/targets/weekly/{e}?include=incentives', ['success', 'targets', 'incentives'], {'targets': TARGET_FIELDS}),
+    ('/api/leaderboard/{e}?period=day&layer=city', ['success', 'rankings', 'period', 'layer', 'grouped'],
+     {'rankings': RANKING_FIELDS}),
+    ('/api/leaderboard/{e}?period=week&layer=cluster', ['success', 'rankings', 'period', 'layer', 'grouped'],
+     {'rankings': ['cluster', 'rankings']}),
+    ('/api/leaderboard/{e}?period=day&layer=city&top=3&around=2',
+     ['success', 'rankings', 'period', 'layer', 'grouped', 'total', 'window'], {'rankings': RANKING_FIELDS}),
+    ('/api/target-customers/{e}?period=daily', ['success', 'customers', 'metric', 'period'],
+     {'customers': CUSTOMER_FIELDS + ['source', 'skusToPitch']}),
+    ('/api/attention/customers/{e}?metric=All', ['success', 'customers', 'metric', 'count'],
+     {'customers': CUSTOMER_FIELDS}),
+    ('/api/todays-orders/customers/{e}?layer={layer}', ['success', 'customers', 'layer', 'count'],
+     {'customers': ['customerId', 'customerName', 'contactNumber', 'orderTime']}),
+    ('/api/base/customers/{e}', ['success', 'customers', 'count'],
+     {'customers': CUSTOMER_FIELDS + ['customerType', 'locality', 'subscriptionEndDate', 'lastOrderDate']}),
+    ('/api/target-customers/{e}?period=daily&limit=20', ['success', 'customers', 'hasMore', 'nextCursor', 'total'],
+     {'customers': CUSTOMER_FIELDS + ['source', 'skusToPitch']}),
+    ('/api/base/customers/{e}?limit=50', ['success', 'customers', 'count', 'hasMore', 'nextCursor', 'total'],
+     {'customers': CUSTOMER_FIELDS + ['customerType', 'locality', 'subscriptionEndDate', 'lastOrderDate']}),
+    # Streamed bodies (Flask only; the ASGI app answers these buffered) must parse to the same JSON
+    ('/api/target-customers/{e}?period=daily&stream=1', ['success', 'customers', 'metric', 'period'],
+     {'customers': CUSTOMER_FIELDS + ['source', 'skusToPitch']}),
+    ('/api/base/customers/{e}?stream=1', ['success', 'customers', 'count'],
+     {'customers': CUSTOMER_FIELDS + ['customerType', 'locality', 'subscriptionEndDate', 'lastOrderDate']}),
+]
+
+# Routes behind Flask's response cache; streamed bodies are never cached, so they get no ETag
+REVALIDATED_ROUTES = ('/api/customers/', '/api/target-customers/', '/api/attention/customers/',
+                      '/api/todays-orders/customers/', '/api/base/customers/')
+
+
+class UrlClient:
+    """GET against a running server"""
+
+    def __init__(self, base_url):
+        self.name = base_url
+        self.base_url = base_url.rstrip('/')
+
+    def get(self, path, headers=None):
+        request = urllib.request.Request(self.base_url + path, headers=headers or {})
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                return response.status, response.headers, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers, json.loads(e.read() or b'null')
+
+
+class InProcessClient:
+    """GET through a framework test client (Flask test_client / Starlette TestClient)"""
+
+    def __init__(self, name, client):
+        self.name = name
+        self.client = client
+
+    def get(self, path, headers=None):
+        response = self.client.get(path, headers=headers or {})
+        if response.status_code == 304:
+            return 304, response.headers, None
+        payload = response.get_json() if hasattr(response, 'get_json') else response.json()
+        return response.status_code, response.headers, payload
+
+
+def check_contract(payload, fields, item_fields):
+    """List of problems with one response body"""
+    problems = [f"missing '{field}'" for field in fields if field not in payload]
+    if payload.get('success') is not True:
+        problems.append(f"success is {payload.get('success')!r}: {payload.get('message')}")
+    for list_field, required in item_fields.items():
+        for i, item in enumerate(payload.get(list_field) or []):
+            missing = [field for field in required if field not in item]
+            if missing:
+                problems.append(f"{list_field}[{i}] missing {missing}")
+                break
+    return problems
+
+
+def check_headers(client, path, headers):
+    """List of problems with one response's headers"""
+    problems = [] if headers.get('Server-Timing') else ["no Server-Timing header"]
+    if not path.startswith(REVALIDATED_ROUTES) or 'stream=1' in path:
+        return problems
+    etag = headers.get('ETag')
+    if not etag:
+        return problems + ["no ETag header"]
+    status, _, _ = client.get(path, {'If-None-Match': etag})
+    if status != 304:
+        problems.append(f"If-None-Match {etag} answered {status}, not 304")
+    return problems
+
+
+def todays_orders_layer(client):
+    status, _, payload = client.get(f'/api/todays-orders/layers/{EMPLOYEE_ID}')
+    layers = payload.get('layers') if status == 200 and isinstance(payload, dict) else None
+    return layers[0] if layers else 'day'
+
+
+def contract_problems(clients, path, fields, item_fields):
+    """Problems with one contract across all clients (empty when it holds)"""
+    problems = []
+    results = []
+    for client in clients:
+        status, headers, payload = client.get(path)
+        client_problems = [f"status {status}"] if status != 200 else []
+        client_problems += check_contract(payload if isinstance(payload, dict) else {}, fields, item_fields)
+        client_problems += check_headers(client, path, headers)
+        problems += [f"{client.name}: {problem}" for problem in client_problems]
+        results.append(payload)
+
+    if len(results) > 1 and any(result != results[0] for result in results[1:]):
+        problems.append(f"response bodies differ between {' and '.join(c.name for c in clients)}")
+    return problems
+
+
+def run(clients):
+    layer = todays_orders_layer(clients[0])
+    failures = 0
+
+    for template, fields, item_fields in CONTRACTS:
+        path = template.format(e=EMPLOYEE_ID, layer=layer)
+        problems = contract_problems(clients, path, fields, item_fields)
+        for problem in problems:
+            print(f"   [ERROR] {problem}")
+        failures += bool(problems)
+        print(f"[{'ERROR' if problems else 'OK'}] {path}")
+
+    print(f"\n{'[OK] All contracts hold' if not failures else f'[ERROR] {failures} contract failure(s)'}")
+    return failures == 0
+
+
+def in_process_clients():
+    """Flask and ASGI apps in this process, sharing the fixture database"""
+    error = production_database_error()
+    if error:
+        raise RuntimeError(f"In-process contracts need the fixture database: {error}")
+
+    from starlette.testclient import TestClient
+
+    import app
+    import asgi
+
+    app.init_worker()
+    asgi_client = TestClient(asgi.app)
+    asgi_client.__enter__()  # runs the lifespan (async pool)
+    return [InProcessClient('flask', app.app.test_client()), InProcessClient('asgi', asgi_client)]
+
+
+_in_process = []
+
+
+def shared_clients():
+    """In-process clients for the pytest tests, created once"""
+    if not _in_process:
+        pytest.importorskip('starlette')
+        try:
+            _in_process.extend(in_process_clients())
+        except RuntimeError as e:
+            pytest.skip(str(e))
+    return _in_process
+
+
+@pytest.mark.parametrize('template, fields, item_fields', CONTRACTS, ids=[contract[0] for contract in CONTRACTS])
+def test_contract(template, fields, item_fields):
+    clients = shared_clients()
+    path = template.format(e=EMPLOYEE_ID, layer=todays_orders_layer(clients[0]))
+    problems = contract_problems(clients, path, fields, item_fields)
+    assert not problems, problems
+
+
+if __name__ == '__main__':
+    urls = sys.argv[1:]
+    try:
+        clients = [UrlClient(url) for url in urls] if urls else in_process_clients()
+    except RuntimeError as e:
+        print(f"[ERROR] {e}")
+        sys.exit(2)
+    if not run(clients):
+        sys.exit(1)
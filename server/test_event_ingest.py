@@ -0,0 +1,49 @@
+"""Tests for event_ingest.normalize_event timestamps
+
+No database is needed. Run with pytest, or directly:
+
+    python test_event_ingest.py
+"""
+import datetime
+
+from event_ingest import EVENT_MAX_CLIENT_AGE, normalize_event
+
+NOW = datetime.datetime(2024, 3, 1, 0, 0, 2)
+
+
+def epoch_ms(moment):
+    return int(moment.timestamp() * 1000)
+
+
+def event(**fields):
+    return {'employee_id': 'E1', 'event_name': 'Home Page Viewed', **fields}
+
+
+def test_client_timestamp_dates_the_event():
+    # Buffered just before midnight, received just after: it belongs to the previous day
+    occurred = NOW - datetime.timedelta(seconds=4)
+    row = normalize_event(event(client_ts=epoch_ms(occurred)), NOW)
+    assert row[:2] == ('2024-02-29', '23:59:58')
+
+
+def test_client_timestamp_is_clamped():
+    future = normalize_event(event(client_ts=epoch_ms(NOW + datetime.timedelta(minutes=10))), NOW)
+    assert future[:2] == ('2024-03-01', '00:00:02')
+
+    stale = normalize_event(event(client_ts=epoch_ms(NOW - datetime.timedelta(days=3))), NOW)
+    oldest = NOW - datetime.timedelta(seconds=EVENT_MAX_CLIENT_AGE)
+    assert stale[:2] == (oldest.strftime('%Y-%m-%d'), oldest.strftime('%H:%M:%S'))
+
+
+def test_missing_or_invalid_client_timestamp_uses_now():
+    for client_ts in (None, 'yesterday', True, float('nan'), 10 ** 30):
+        row = normalize_event(event(client_ts=client_ts), NOW)
+        assert row[:2] == ('2024-03-01', '00:00:02'), client_ts
+    assert normalize_event(event(), NOW)[:2] == ('2024-03-01', '00:00:02')
+
+
+if __name__ == '__main__':
+    for test in (test_client_timestamp_dates_the_event, test_client_timestamp_is_clamped,
+                 test_missing_or_invalid_client_timestamp_uses_now):
+        test()
+        print(f"[OK] {test.__name__}")
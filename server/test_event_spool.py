@@ -0,0 +1,121 @@
+"""Tests for the durable event spool
+
+No database is needed: write_rows is replaced by a recorder that rejects
+rows whose event_name is 'bad'. Run with pytest, or directly:
+
+    python test_event_spool.py
+"""
+import os
+import tempfile
+
+from mysql.connector.errors import IntegrityError
+
+from event_spool import DEAD_LETTER_FILE, SpooledEventIngestor
+
+
+def event(n, name='page_view'):
+    return ('2024-01-01', '10:00:00', f'E{n}', name, '{}')
+
+
+class RecordingIngestor(SpooledEventIngestor):
+    def __init__(self, spool_dir, batch_size):
+        super().__init__(None, spool_dir, batch_size=batch_size)
+        self.shipped = []
+
+    def write_rows(self, rows):
+        if any(row[3] == 'bad' for row in rows):
+            raise IntegrityError(msg='Duplicate entry')
+        self.shipped.extend(rows)
+
+    def open(self):
+        # What _ensure_started does, without starting the replayer thread
+        self.spool.open()
+        self._position = self.spool.load_checkpoint()
+        return self
+
+    def replay_all(self):
+        # _replay_once returns False after a short batch; stop once nothing moves
+        position = None
+        while position != self._position:
+            position = self._position
+            self._replay_once()
+
+
+def test_resumes_from_checkpoint():
+    with tempfile.TemporaryDirectory() as spool_dir:
+        first = RecordingIngestor(spool_dir, batch_size=2).open()
+        first.spool.append([event(n) for n in range(5)])
+        first._replay_once()
+        assert first.shipped == [event(0), event(1)]
+        # Crash before the rest is shipped
+        first.spool.close()
+
+        second = RecordingIngestor(spool_dir, batch_size=2).open()
+        second.replay_all()
+        second.spool.close()
+        assert second.shipped == [event(n) for n in range(2, 5)]
+        # The sealed segment was deleted once fully shipped
+        assert second.spool.segments() == [second.spool.active_seq]
+
+
+def test_rotation_during_read_keeps_new_lines():
+    with tempfile.TemporaryDirectory() as spool_dir:
+        ingestor = RecordingIngestor(spool_dir, batch_size=8).open()
+        read = ingestor.spool.read
+        rotated = []
+
+        def read_then_rotate(seq, offset, limit):
+            lines = read(seq, offset, limit)
+            if not lines[0] and not rotated:
+                # The writer appends to the segment and rotates after our empty read
+                rotated.append(seq)
+                ingestor.spool.append([event(0)])
+                with ingestor.spool._append_lock:
+                    ingestor.spool._rotate()
+            return lines
+
+        ingestor.spool.read = read_then_rotate
+        ingestor._replay_once()
+        ingestor.replay_all()
+        ingestor.spool.close()
+        assert ingestor.shipped == [event(0)]
+
+
+def test_dead_letters_only_rejected_rows():
+    with tempfile.TemporaryDirectory() as spool_dir:
+        ingestor = RecordingIngestor(spool_dir, batch_size=8).open()
+        rows = [event(0), event(1), event(2, 'bad'), event(3), event(4), event(5, 'bad'), event(6)]
+        ingestor.spool.append(rows)
+        ingestor.replay_all()
+        ingestor.spool.close()
+
+        assert ingestor.shipped == [row for row in rows if row[3] != 'bad']
+        assert ingestor.dead_lettered == ingestor.failed == 2
+        assert ingestor.stats()['pending_bytes'] == 0
+        with open(os.path.join(ingestor.spool.directory, DEAD_LETTER_FILE), 'rb') as f:
+            dead = f.read().decode().splitlines()
+        assert dead == ['["2024-01-01","10:00:00","E2","bad","{}"]', '["2024-01-01","10:00:00","E5","bad","{}"]']
+
+
+def test_corrupt_lines_do_not_shift_dead_letters():
+    with tempfile.TemporaryDirectory() as spool_dir:
+        ingestor = RecordingIngestor(spool_dir, batch_size=8).open()
+        ingestor.spool.append([event(0)])
+        # A torn write from a crashed process
+        ingestor.spool._file.write(b'{"truncated\n')
+        ingestor.spool.append([event(1, 'bad'), event(2)])
+        ingestor.replay_all()
+        ingestor.spool.close()
+
+        assert ingestor.shipped == [event(0), event(2)]
+        assert ingestor.corrupt == 1
+        with open(os.path.join(ingestor.spool.directory, DEAD_LETTER_FILE), 'rb') as f:
+            assert b'"E1","bad"' in f.read()
+
+
+if __name__ == '__main__':
+    for test in (test_resumes_from_checkpoint, test_rotation_during_read_keeps_new_lines,
+                 test_dead_letters_only_rejected_rows,
+                 test_corrupt_lines_do_not_shift_dead_letters):
+        test()
+        print(f"[OK] {test.__name__}")
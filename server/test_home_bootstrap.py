@@ -0,0 +1,62 @@
+"""Tests for home_bootstrap.run_sections
+
+No database is needed: sections are plain functions that sleep. Run with
+pytest, or directly:
+
+    python test_home_bootstrap.py
+"""
+import concurrent.futures
+import time
+
+import home_bootstrap
+from home_bootstrap import run_sections
+
+
+def sleeper(seconds, value=None):
+    def load():
+        time.sleep(seconds)
+        return value
+    return load
+
+
+def test_queued_section_runs_once_the_pool_frees_up():
+    # Another request holds the only thread for longer than the section timeout
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    executor.submit(time.sleep, 0.3)
+    data, errors, _ = run_sections({'a': sleeper(0, 1), 'b': sleeper(0.05, 2)}, timeout=0.2, executor=executor)
+    assert data == {'a': 1, 'b': 2}
+    assert errors == {}
+
+
+def test_slow_section_on_a_saturated_pool_does_not_spin():
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    executor.submit(time.sleep, 0.3)
+    waits = []
+    wait = concurrent.futures.wait
+
+    def counting_wait(*args, **kwargs):
+        waits.append(kwargs.get('timeout'))
+        return wait(*args, **kwargs)
+
+    home_bootstrap.concurrent.futures.wait = counting_wait
+    try:
+        # 'slow' starts at 0.3s, after the 0.4s give-up point is scheduled but
+        # before its own 0.2s deadline has passed; 'late' never gets a turn
+        started = time.perf_counter()
+        data, errors, _ = run_sections({'slow': sleeper(1.0), 'late': sleeper(0, 3)}, timeout=0.2,
+                                       executor=executor, concurrency=1)
+        elapsed = time.perf_counter() - started
+    finally:
+        home_bootstrap.concurrent.futures.wait = wait
+
+    assert data == {}
+    assert errors['slow'] == 'Timed out after 0.2s'
+    assert errors['late'].startswith('Not started')
+    assert 0.45 <= elapsed < 0.8
+    assert len(waits) < 10, f'{len(waits)} waits: the loop is spinning'
+
+
+if __name__ == '__main__':
+    for test in (test_queued_section_runs_once_the_pool_frees_up, test_slow_section_on_a_saturated_pool_does_not_spin):
+        test()
+        print(f"[OK] {test.__name__}")
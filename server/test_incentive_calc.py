@@ -0,0 +1,182 @@
+"""Golden-output test for incentive_calc
+
+The golden cases below were worked out by hand from the SQL CASE ladder,
+including its NULL quirks. Run with pytest, or directly:
+
+    python test_incentive_calc.py          # golden cases only
+    python test_incentive_calc.py --live   # also compare against the SQL path on the database
+"""
+import math
+import sys
+
+from incentive_calc import (
+    DAILY_PAY_DAYS,
+    WEEKLY_PAY_DAYS,
+    build_batch,
+    employee_incentives,
+    metric_results,
+)
+
+# (employee_id, metric, slab_segment, target, incentive_percent, achievement, variable_pay)
+# variable_pay 3100 / 31 = 100 per day
+DAILY_ROWS = [
+    # E1 / GMV: achievement between slab1 and slab2 -> 150 / 200 * 20 = 15
+    ('E1', 'GMV', 'slab1', 100, 0.1, 150, 3100),
+    ('E1', 'GMV', 'slab2', 200, 0.2, 150, 3100),
+    ('E1', 'GMV', 'slab3', 300, 0.3, 150, 3100),
+    # E1 / Orders: below slab1 -> 5 / 10 * 5 = 2.5
+    ('E1', 'Orders', 'slab1', 10, 0.05, 5, 3100),
+    ('E1', 'Orders', 'slab2', 20, 0.10, 5, 3100),
+    ('E1', 'Orders', 'slab3', 30, 0.15, 5, 3100),
+    # E1 / Lines: no achievement row -> NULL falls through to ELSE -> slab3 pay 30
+    ('E1', 'Lines', 'slab1', 100, 0.1, None, 3100),
+    ('E1', 'Lines', 'slab2', 200, 0.2, None, 3100),
+    ('E1', 'Lines', 'slab3', 300, 0.3, None, 3100),
+    # E1 / Fill: above slab3 -> slab3 pay 30; duplicate achievement rows collapse with MAX
+    ('E1', 'Fill', 'slab1', 100, 0.1, 390, 3100),
+    ('E1', 'Fill', 'slab1', 100, 0.1, 400, 3100),
+    ('E1', 'Fill', 'slab2', 200, 0.2, 400, 3100),
+    ('E1', 'Fill', 'slab3', 300, 0.3, 400, 3100),
+    # E2: not in Executive -> NULL variable pay, everything NULL -> 0
+    ('E2', 'GMV', 'slab1', 50, 0.1, 60, None),
+    ('E2', 'GMV', 'slab2', 100, 0.2, 60, None),
+    ('E2', 'GMV', 'slab3', 150, 0.3, 60, None),
+    # E3: zero slab1 target -> 0 / 0 is NULL in MySQL, so nothing earned
+    ('E3', 'GMV', 'slab1', 0, 0.1, 0, 3100),
+    ('E3', 'GMV', 'slab2', 10, 0.2, 0, 3100),
+    ('E3', 'GMV', 'slab3', 20, 0.3, 0, 3100),
+]
+
+EXPECTED_DAILY_INCENTIVES = {
+    'E1': {'max_target': 105.0, 'achieved_amount': 77.5, 'remaining_amount': 27.5,
+           'slab1_target': 35.0, 'slab2_target': 70.0, 'slab3_target': 105.0},
+    'E2': {'max_target': 0, 'achieved_amount': 0, 'remaining_amount': 0,
+           'slab1_target': 0, 'slab2_target': 0, 'slab3_target': 0},
+    'E3': {'max_target': 30.0, 'achieved_amount': 0, 'remaining_amount': 30.0,
+           'slab1_target': 10.0, 'slab2_target': 20.0, 'slab3_target': 30.0},
+}
+
+EXPECTED_E1_TARGETS = [
+    {'metric': 'Fill', 'unit': '', 'target': 300.0, 'achieved': 400.0, 'slab1_target': 100.0,
+     'slab2_target': 200.0, 'slab3_target': 300.0, 'incentive_pending': 0.0},
+    {'metric': 'GMV', 'unit': '', 'target': 300.0, 'achieved': 150.0, 'slab1_target': 100.0,
+     'slab2_target': 200.0, 'slab3_target': 300.0, 'incentive_pending': 15.0},
+    {'metric': 'Lines', 'unit': '', 'target': 300.0, 'achieved': 0, 'slab1_target': 100.0,
+     'slab2_target': 200.0, 'slab3_target': 300.0, 'incentive_pending': 0.0},
+    {'metric': 'Orders', 'unit': '', 'target': 30.0, 'achieved': 5.0, 'slab1_target': 10.0,
+     'slab2_target': 20.0, 'slab3_target': 30.0, 'incentive_pending': 12.5},
+]
+
+# Weekly pay is 7/31 of the monthly variable pay: 3100 -> 700, so slab3 pay = 700 * 0.3 = 210
+WEEKLY_ROWS = [
+    ('E1', 'GMV', 'slab1', 1000, 0.1, 2500, 3100),
+    ('E1', 'GMV', 'slab2', 2000, 0.2, 2500, 3100),
+    ('E1', 'GMV', 'slab3', 3000, 0.3, 2500, 3100),
+]
+
+# 2500 / 3000 * 210 = 175
+EXPECTED_WEEKLY_INCENTIVES = {
+    'E1': {'max_target': 210.0, 'achieved_amount': 175.0, 'remaining_amount': 35.0,
+           'slab1_target': 70.0, 'slab2_target': 140.0, 'slab3_target': 210.0},
+}
+
+
+def assert_close(actual, expected, context, tolerance=1e-6):
+    """Compare two API-shaped dicts field by field"""
+    assert actual.keys() == expected.keys(), f"{context}: fields {sorted(actual)} != {sorted(expected)}"
+    for field, value in expected.items():
+        if isinstance(value, str):
+            assert actual[field] == value, f"{context}.{field}: {actual[field]!r} != {value!r}"
+        else:
+            assert math.isclose(actual[field], value, abs_tol=tolerance), \
+                f"{context}.{field}: {actual[field]} != {value}"
+
+
+def test_daily_incentives_golden():
+    incentives = employee_incentives(build_batch(DAILY_ROWS, DAILY_PAY_DAYS))
+    assert incentives.keys() == EXPECTED_DAILY_INCENTIVES.keys()
+    for employee_id, expected in EXPECTED_DAILY_INCENTIVES.items():
+        assert_close(incentives[employee_id], expected, employee_id)
+
+
+def test_weekly_incentives_golden():
+    incentives = employee_incentives(build_batch(WEEKLY_ROWS, WEEKLY_PAY_DAYS))
+    for employee_id, expected in EXPECTED_WEEKLY_INCENTIVES.items():
+        assert_close(incentives[employee_id], expected, employee_id)
+
+
+def test_daily_targets_golden():
+    e1_rows = [row for row in DAILY_ROWS if row[0] == 'E1']
+    targets = metric_results(build_batch(e1_rows, DAILY_PAY_DAYS))
+    assert [t['metric'] for t in targets] == [t['metric'] for t in EXPECTED_E1_TARGETS]
+    for actual, expected in zip(targets, EXPECTED_E1_TARGETS):
+        assert_close(actual, expected, expected['metric'])
+
+
+def compare_with_sql():
+    """Run the SQL CASE path and the Python path on the live database and diff them"""
+    from app import get_db_connection
+    from incentive_calc import (
+        DAILY_SLAB_ROWS_QUERY,
+        WEEKLY_SLAB_ROWS_QUERY,
+        REFERENCE_DAILY_INCENTIVES_QUERY,
+        REFERENCE_WEEKLY_INCENTIVES_QUERY,
+    )
+
+    connection = get_db_connection()
+    if not connection:
+        print("[ERROR] Database connection failed")
+        return False
+
+    ok = True
+    cursor = connection.cursor(dictionary=True)
+    for name, reference_query, flat_query, pay_days in [
+        ('daily', REFERENCE_DAILY_INCENTIVES_QUERY, DAILY_SLAB_ROWS_QUERY, DAILY_PAY_DAYS),
+        ('weekly', REFERENCE_WEEKLY_INCENTIVES_QUERY, WEEKLY_SLAB_ROWS_QUERY, WEEKLY_PAY_DAYS),
+    ]:
+        cursor.execute(reference_query)
+        reference = {}
+        for row in cursor.fetchall():
+            max_target = float(row['max_variable_pay']) if row['max_variable_pay'] else 0
+            achieved = float(row['Achievement']) if row['Achievement'] else 0
+            reference[row['employee_id']] = {
+                'max_target': max_target,
+                'achieved_amount': achieved,
+                'remaining_amount': max_target - achieved,
+                'slab1_target': float(row['slab1_target']) if row['slab1_target'] else 0,
+                'slab2_target': float(row['slab2_target']) if row['slab2_target'] else 0,
+                'slab3_target': float(row['slab3_target']) if row['slab3_target'] else 0
+            }
+
+        flat_cursor = connection.cursor()
+        flat_cursor.execute(flat_query)
+        computed = employee_incentives(build_batch(flat_cursor.fetchall(), pay_days))
+        flat_cursor.close()
+
+        mismatches = 0
+        for employee_id, expected in reference.items():
+            try:
+                # MySQL rounds DECIMAL division to 4 places, so allow paise-level drift
+                assert_close(computed.get(employee_id, {}), expected, f"{name}/{employee_id}", tolerance=0.01)
+            except AssertionError as e:
+                mismatches += 1
+                print(f"   [MISMATCH] {e}")
+        if set(computed) != set(reference):
+            mismatches += 1
+            print(f"   [MISMATCH] {name}: employee sets differ")
+
+        print(f"[{'OK' if not mismatches else 'ERROR'}] {name}: {len(reference)} employees, {mismatches} mismatches")
+        ok = ok and not mismatches
+
+    cursor.close()
+    connection.close()
+    return ok
+
+
+if __name__ == '__main__':
+    for test in (test_daily_incentives_golden, test_weekly_incentives_golden, test_daily_targets_golden):
+        test()
+        print(f"[OK] {test.__name__}")
+
+    if '--live' in sys.argv and not compare_with_sql():
+        sys.exit(1)
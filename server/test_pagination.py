@@ -0,0 +1,105 @@
+"""Tests for keyset pagination
+
+Pure Python: cursors, ?limit=&after= parsing, page trimming and the
+keyset SQL built for the customer lists. Run with pytest, or directly:
+
+    python test_pagination.py
+"""
+from pagination import PAGE_LIMIT_MAX, PageRequest, decode_cursor, encode_cursor, page_args, page_fields
+
+
+def expect_invalid(call, *args):
+    try:
+        call(*args)
+    except ValueError:
+        return
+    raise AssertionError(f'{call.__name__}{args} was accepted')
+
+
+def test_cursor_round_trip():
+    for key in [('Acme Stores', 42), (None, 7), ('Ünïcode & "quotes"', 10 ** 12)]:
+        token = encode_cursor('base_customers', key)
+        assert '=' not in token
+        assert decode_cursor('base_customers', token, 2) == key
+    assert decode_cursor('target_customers', encode_cursor('target_customers', (15,)), 1) == (15,)
+
+
+def test_cursor_from_another_endpoint_is_rejected():
+    token = encode_cursor('target_customers', (15,))
+    expect_invalid(decode_cursor, 'base_customers', token, 1)
+    expect_invalid(decode_cursor, 'base_customers', encode_cursor('base_customers', (15,)), 2)
+    for garbage in ['', 'not-base64!', 'e30', encode_cursor('base_customers', ('a', 1))[:-3]]:
+        expect_invalid(decode_cursor, 'base_customers', garbage, 2)
+
+
+def test_page_args():
+    assert page_args({}, 'base_customers', 2) is None
+    page = page_args({'limit': '50'}, 'base_customers', 2)
+    assert (page.limit, page.after, page.with_total) == (50, None, True)
+
+    after = encode_cursor('base_customers', (None, 3))
+    page = page_args({'limit': '50', 'after': after}, 'base_customers', 2)
+    assert (page.after, page.with_total) == ((None, 3), False)
+    assert page_args({'limit': '50', 'after': after, 'total': '1'}, 'base_customers', 2).with_total
+
+    for args in [{'limit': '0'}, {'limit': str(PAGE_LIMIT_MAX + 1)}, {'limit': 'ten'},
+                 {'limit': '5', 'after': encode_cursor('target_customers', (3,))}]:
+        expect_invalid(page_args, args, 'base_customers', 2)
+
+
+def test_page_fields_keeps_a_key_together():
+    page = PageRequest(2, None, False)
+    key = lambda row: (row['name'], row['id'])
+    rows = [{'name': None, 'id': 4}, {'name': 'A', 'id': 1, 'locality': 'X'},
+            {'name': 'A', 'id': 1, 'locality': 'Y'}, {'name': 'B', 'id': 2}]
+    items, fields = page_fields('base_customers', page, rows, key)
+    assert items == rows[:3]
+    assert fields['hasMore']
+    assert decode_cursor('base_customers', fields['nextCursor'], 2) == ('A', 1)
+
+    items, fields = page_fields('base_customers', PageRequest(2, None, True), rows[:3], key, total=3)
+    assert items == rows[:3]
+    assert fields == {'hasMore': False, 'nextCursor': None, 'total': 3}
+
+
+def test_base_customers_keyset_after_null_name():
+    from app import base_customers_query
+
+    query, params = base_customers_query('E1', after=(None, 5), limit=11)
+    # Rows with a NULL name sort first: continue with the remaining NULL-name
+    # customers, then every named one
+    assert 'customername IS NOT NULL OR customer_id > %s' in query
+    assert params == ('E1', 5, 11, 'E1')
+    assert 'page.customername <=> b.customername' in query
+
+    query, params = base_customers_query('E1', '', '98765', after=('Acme', 5), limit=11)
+    assert 'customername > %s OR (customername = %s AND customer_id > %s)' in query
+    assert params == ('E1', 98765, 'Acme', 'Acme', 5, 11, 'E1', 98765)
+    assert query.count('%s') == len(params)
+
+
+def test_base_customers_total_counts_keys():
+    from app import base_customers_count_query
+
+    # total must count what limit pages over: keys, not their distinct rows
+    query, params = base_customers_count_query('E1', '', '98765')
+    assert 'SELECT DISTINCT customername, customer_id\n' in query
+    assert params == ('E1', 98765)
+    assert query.count('%s') == len(params)
+
+
+def test_target_customers_keyset():
+    from app import target_customers_query
+
+    query, params = target_customers_query('E1', 'day', 'GMV', after=15, limit=21)
+    assert 'customer_id > %s' in query
+    assert params == ('E1', 'day', 'GMV', 15, 21, 'E1', 'day', 'GMV')
+    assert query.count('%s') == len(params)
+
+
+if __name__ == '__main__':
+    for test in (test_cursor_round_trip, test_cursor_from_another_endpoint_is_rejected, test_page_args,
+                 test_page_fields_keeps_a_key_together, test_base_customers_keyset_after_null_name,
+                 test_base_customers_total_counts_keys, test_target_customers_keyset):
+        test()
+        print(f"[OK] {test.__name__}")
@@ -42,8 +42,99 @@ const isDuplicateEvent = (eventKey) => {
   return false;
 };
 
+// Events are coalesced on the client and sent to /events/batch together
+const pendingEvents = [];
+const FLUSH_INTERVAL_MS = 5000; // send at most every 5 seconds...
+const MAX_PENDING_EVENTS = 20;  // ...or as soon as this many are waiting
+const MAX_BUFFERED_EVENTS = 500; // server batch limit; oldest events are dropped past this
+let flushTimer = null;
+
+/**
+ * Send all pending events in one request.
+ * With useBeacon the request survives the page being hidden or closed.
+ */
+export const flushEvents = async ({ useBeacon = false } = {}) => {
+  if (flushTimer) {
+    clearTimeout(flushTimer);
+    flushTimer = null;
+  }
+  if (pendingEvents.length === 0) {
+    return null;
+  }
+
+  const events = pendingEvents.splice(0, pendingEvents.length);
+  const body = JSON.stringify(events);
+
+  if (useBeacon && navigator.sendBeacon) {
+    const sent = navigator.sendBeacon(
+      `${API_BASE_URL}/events/batch`,
+      new Blob([body], { type: 'application/json' })
+    );
+    if (sent) {
+      return null;
+    }
+  }
+
+  try {
+    const response = await fetch(`${API_BASE_URL}/events/batch`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body,
+      keepalive: useBeacon
+    });
+
+    const data = await response.json();
+
+    if (data.accepted) {
+      console.log(`✅ Events logged: ${data.accepted}`);
+    }
+
+    // Put back events the server could not queue so the next flush retries them
+    const rejected = (data.results || []).filter(result => result.status === 'rejected');
+    if (rejected.length) {
+      pendingEvents.unshift(...rejected.map(result => events[result.index]));
+      scheduleFlush();
+    }
+    if (data.invalid) {
+      console.error('Failed to log events:', (data.results || []).filter(result => result.status === 'invalid'));
+    }
+
+    return data;
+  } catch (error) {
+    console.error('Error logging events:', error);
+    // Network failure: keep the events for the next attempt
+    pendingEvents.unshift(...events.slice(-MAX_BUFFERED_EVENTS));
+    scheduleFlush();
+    return null;
+  }
+};
+
+const scheduleFlush = () => {
+  if (pendingEvents.length > MAX_BUFFERED_EVENTS) {
+    pendingEvents.splice(0, pendingEvents.length - MAX_BUFFERED_EVENTS);
+  }
+  if (pendingEvents.length >= MAX_PENDING_EVENTS) {
+    flushEvents();
+  } else if (!flushTimer) {
+    flushTimer = setTimeout(flushEvents, FLUSH_INTERVAL_MS);
+  }
+};
+
+// Don't lose buffered events when the app is backgrounded or closed
+if (typeof window !== 'undefined') {
+  window.addEventListener('pagehide', () => flushEvents({ useBeacon: true }));
+  document.addEventListener('visibilitychange', () => {
+    if (document.visibilityState === 'hidden') {
+      flushEvents({ useBeacon: true });
+    }
+  });
+}
+
 /**
  * Log an event to the backend
+ * Events are buffered and sent in batches (see flushEvents).
  * @param {string} eventName - Name of the event (e.g., 'Login', 'Home Page Viewed', 'Called Customer')
  * @param {object} metaData - Additional data about the event (optional)
  */
@@ -70,27 +161,16 @@ export const logEvent = async (eventName, metaData = {}) => {
       ? JSON.stringify(metaData)
       : String(metaData);
 
-    const response = await fetch(`${API_BASE_URL}/events/log`, {
-      method: 'POST',
-      headers: {
-        'Content-Type': 'application/json',
-      },
-      body: JSON.stringify({
-        employee_id: employeeId,
-        event_name: eventName,
-        meta_data: metaDataString
-      })
+    pendingEvents.push({
+      employee_id: employeeId,
+      event_name: eventName,
+      meta_data: metaDataString,
+      // When it happened - the event may be sent seconds (or a retry later) after this
+      client_ts: Date.now()
     });
+    scheduleFlush();
 
-    const data = await response.json();
-
-    if (data.success) {
-      console.log(`✅ Event logged: ${eventName}`);
-    } else {
-      console.error('Failed to log event:', data.message);
-    }
-
-    return data;
+    return { success: true, queued: true };
   } catch (error) {
     console.error('Error logging event:', error);
     return null;